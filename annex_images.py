@@ -0,0 +1,80 @@
+"""Normalização das imagens de anexos do Relatório ABNT (sem dependência do Streamlit)."""
+import hashlib
+import io
+
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+
+try:
+    from PIL import Image as PILImage, ImageOps
+except ImportError:
+    PILImage = None
+
+ANNEX_MAX_WIDTH = 15 * cm # Largura máxima da figura no PDF (pontos)
+ANNEX_MAX_HEIGHT = 22 * cm # Altura útil da página Letter com as margens ABNT do relatório
+ANNEX_PRINT_DPI = 200 # Resolução máxima útil na impressão
+ANNEX_THUMB_WIDTH = 300 # Miniatura do st.image (exibida com 150 px, 2x para telas HiDPI)
+ANNEX_JPEG_QUALITY = 85
+
+def image_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def display_size(width_px, height_px):
+    # Mesma regra do ReportLab sem DPI: 1 px = 1 pt, limitado à largura máxima
+    width, height = float(width_px), float(height_px)
+    if width > ANNEX_MAX_WIDTH: width, height = ANNEX_MAX_WIDTH, height * ANNEX_MAX_WIDTH / width
+    # Retratos muito altos (ex: foto girada pelo EXIF) não cabem no frame da página
+    if height > ANNEX_MAX_HEIGHT: width, height = width * ANNEX_MAX_HEIGHT / height, ANNEX_MAX_HEIGHT
+    return width, height
+
+def _encode(img, as_png):
+    buffer = io.BytesIO()
+    if as_png: img.save(buffer, 'PNG', optimize=True)
+    else: img.save(buffer, 'JPEG', quality=ANNEX_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+def normalize_annex_image(data):
+    """Decodifica uma vez, reamostra para a resolução de impressão e recomprime.
+
+    Retorna ``{'image', 'thumb', 'width', 'height', 'hash'}``; ``width``/``height`` são
+    o tamanho de exibição no PDF (pontos), preservado em relação à imagem original.
+    """
+    digest = image_digest(data)
+    if PILImage is None: return {'image': data, 'thumb': data, 'hash': digest}
+    with PILImage.open(io.BytesIO(data)) as src:
+        source_format = src.format
+        rotated = src.getexif().get(0x0112, 1) != 1
+        img = ImageOps.exif_transpose(src) # Fotos de celular: aplica a rotação do EXIF
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    if has_alpha: img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'L'): img = img.convert('RGB')
+    # PNG só para transparência ou diagramas com poucas cores; fotos viram JPEG
+    as_png = has_alpha or (source_format == 'PNG' and img.getcolors(256) is not None)
+
+    width, height = display_size(img.width, img.height)
+    target_px = round(width / 72 * ANNEX_PRINT_DPI)
+    resized = img.width > target_px
+    if resized: img = img.resize((target_px, max(1, round(img.height * target_px / img.width))), PILImage.LANCZOS)
+    image = _encode(img, as_png)
+    # Já no tamanho e formato certos: recomprimir só degradaria (ou aumentaria) o arquivo
+    if not (resized or rotated) and source_format in ('PNG', 'JPEG') and len(data) <= len(image): image = data
+    thumb = img.copy()
+    thumb.thumbnail((ANNEX_THUMB_WIDTH, ANNEX_THUMB_WIDTH * 4), PILImage.LANCZOS)
+    thumb = image if thumb.size == img.size else _encode(thumb, as_png)
+    return {'image': image, 'thumb': thumb, 'width': width, 'height': height, 'hash': digest}
+
+# --- PREPARAÇÃO PARA O DOC.BUILD ---
+class AnnexImageReader(ImageReader):
+    """ImageReader já decodificado, seguro para reuso entre builds concorrentes."""
+    def __init__(self, data):
+        self._source = data
+        ImageReader.__init__(self, io.BytesIO(data))
+        # Decodifica agora (no thread pool), não durante o layout: o drawImage só reaproveita os bytes
+        self.getSize()
+        self.getRGBData()
+        if self._dataA: self._dataA.getRGBData()
+        self.nbytes = len(self._data) + (len(self._dataA._data) if self._dataA else 0) + len(data)
+
+    def _jpeg_fh(self):
+        # Um handle novo por chamada: o mesmo reader pode estar em dois builds ao mesmo tempo
+        return io.BytesIO(self._source)
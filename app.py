@@ -1,28 +1,38 @@
 import streamlit as st
-from streamlit_sortables import sort_items
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Flowable, Table, TableStyle, PageBreak, Image
 from reportlab.lib.units import cm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
 from reportlab.lib.enums import TA_LEFT, TA_JUSTIFY
 import io
+import os
+import importlib.util
+import threading
 from datetime import date
 import re
-try:
-    from PyPDF2 import PdfReader
-except ImportError:
-    try:
-        from pypdf import PdfReader
-    except ImportError:
-        PdfReader = None
-
-try:
-    from docx import Document
-    from docx.shared import Pt, Cm, Inches, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-except ImportError:
-    Document = None
+import json
+import copy
+import functools
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from caching import RenderCache, content_key
+from document_ir import DocumentIR
+from layout_fit import largest_fitting, layout_report, measure_flowables, paginate
+from profiling import Profiler
+from preview_html import PreviewRenderer, preview_css
+from document_store import DocumentStore, DOCUMENT_KINDS
+from state_backends import SqliteBackend, open_backend
+from ats_engine import PDF_BACKEND, pdf_reader_class, AtsResultCache, score_batch, iter_batch_sources, result_row, results_to_csv
+
+# Dependências pesadas (platypus, python-docx, pypdf, Pillow, sortables) são importadas no
+# primeiro uso de quem precisa delas; aqui só se verifica se estão instaladas (sem importar)
+DOCX_AVAILABLE = importlib.util.find_spec('docx') is not None
+
+# ASCII85 só serve para transporte 7-bit; sem o acelerador C ele é codificado em Python puro
+# e domina o tempo de build dos relatórios com figuras (além de inflar o PDF em ~25%).
+# Via RL_useA85 porque o rl_config só é importado (e lê o ambiente) no primeiro PDF.
+os.environ.setdefault('RL_useA85', '0')
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="Gerador de Currículos ATS", page_icon="favicon.png", layout="wide")
@@ -41,6 +51,17 @@ TRANSLATIONS = {
         'settings': "⚙️ Configurações",
         'density_label': "Densidade do Layout",
         'density_help': "Ajuste a densidade para caber mais conteúdo.",
+        'bundle_header': "📦 Pacote de exportação",
+        'bundle_formats': "Documentos",
+        'bundle_langs': "Idiomas",
+        'bundle_btn': "📦 Baixar pacote (.zip)",
+        'fit_label': "Ajustar automaticamente a N páginas",
+        'fit_help': "Escolhe a maior densidade em que o currículo cabe no número de páginas (sem gerar o PDF a cada tentativa).",
+        'fit_pages_label': "Páginas",
+        'fit_result': "📐 Escala automática: {scale:.2f} ({pages} página(s))",
+        'meter_fits': "📏 Cabe em {max_pages} página(s): {percent}% ocupado ({free:.0f} pt livres)",
+        'meter_overflow': "📏 {pages} páginas: passa de {max_pages} página(s) em {sections}",
+        'meter_first': "Primeiro trecho além do limite: “{text}”",
         'lang_label': "Idioma / Language",
         'section_editor': "📝 Editor de Seções",
         'go_to': "Ir para:",
@@ -67,6 +88,7 @@ TRANSLATIONS = {
         'lbl_img_caption': "Legenda da Imagem",
         'download_prop_btn': "📥 Baixar Proposta em PDF",
         'download_rep_btn': "📥 Baixar Relatório em PDF",
+        'download_docx_btn': "📥 Baixar em Word (.docx)",
         # Section Titles (Proposal)
         'sec_1': "Resumo Executivo",
         'sec_2': "Declaração do Problema",
@@ -174,7 +196,13 @@ TRANSLATIONS = {
         'ats_sec_found': "Seções Identificadas",
         'ats_raw_text': "Texto Bruto Extraído (O que o robô vê)",
         'ats_parsed_data': "Dados Estruturados Identificados",
-        'ats_error_lib': "A biblioteca PyPDF2 não está instalada. Instale com 'pip install PyPDF2' para usar este módulo."
+        'ats_error_lib': "A biblioteca PyPDF2 não está instalada. Instale com 'pip install PyPDF2' para usar este módulo.",
+        'ats_batch_header': "📦 Análise em Lote (ZIP de PDFs)",
+        'ats_batch_upload': "Faça upload de um .zip com vários currículos em PDF",
+        'ats_batch_run': "🚀 Analisar Lote",
+        'ats_batch_files': "Arquivos Processados",
+        'ats_batch_rate': "Arquivos/s",
+        'ats_batch_avg': "Pontuação Média"
     },
     'en': {
         'app_title': "Resume & Cover Letter Builder (ATS-Friendly)",
@@ -186,6 +214,17 @@ TRANSLATIONS = {
         'settings': "⚙️ Settings",
         'density_label': "Layout Density",
         'density_help': "Adjust density to fit more content.",
+        'bundle_header': "📦 Export bundle",
+        'bundle_formats': "Documents",
+        'bundle_langs': "Languages",
+        'bundle_btn': "📦 Download bundle (.zip)",
+        'fit_label': "Auto-fit to N pages",
+        'fit_help': "Picks the largest density that keeps the resume within the page count (without building the PDF on every try).",
+        'fit_pages_label': "Pages",
+        'fit_result': "📐 Auto scale: {scale:.2f} ({pages} page(s))",
+        'meter_fits': "📏 Fits on {max_pages} page(s): {percent}% used ({free:.0f} pt free)",
+        'meter_overflow': "📏 {pages} pages: goes past {max_pages} page(s) in {sections}",
+        'meter_first': "First content past the limit: “{text}”",
         'lang_label': "Language / Idioma",
         'section_editor': "📝 Section Editor",
         'go_to': "Go to:",
@@ -223,6 +262,7 @@ TRANSLATIONS = {
         'lbl_img_caption': "Image Caption",
         'download_prop_btn': "📥 Download Proposal as PDF",
         'download_rep_btn': "📥 Download Report as PDF",
+        'download_docx_btn': "📥 Download as Word (.docx)",
         # Section Titles (Proposal)
         'sec_1': "Executive Summary",
         'sec_2': "Problem Statement",
@@ -329,7 +369,13 @@ TRANSLATIONS = {
         'ats_sec_found': "Sections Identified",
         'ats_raw_text': "Extracted Raw Text (What the robot sees)",
         'ats_parsed_data': "Identified Structured Data",
-        'ats_error_lib': "PyPDF2 library is not installed. Install with 'pip install PyPDF2' to use this module."
+        'ats_error_lib': "PyPDF2 library is not installed. Install with 'pip install PyPDF2' to use this module.",
+        'ats_batch_header': "📦 Batch Analysis (ZIP of PDFs)",
+        'ats_batch_upload': "Upload a .zip with multiple PDF resumes",
+        'ats_batch_run': "🚀 Analyze Batch",
+        'ats_batch_files': "Files Processed",
+        'ats_batch_rate': "Files/s",
+        'ats_batch_avg': "Average Score"
     }
 }
 
@@ -394,7 +440,7 @@ if 'report_data' not in st.session_state:
         "text_sections": {
             "1": [], "2": [], "3": [], "4": [], "5": [], "6": [], "7": []
         },
-        "annexes": [] # List of {'image': bytes, 'caption': str}
+        "annexes": [] # List of {'image': bytes, 'thumb': bytes, 'width': pt, 'height': pt, 'hash': str, 'caption': str}
     }
 
 if 'ats_data' not in st.session_state:
@@ -402,10 +448,19 @@ if 'ats_data' not in st.session_state:
         "score": 0,
         "raw_text": "",
         "sections_found": [],
-        "parsed_content": {}
+        "parsed_content": {},
+        "batch_results": [],
+        "batch_elapsed": 0.0
     }
 
 # --- FUNÇÕES DE LÓGICA (CRUD) ---
+def update_contact(name, email, phone, linkedin, location, stack):
+    st.session_state['resume_data']['contact'].update({"name": name, "email": email, "phone": phone, "linkedin": linkedin, "location": location})
+    st.session_state['resume_data']['stack'] = stack
+def update_summary(summary, achievements):
+    st.session_state['resume_data'].update({"summary": summary, "achievements": achievements})
+def update_skills(skills_input):
+    st.session_state['resume_data']['skills'] = [s.strip() for s in skills_input.split(",") if s.strip()]
 def add_experience(company, position, start, end, description):
     st.session_state['resume_data']['experience'].append({
         "company": company, "position": position, "start": start, "end": end, "description": description
@@ -451,437 +506,264 @@ def add_report_subsection(sec_id, title, content):
 def remove_report_subsection(sec_id, index):
     st.session_state['report_data']['text_sections'][sec_id].pop(index)
 def add_report_annex(image_bytes, caption):
-    st.session_state['report_data']['annexes'].append({'image': image_bytes, 'caption': caption})
+    # Decodifica/reamostra uma única vez no upload; uploads idênticos compartilham o mesmo resultado
+    from annex_images import image_digest, normalize_annex_image
+    digest = image_digest(image_bytes)
+    try: prepared = get_annex_cache().get_or_render(digest, lambda: normalize_annex_image(image_bytes))
+    except Exception: prepared = {'image': image_bytes, 'hash': digest} # Imagem ilegível: o PDF exibe o erro
+    store = get_document_store()
+    if store is not None:
+        # Os bytes vão para o SQLite; a sessão guarda só as referências (lidas sob demanda)
+        refs = {f'{field}_ref': store.put_blob(prepared.get(field, prepared['image'])) for field in ('image', 'thumb')}
+        prepared = {**{k: v for k, v in prepared.items() if k not in ('image', 'thumb')}, **refs}
+    st.session_state['report_data']['annexes'].append({**prepared, 'caption': caption})
 def remove_report_annex(index): st.session_state['report_data']['annexes'].pop(index)
 
 # --- AUDITORIA DE SISTEMA (HEALTH CHECK) ---
 def run_system_audit():
     status = {"pdf_engine": False, "session_storage": False, "data_integrity": False}
-    try:
-        from reportlab.platypus import SimpleDocTemplate
-        status["pdf_engine"] = True
-    except ImportError: status["pdf_engine"] = False
+    # find_spec não importa o módulo: o audit roda a cada rerun
+    status["pdf_engine"] = importlib.util.find_spec('reportlab.platypus') is not None
     if 'resume_data' in st.session_state: status["session_storage"] = True
     data = st.session_state.get('resume_data', {})
     if isinstance(data, dict) and "contact" in data: status["data_integrity"] = True
-    return all(status.values()), status
+    checks_ok = all(status.values())
+    # Com a instrumentação ligada (nesta sessão ou via APP_PROFILE), o audit também reporta
+    # p50/p95 por span: os da sessão quando ela ligou o toggle (não afeta o status)
+    profiler, session_id = get_profiler(), profiling_session()
+    if session_id or profiler.enabled: status["latency_ms"] = profiler.summary(session_id)
+    return checks_ok, status
+
+# --- INSTRUMENTAÇÃO (OPT-IN: APP_PROFILE=1 OU TOGGLE NO SIDEBAR) ---
+@st.cache_resource
+def get_profiler():
+    # APP_PROFILE_FILE grava cada span como JSON lines (campos no estilo OpenTelemetry)
+    return Profiler(enabled=os.environ.get('APP_PROFILE', '') not in ('', '0'), trace_path=os.environ.get('APP_PROFILE_FILE') or None, session=profiling_session)
+
+def profiling_session():
+    # O Profiler é um só no processo: o toggle do sidebar liga a instrumentação só para a sessão
+    # que está rodando (None fora de um rerun do Streamlit: CLI, workers do pool)
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx and 'profiling' in ctx.session_state and ctx.session_state['profiling'] else None
+
+def profiled(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_profiler().span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- REGISTRO DE ESTILOS (PARAGRAPHSTYLE) ---
+# Presets de densidade do sidebar; também usados para pré-aquecer o registro
+DENSITY_PRESETS = {"Confortável": 1.05, "Normal": 1.0, "Compacto": 0.9, "Super Compacto": 0.85}
+
+@st.cache_resource
+def _sample_styles():
+    from reportlab.lib.styles import getSampleStyleSheet
+    return getSampleStyleSheet()
+
+def _resume_styles(scale_factor):
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    styles = _sample_styles()
+    def scaled(size, min_size=9): return max(size * scale_factor, min_size)
+    # Refatorado para Times-Roman e Centralização e Cor Preta (ATS)
+    return {
+        'name': ParagraphStyle('Name', parent=styles['Heading1'], fontSize=scaled(26), leading=scaled(26) * 1.2, textColor=colors.black, fontName='Times-Bold', alignment=1, spaceAfter=scaled(4)),
+        # Stack (Helvetica, Centralizado)
+        'stack': ParagraphStyle('Stack', parent=styles['Normal'], fontSize=scaled(12), leading=scaled(12) * 1.2, textColor=colors.black, fontName='Helvetica', alignment=1, spaceAfter=scaled(12)),
+        'contact': ParagraphStyle('Contact', parent=styles['Normal'], fontSize=scaled(10), leading=scaled(10) * 1.2, textColor=colors.black, fontName='Times-Roman', alignment=1, spaceAfter=scaled(4)),
+        # Section Header - Times-Bold e Centralizado - Cor Preta - Espaçamento Reduzido
+        'section_header': ParagraphStyle('SectionHeader', parent=styles['Heading2'], fontSize=scaled(13), leading=scaled(13) * 1.05, textColor=colors.black, fontName='Times-Bold', textTransform='uppercase', spaceBefore=scaled(12), spaceAfter=scaled(0), alignment=1),
+        'item_header': ParagraphStyle('ItemHeader', parent=styles['Normal'], fontSize=scaled(11.5), leading=scaled(11.5) * 1.2, fontName='Times-Bold', textColor=colors.black, spaceAfter=scaled(1), spaceBefore=0),
+        'item_sub': ParagraphStyle('ItemSub', parent=styles['Normal'], fontSize=scaled(10.5), leading=scaled(10.5) * 1.2, fontName='Times-Italic', textColor=colors.black, spaceAfter=scaled(2)),
+        'normal': ParagraphStyle('NormalText', parent=styles['Normal'], fontSize=scaled(10.5), leading=scaled(10.5) * 1.4, alignment=TA_JUSTIFY, spaceAfter=scaled(3), fontName='Times-Roman', spaceBefore=0),
+    }
 
-    return all(status.values()), status
+def _cover_letter_styles(scale_factor):
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    styles = _sample_styles()
+    def scaled(size, min_size=9): return max(size * scale_factor, min_size)
+    return {
+        'name': ParagraphStyle('Name', parent=styles['Heading1'], fontSize=scaled(26), leading=scaled(26) * 1.2, textColor=colors.HexColor("#2C3E50"), fontName='Helvetica-Bold', alignment=1, spaceAfter=scaled(8)),
+        'contact': ParagraphStyle('Contact', parent=styles['Normal'], fontSize=scaled(10), leading=scaled(10) * 1.2, textColor=colors.HexColor("#555555"), alignment=1, spaceAfter=scaled(20)),
+        'body': ParagraphStyle('Body', parent=styles['Normal'], fontSize=scaled(11), leading=scaled(11) * 1.4, alignment=TA_LEFT, spaceAfter=scaled(10)),
+        'recipient': ParagraphStyle('Recipient', parent=styles['Normal'], fontSize=scaled(11), leading=scaled(11) * 1.2, fontName='Helvetica-Bold', spaceAfter=scaled(20), leftIndent=0),
+    }
 
-# --- FUNÇÕES DE SIMULAÇÃO ATS (EXTRAÇÃO & ANÁLISE) ---
-def extract_text_from_pdf(uploaded_file):
-    if PdfReader is None: return None
-    try:
-        reader = PdfReader(uploaded_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        return f"Error: {e}"
+@st.cache_resource
+def _abnt_styles():
+    # Estilos ABNT comuns a Relatório e Proposta (mesma instância para os dois)
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    styles = _sample_styles()
+    return {
+        'center': ParagraphStyle('ABNTCenter', parent=styles['Normal'], alignment=1, fontSize=12, leading=14, spaceAfter=6),
+        'title_cover': ParagraphStyle('ABNTTitle', parent=styles['Heading1'], alignment=1, fontSize=16, leading=20, fontName='Helvetica-Bold', spaceAfter=12, spaceBefore=100),
+        'subtitle': ParagraphStyle('ABNTSub', parent=styles['Normal'], alignment=1, fontSize=14, leading=16, spaceAfter=100),
+        'note': ParagraphStyle('ABNTNote', parent=styles['Normal'], alignment=TA_JUSTIFY, leftIndent=7*cm, fontSize=10, leading=12),
+        'h2': ParagraphStyle('ABNTH2', parent=styles['Heading2'], fontSize=12, textColor=colors.black, spaceBefore=10, spaceAfter=6, fontName='Helvetica-Bold'),
+        'normal': ParagraphStyle('ABNTNormal', parent=styles['Normal'], fontSize=11, leading=14, alignment=TA_JUSTIFY, spaceAfter=6),
+    }
 
-def analyze_ats_compatibility(text):
-    if not text or len(text.strip()) < 50:
-        return 0, {}, []
+def _report_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    styles = _sample_styles()
+    return {
+        **_abnt_styles(),
+        'h1': ParagraphStyle('RepH1', parent=styles['Heading1'], fontSize=14, textColor=colors.black, spaceBefore=20, spaceAfter=12, textTransform='uppercase', fontName='Helvetica-Bold'),
+        'caption': ParagraphStyle('RepCaption', parent=styles['Normal'], fontSize=10, leading=12, alignment=1, spaceAfter=12, spaceBefore=4),
+    }
 
-    score = 100
-    sections = {}
-    
-    # 1. Normalização
-    text_lower = text.lower()
-    
-    # 2. Padrões Regex para Seções (Multilíngue PT/EN)
-    patterns = {
-        'contact': r'(email|e-mail|phone|telefone|celular|linkedin|github|contact|contato)',
-        'experience': r'(experience|experiência|work history|histórico profissional|employment)',
-        'education': r'(education|educação|formação|academic|acadêmica|degree)',
-        'skills': r'(skills|habilidades|competências|technologies|tecnologias|ferramentas)',
-        'summary': r'(summary|resumo|profile|perfil|about|sobre)',
-        'languages': r'(languages|idiomas|linguas)',
-        'certifications': r'(certifications|certificações|cursos|courses)'
+def _proposal_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    styles = _sample_styles()
+    return {
+        **_abnt_styles(),
+        'h1': ParagraphStyle('PropH1', parent=styles['Heading1'], fontSize=14, textColor=colors.HexColor(BLUE_COLOR), spaceBefore=20, spaceAfter=12, textTransform='uppercase'),
     }
-    
-    found_sections = []
-    
-    # Busca heurística simples
-    for sec_name, pattern in patterns.items():
-        if re.search(pattern, text_lower):
-            found_sections.append(sec_name)
-            sections[sec_name] = "DETECTED (Content parsing requires advanced NLP)"
-        else:
-            sections[sec_name] = "NOT FOUND"
-            score -= 10 # Penalidade por seção faltante
-            
-    # 3. Penalidades de Formatação
-    # Excesso de espaços em branco (simboliza formatação quebrada)
-    if "  " in text: 
-        score -= 5
-    # Texto muito curto para um CV
-    if len(text) < 500:
-        score -= 20
-        
-    # Limites
-    return max(0, score), sections, found_sections
-
-# --- CLASSES AUXILIARES DE DESIGN ---
-class HorizontalLine(Flowable):
-    def __init__(self, width, color=colors.black, thickness=1):
-        Flowable.__init__(self)
-        self.width = width
-        self.color = color
-        self.thickness = thickness
-    def draw(self):
-        self.canv.setStrokeColor(self.color)
-        self.canv.setLineWidth(self.thickness)
-        self.canv.line(0, 0, self.width, 0)
+
+@st.cache_resource
+def get_styles(kind, scale_factor=1.0, lang_code='pt'):
+    # Registro por processo: (tipo de documento, densidade, idioma) -> estilos prontos.
+    # Os estilos ABNT têm tamanho fixo, então ignoram scale_factor.
+    if kind == 'resume': return _resume_styles(scale_factor)
+    if kind == 'cover_letter': return _cover_letter_styles(scale_factor)
+    if kind == 'report': return _report_styles()
+    if kind == 'proposal': return _proposal_styles()
+    raise ValueError(f"Unknown style kind: {kind}")
+
+@st.cache_resource
+def warm_style_registry():
+    # Pré-aquece os presets de densidade do sidebar uma vez por processo
+    for lang_code in TRANSLATIONS:
+        for scale_factor in DENSITY_PRESETS.values():
+            get_styles('resume', scale_factor, lang_code)
+            get_styles('cover_letter', scale_factor, lang_code)
+    get_styles('report')
+    get_styles('proposal')
+    return True
 
 # --- FUNÇÃO DE GERAÇÃO DE PDF (RESUME) ---
-def generate_pdf(data, scale_factor, lang_code):
-    buffer = io.BytesIO()
-    t = TRANSLATIONS[lang_code]
-    margin = 50 * scale_factor if scale_factor > 0.9 else 40
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=margin, leftMargin=margin, topMargin=margin, bottomMargin=margin)
-    content_width = letter[0] - 2 * margin
-    styles = getSampleStyleSheet()
-    def scaled(size, min_size=9): return max(size * scale_factor, min_size)
-    
-    # Estilos (Resume) - Refatorado para Times-Roman e Centralização e Cor Preta (ATS)
-    style_name = ParagraphStyle('Name', parent=styles['Heading1'], fontSize=scaled(26), leading=scaled(26) * 1.2, textColor=colors.black, fontName='Times-Bold', alignment=1, spaceAfter=scaled(4))
-    
-    # Novo estilo para Stack (Helvetica, Centralizado)
-    style_stack = ParagraphStyle('Stack', parent=styles['Normal'], fontSize=scaled(12), leading=scaled(12) * 1.2, textColor=colors.black, fontName='Helvetica', alignment=1, spaceAfter=scaled(12))
+# Tipo de bloco da IR -> estilo do registro; runs -> mini-markup do Paragraph
+RESUME_PDF_STYLES = {
+    'name': 'name', 'stack': 'stack', 'contact': 'contact', 'section': 'section_header', 'item': 'item_header',
+    'degree': 'item_header', 'date': 'item_sub', 'body': 'normal', 'label': 'normal', 'bullet': 'normal',
+}
+PDF_MARKUP = {'': '{}'.format, 'b': '<b>{}</b>'.format, 'link': '<u>{}</u>'.format}
 
-    style_contact = ParagraphStyle('Contact', parent=styles['Normal'], fontSize=scaled(10), leading=scaled(10) * 1.2, textColor=colors.black, fontName='Times-Roman', alignment=1, spaceAfter=scaled(4))
-    
-    # Section Header - Times-Bold e Centralizado - Cor Preta - Espaçamento Reduzido
-    style_section_header = ParagraphStyle('SectionHeader', parent=styles['Heading2'], fontSize=scaled(13), leading=scaled(13) * 1.05, textColor=colors.black, fontName='Times-Bold', textTransform='uppercase', spaceBefore=scaled(12), spaceAfter=scaled(0), alignment=1)
-    
-    style_item_header = ParagraphStyle('ItemHeader', parent=styles['Normal'], fontSize=scaled(11.5), leading=scaled(11.5) * 1.2, fontName='Times-Bold', textColor=colors.black, spaceAfter=scaled(1), spaceBefore=0)
-    style_item_sub = ParagraphStyle('ItemSub', parent=styles['Normal'], fontSize=scaled(10.5), leading=scaled(10.5) * 1.2, fontName='Times-Italic', textColor=colors.black, spaceAfter=scaled(2))
-    style_normal = ParagraphStyle('NormalText', parent=styles['Normal'], fontSize=scaled(10.5), leading=scaled(10.5) * 1.4, alignment=TA_JUSTIFY, spaceAfter=scaled(3), fontName='Times-Roman', spaceBefore=0)
-    
+def pdf_markup(runs):
+    return "".join(PDF_MARKUP[mark](text) for text, mark in runs)
+
+def _resume_flowables(blocks, scale_factor, lang_code):
+    from reportlab.platypus import Paragraph, Spacer
+    def scaled(size, min_size=9): return max(size * scale_factor, min_size)
+    styles = get_styles('resume', scale_factor, lang_code)
     story = []
-    # Header
-    story.append(Paragraph(data['contact']['name'], style_name))
-    
-    # Header de Stack (Logo após o nome)
-    stack_text = data.get('stack', '')
-    if stack_text:
-        story.append(Paragraph(stack_text, style_stack))
+    for kind, payload in blocks:
+        if kind == 'space': story.append(Spacer(1, scaled(payload)))
+        elif kind == 'bullet': story.append(Paragraph("• " + pdf_markup(payload), styles['normal']))
+        else: story.append(Paragraph(pdf_markup(payload), styles[RESUME_PDF_STYLES[kind]]))
+    return story
 
-    sep = " • "
-    contact_parts = [data['contact']['phone'], data['contact']['email'], data['contact']['location'], data['contact']['linkedin']]
-    story.append(Paragraph(sep.join([p for p in contact_parts if p]), style_contact))
-    story.append(Spacer(1, scaled(4)))
-    # story.append(HorizontalLine(content_width, color=colors.black, thickness=1.5))
-    # story.append(Spacer(1, scaled(10)))
+def resume_ir(data, lang_code):
+    # IR por seção (uma travessia dos dados por edição), compartilhada por PDF, DOCX e preview
+    return get_document_ir().resume(data, TRANSLATIONS[lang_code], lang_code)
 
-    def add_section_title(text):
-        story.append(Paragraph(text.upper(), style_section_header))
-        # story.append(HorizontalLine(content_width, color=colors.black, thickness=0.5))
-        # Spacer removed for Modern/Minimalist look
+def resume_fragment(key, blocks, scale_factor, lang_code):
+    # Flowables de uma seção, cacheados pela chave da IR da seção + escala
+    return get_fragment_cache().get_or_render((key, scale_factor), lambda: _resume_flowables(blocks, scale_factor, lang_code))
 
-    # Section Rendering with Dynamic Order
-    section_order = data.get('section_order', ["summary", "skills", "experience", "education", "certifications", "projects", "languages", "awards", "volunteering"])
-    
-    for section in section_order:
-        if section == 'summary' and data.get('summary'):
-            add_section_title(t['summary_header'])
-            for line in data['summary'].split('\n'):
-                if line.strip(): story.append(Paragraph(line, style_normal))
-            
-            # Subseção 'Feitos' (Achievements) dentro do Summary
-            achievements = data.get('achievements', '')
-            if achievements:
-                ach_label = "FEITOS" if lang_code == 'pt' else "KEY ACHIEVEMENTS"
-                story.append(Spacer(1, scaled(4)))
-                story.append(Paragraph(f"<b>{ach_label}</b>", style_normal))
-                for line in achievements.split('\n'):
-                    if line.strip(): story.append(Paragraph(line, style_normal))
-
-        elif section == 'skills' and data.get('skills'):
-            add_section_title(t['skills_header'])
-            story.append(Paragraph(", ".join(data['skills']), style_normal))
-
-        elif section == 'experience' and data.get('experience'):
-            add_section_title(t['experience_header'])
-            for exp in data['experience']:
-                story.append(Paragraph(f"{exp['position']} | {exp['company']}", style_item_header))
-                story.append(Paragraph(f"{exp['start']} - {exp['end']}", style_item_sub))
-                if exp['description']:
-                    for line in exp['description'].split('\n'):
-                        if line.strip(): story.append(Paragraph(line, style_normal))
-                story.append(Spacer(1, scaled(6)))
-
-        elif section == 'education' and data.get('education'):
-            add_section_title(t['education_header'])
-            for edu in data['education']:
-                story.append(Paragraph(f"{edu['degree']}", style_item_header))
-                story.append(Paragraph(f"{edu['institution']} • {t['lbl_year']}: {edu['year']}", style_item_sub))
-                story.append(Spacer(1, scaled(4)))
-
-        elif section == 'certifications' and data.get('certifications'):
-            add_section_title(t['certifications_header'])
-            for cert in data['certifications']:
-                story.append(Paragraph(f"• <b>{cert['name']}</b> ({cert['issuer']}, {cert['year']})", style_normal))
-
-        elif section == 'projects' and data.get('projects'):
-            add_section_title(t['projects_header'])
-            for proj in data['projects']:
-                # Format: Title | Link
-                title_text = f"• <b>{proj['title']}</b>"
-                if proj.get('link'): title_text += f" | <u>{proj['link']}</u>"
-                story.append(Paragraph(title_text, style_normal))
-                if proj.get('description'):
-                    for line in proj['description'].split('\n'):
-                         if line.strip(): story.append(Paragraph(line, style_normal))
-                story.append(Spacer(1, scaled(3)))
-
-        elif section == 'languages' and data.get('languages'):
-            add_section_title(t['languages_header'])
-            for lang in data['languages']:
-                lang_text = f"• <b>{lang['name']}</b> - {t['lbl_conv']}: {lang['conv']} | {t['lbl_comp']}: {lang['comp']} | {t['lbl_writ']}: {lang['writ']}"
-                story.append(Paragraph(lang_text, style_normal))
-
-        elif section == 'awards' and data.get('awards'):
-            add_section_title(t['awards_header'])
-            for aw in data['awards']:
-                aw_text = f"• {aw['title']} | {t['connector_offered_by']} {aw['issuer']} | {aw['date']}"
-                story.append(Paragraph(aw_text, style_normal))
-
-        elif section == 'volunteering' and data.get('volunteering'):
-            add_section_title(t['volunteering_header'])
-            for vol in data['volunteering']:
-                vol_text = f"• <b>{vol['role']}</b> | {vol['org']} | {vol['start']} -> {vol['end']} | {vol['category']}"
-                story.append(Paragraph(vol_text, style_normal))
+def resume_margin(scale_factor): return 50 * scale_factor if scale_factor > 0.9 else 40
+
+@profiled('generate_pdf')
+def generate_pdf(data, scale_factor, lang_code):
+    from reportlab.platypus import SimpleDocTemplate
+    buffer = io.BytesIO()
+    margin = resume_margin(scale_factor)
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=margin, leftMargin=margin, topMargin=margin, bottomMargin=margin)
+
+    # Section Rendering with Dynamic Order - montado a partir dos fragmentos cacheados.
+    # Cada Flowable é copiado porque wrap/split guardam estado de layout na instância.
+    story = []
+    for _, key, blocks in resume_ir(data, lang_code):
+        story.extend(copy.copy(f) for f in resume_fragment(key, blocks, scale_factor, lang_code))
 
     doc.build(story)
     return buffer.getvalue()
 
+# --- AJUSTE AUTOMÁTICO A N PÁGINAS (CURRÍCULO) ---
+# Escalas testadas pelo ajuste (0.75 a 1.10, passo 0.01); a busca binária mede ~6 delas
+FIT_SCALES = tuple(round(0.75 + 0.01 * i, 2) for i in range(36))
+RESUME_FRAME_PADDING = 6 # Padding padrão do Frame do SimpleDocTemplate (cada lado)
+
+def resume_frame_size(scale_factor):
+    margin = resume_margin(scale_factor)
+    return letter[0] - 2 * (margin + RESUME_FRAME_PADDING), letter[1] - 2 * (margin + RESUME_FRAME_PADDING)
+
+def resume_measures(data, scale_factor, lang_code, sections=None):
+    # Medidas (wrap) cacheadas por seção e escala: editar uma seção só remede ela.
+    # `sections` (a IR) é obtida uma vez por busca, e não a cada escala testada
+    width, _ = resume_frame_size(scale_factor)
+    cache = get_layout_cache()
+    measures = []
+    for part, key, blocks in sections or resume_ir(data, lang_code):
+        measure = lambda key=key, blocks=blocks: measure_flowables(resume_fragment(key, blocks, scale_factor, lang_code), width)
+        measures.append((part, cache.get_or_render((key, scale_factor), measure)))
+    return measures
+
+def resume_page_count(data, scale_factor, lang_code, sections=None):
+    measures = [m for _, section in resume_measures(data, scale_factor, lang_code, sections) for m in section]
+    return paginate(measures, resume_frame_size(scale_factor)[1])[0]
+
+@profiled('resume_layout')
+def resume_layout(data, scale_factor, lang_code, max_pages=1):
+    # Mesmo story do generate_pdf, só wrap/split: páginas, início de cada seção, espaço livre e
+    # os Flowables que passam de max_pages (com o texto, para apontar o que transborda)
+    sections = resume_ir(data, lang_code)
+    report = layout_report(resume_measures(data, scale_factor, lang_code, sections), resume_frame_size(scale_factor)[1], max_pages)
+    fragments = {part: (key, blocks) for part, key, blocks in sections}
+    for item in report['overflow']:
+        flowable = resume_fragment(*fragments[item['section']], scale_factor, lang_code)[item['index']]
+        item['text'] = getattr(flowable, 'text', '')
+    return report
+
+@profiled('fit_resume_scale')
+def fit_resume_scale(data, lang_code, target_pages):
+    # Maior escala em que o currículo cabe em target_pages -> (escala, páginas); sem doc.build
+    sections = resume_ir(data, lang_code)
+    return largest_fitting(FIT_SCALES, lambda scale_factor: resume_page_count(data, scale_factor, lang_code, sections), target_pages)
+
 
 # --- FUNÇÃO DE GERAÇÃO DE DOCX (RESUME WORD) ---
+@profiled('generate_docx')
 def generate_docx(data, scale_factor, lang_code):
-    if Document is None:
+    if not DOCX_AVAILABLE:
         return None
-    
-    doc = Document()
-    t = TRANSLATIONS[lang_code]
-    
-    # Função auxiliar para escala
-    def scaled(size, min_size=6): return max(size * scale_factor, min_size)
-
-    # Configuração de Margens (Compacto/Minimalista - Escalonável)
-    sections = doc.sections
-    for section in sections:
-        # Base margins 1.27cm (~0.5 inch) adjusted by scale
-        margin_sz = 1.27 * scale_factor
-        section.top_margin = Cm(margin_sz)
-        section.bottom_margin = Cm(margin_sz)
-        section.left_margin = Cm(margin_sz)
-        section.right_margin = Cm(margin_sz)
-
-    # Estilos Básicos
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'Times New Roman'
-    font.size = Pt(scaled(10.5))
-    paragraph_format = style.paragraph_format
-    paragraph_format.space_after = Pt(0) # Minimalist - sem espaço automático
-    paragraph_format.line_spacing = 1.15
-    
-    # Function to add formatted paragraph
-    def add_para(text, bold=False, size=None, align='LEFT', space_before=0, space_after=0):
-        p = doc.add_paragraph()
-        run = p.add_run(text)
-        run.bold = bold
-        # If size is provided, scale it; otherwise let style default handle it
-        if size: run.font.size = Pt(scaled(size))
-        run.font.name = 'Times New Roman'
-        
-        if align == 'CENTER': p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        elif align == 'RIGHT': p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        else: p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        
-        # Ajuste Fino de Espaçamento (Scaled)
-        p.paragraph_format.space_before = Pt(scaled(space_before))
-        p.paragraph_format.space_after = Pt(scaled(space_after))
-        return p
-
-    def add_section_header(text):
-        # Título da Seção: Times-Bold, Caps, Sem espaço depois
-        p = doc.add_paragraph()
-        p.paragraph_format.space_before = Pt(scaled(12))
-        p.paragraph_format.space_after = Pt(0)
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run(text.upper())
-        run.font.name = 'Times New Roman'
-        run.bold = True
-        run.font.size = Pt(scaled(13))
-
-    # 1. Header (Nome)
-    name_p = add_para(data['contact']['name'], bold=True, size=24, align='CENTER')
-    
-    # 2. Stack / Subtitle
-    if data.get('stack'):
-        stack_p = add_para(data['stack'], size=12, align='CENTER', space_after=6)
-        stack_p.runs[0].font.name = 'Arial' # match PDF style
-
-    # 3. Contact Info
-    contact_parts = [data['contact']['phone'], data['contact']['email'], data['contact']['location'], data['contact']['linkedin']]
-    contact_line = " • ".join([p for p in contact_parts if p])
-    add_para(contact_line, size=10, align='CENTER', space_after=12)
-
-    # Section Rendering with Dynamic Order
-    section_order = data.get('section_order', ["summary", "skills", "experience", "education", "certifications", "projects", "languages", "awards", "volunteering"])
-
-    for section in section_order:
-        if section == 'summary' and data['summary']:
-            add_section_header(t['summary_header'])
-            for line in data['summary'].split('\n'):
-                if line.strip(): add_para(line, space_before=2)
-            
-            if data.get('achievements'):
-                 ach_label = "FEITOS" if lang_code == 'pt' else "KEY ACHIEVEMENTS"
-                 p = doc.add_paragraph()
-                 p.paragraph_format.space_before = Pt(scaled(6))
-                 p.paragraph_format.space_after = Pt(0)
-                 run = p.add_run(ach_label)
-                 run.bold = True
-                 run.font.name = 'Times New Roman'
-                 run.font.size = Pt(scaled(10.5))
-                 
-                 for line in data.get('achievements').split('\n'):
-                     if line.strip(): add_para(line, space_before=2)
-
-        elif section == 'skills' and data['skills']:
-            add_section_header(t['skills_header'])
-            add_para(", ".join(data['skills']), space_before=2)
-
-        elif section == 'experience' and data['experience']:
-            add_section_header(t['experience_header'])
-            for exp in data['experience']:
-                # Posição | Empresa (Bold)
-                p = doc.add_paragraph()
-                p.paragraph_format.space_before = Pt(scaled(6))
-                p.paragraph_format.space_after = Pt(0)
-                run = p.add_run(f"{exp['position']} | {exp['company']}")
-                run.bold = True
-                run.font.name = 'Times New Roman'
-                run.font.size = Pt(scaled(11.5))
-                
-                # Data (Italic)
-                p_sub = doc.add_paragraph()
-                p_sub.paragraph_format.space_after = Pt(scaled(2))
-                run_sub = p_sub.add_run(f"{exp['start']} - {exp['end']}")
-                run_sub.italic = True
-                run_sub.font.name = 'Times New Roman'
-                run_sub.font.size = Pt(scaled(10.5))
-
-                # Descrição
-                if exp['description']:
-                    for line in exp['description'].split('\n'):
-                        if line.strip():
-                            add_para(line)
-
-        elif section == 'education' and data['education']:
-            add_section_header(t['education_header'])
-            for edu in data['education']:
-                # Grau (Bold)
-                add_para(edu['degree'], bold=True, size=11.5, space_before=6)
-                # Inst - Ano (Italic)
-                p = doc.add_paragraph()
-                p.paragraph_format.space_after = Pt(scaled(2))
-                run = p.add_run(f"{edu['institution']} • {t['lbl_year']}: {edu['year']}")
-                run.italic = True
-                run.font.name = 'Times New Roman'
-                run.font.size = Pt(scaled(10.5))
-
-        elif section == 'certifications' and data['certifications']:
-            add_section_header(t['certifications_header'])
-            for cert in data['certifications']:
-                p = doc.add_paragraph()
-                p.paragraph_format.space_after = Pt(0)
-                p.paragraph_format.left_indent = Cm(0.5)
-                
-                run_bullet = p.add_run("• ")
-                run_name = p.add_run(cert['name'])
-                run_name.bold = True
-                run_details = p.add_run(f" ({cert['issuer']}, {cert['year']})")
-                
-                for r in [run_bullet, run_name, run_details]: 
-                    r.font.name = 'Times New Roman'
-                    r.font.size = Pt(scaled(10.5))
-
-        elif section == 'projects' and data.get('projects'):
-            add_section_header(t['projects_header'])
-            for proj in data['projects']:
-                 p = doc.add_paragraph()
-                 p.paragraph_format.space_after = Pt(0)
-                 p.paragraph_format.left_indent = Cm(0.5)
-                 
-                 run_bullet = p.add_run("• ")
-                 run_title = p.add_run(proj['title'])
-                 run_title.bold = True
-                 
-                 for r in [run_bullet, run_title]:
-                     r.font.name = 'Times New Roman'
-                     r.font.size = Pt(scaled(10.5))
-                 
-                 if proj.get('link'):
-                     run_link = p.add_run(f" | {proj['link']}")
-                     run_link.font.name = 'Times New Roman'
-                     run_link.font.size = Pt(scaled(10.5))
-
-                 if proj.get('description'):
-                     for line in proj['description'].split('\n'):
-                         if line.strip(): add_para(line)
-
-        elif section == 'languages' and data.get('languages'):
-            add_section_header(t['languages_header'])
-            for lang in data['languages']:
-                p = doc.add_paragraph()
-                p.paragraph_format.space_after = Pt(0)
-                run = p.add_run(f"• {lang['name']}")
-                run.bold = True
-                run2 = p.add_run(f" - {t['lbl_conv']}: {lang['conv']} | {t['lbl_comp']}: {lang['comp']} | {t['lbl_writ']}: {lang['writ']}")
-                for r in [run, run2]: 
-                    r.font.name = 'Times New Roman'
-                    r.font.size = Pt(scaled(10.5))
-
-        elif section == 'awards' and data.get('awards'):
-            add_section_header(t['awards_header'])
-            for aw in data['awards']:
-                add_para(f"• {aw['title']} | {aw['issuer']} | {aw['date']}")
-                
-        elif section == 'volunteering' and data.get('volunteering'):
-            add_section_header(t['volunteering_header'])
-            for vol in data['volunteering']:
-                p = doc.add_paragraph()
-                p.paragraph_format.space_after = Pt(0)
-                run = p.add_run(f"• {vol['role']}")
-                run.bold = True
-                run2 = p.add_run(f" | {vol['org']} | {vol['category']}")
-                for r in [run, run2]: r.font.name = 'Times New Roman'
-
-    # Save to buffer
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    return buffer.getvalue()
+    # Template por densidade (estilos nomeados) carregado uma vez; aqui só o XML do corpo, a partir da IR
+    from docx_writer import resume_docx
+    return resume_docx([blocks for _, _, blocks in resume_ir(data, lang_code)], scale_factor)
 
 # --- FUNÇÃO DE GERAÇÃO DE PDF (COVER LETTER) ---
+@profiled('generate_cl_pdf')
 def generate_cl_pdf(resume_data, cl_data, scale_factor, lang_code):
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from pdf_flowables import HorizontalLine
     buffer = io.BytesIO()
     margin = 50 * scale_factor if scale_factor > 0.9 else 40
     doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=margin, leftMargin=margin, topMargin=margin, bottomMargin=margin)
     content_width = letter[0] - 2 * margin
-    styles = getSampleStyleSheet()
     def scaled(size, min_size=9): return max(size * scale_factor, min_size)
 
-    # Estilos (Cover Letter)
-    style_name = ParagraphStyle('Name', parent=styles['Heading1'], fontSize=scaled(26), leading=scaled(26) * 1.2, textColor=colors.HexColor("#2C3E50"), fontName='Helvetica-Bold', alignment=1, spaceAfter=scaled(8))
-    style_contact = ParagraphStyle('Contact', parent=styles['Normal'], fontSize=scaled(10), leading=scaled(10) * 1.2, textColor=colors.HexColor("#555555"), alignment=1, spaceAfter=scaled(20))
-    style_body = ParagraphStyle('Body', parent=styles['Normal'], fontSize=scaled(11), leading=scaled(11) * 1.4, alignment=TA_LEFT, spaceAfter=scaled(10))
-    style_recipient = ParagraphStyle('Recipient', parent=styles['Normal'], fontSize=scaled(11), leading=scaled(11) * 1.2, fontName='Helvetica-Bold', spaceAfter=scaled(20), leftIndent=0)
+    # Estilos (Cover Letter) - pré-compilados no registro de estilos
+    styles = get_styles('cover_letter', scale_factor, lang_code)
+    style_name, style_contact, style_body, style_recipient = styles['name'], styles['contact'], styles['body'], styles['recipient']
     
     story = []
 
@@ -943,221 +825,813 @@ def generate_cl_pdf(resume_data, cl_data, scale_factor, lang_code):
     doc.build(story)
     return buffer.getvalue()
 
-# --- FUNÇÃO DE GERAÇÃO DE PDF (RELATÓRIO ABNT) ---
-def generate_report_pdf(data, t):
+# --- FUNÇÕES DE GERAÇÃO DE PDF (RELATÓRIO E PROPOSTA ABNT) ---
+def _abnt_table(kind, rows):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+    header = [('BACKGROUND', (0,0), (-1,0), colors.HexColor(BLUE_COLOR)), ('TEXTCOLOR', (0,0), (-1,0), colors.white)]
+    if kind == 'timeline': # Cronograma
+        t_style = TableStyle(header + [
+            ('ALIGN', (0,0), (-1,-1), 'LEFT'), ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey), ('BOTTOMPADDING', (0,0), (-1,0), 8), ('TOPPADDING', (0,0), (-1,0), 8)
+        ])
+        col_widths = [100, 350]
+    else: # Orçamento (última linha = TOTAL)
+        t_style = TableStyle(header + [
+            ('ALIGN', (1,0), (-1,-1), 'RIGHT'), ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey), ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0,-1), (-1,-1), colors.lightgrey), ('TEXTCOLOR', (0,-1), (-1,-1), colors.black),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 8), ('TOPPADDING', (0,0), (-1,-1), 8)
+        ])
+        col_widths = [350, 100]
+    table = Table([list(row) for row in rows], colWidths=col_widths)
+    table.setStyle(t_style)
+    return table
+
+def _annex_figure(annex, reader, caption, styles):
+    from reportlab.platypus import Paragraph, Spacer
+    from annex_images import display_size
+    from pdf_flowables import AnnexImage
+    try:
+        if isinstance(reader, Exception): raise reader
+        # Normalizada no upload: tamanho de exibição já calculado (Max Width 15cm)
+        width, height = (annex['width'], annex['height']) if annex.get('width') else display_size(*reader.getSize())
+        return [AnnexImage(reader, width, height), Paragraph(caption, styles['caption']), Spacer(1, 12)]
+    except Exception as e:
+        return [Paragraph(f"[Erro ao renderizar imagem: {str(e)}]", styles['normal'])]
+
+def _abnt_pdf(blocks, styles, annexes=()):
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+    from pdf_flowables import HorizontalLine
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=3*cm, leftMargin=3*cm, topMargin=3*cm, bottomMargin=2*cm)
-    styles = getSampleStyleSheet()
+    # Decodificação dos anexos em paralelo (cache por hash); o loop abaixo só monta o layout
+    readers = prepare_annex_images(annexes) if annexes else []
     story = []
-    
-    # Estilos ABNT (Reutilizados)
-    style_center = ParagraphStyle('ABNTCenter', parent=styles['Normal'], alignment=1, fontSize=12, leading=14, spaceAfter=6)
-    style_title_cover = ParagraphStyle('ABNTTitle', parent=styles['Heading1'], alignment=1, fontSize=16, leading=20, fontName='Helvetica-Bold', spaceAfter=12, spaceBefore=100)
-    style_subtitle = ParagraphStyle('ABNTSub', parent=styles['Normal'], alignment=1, fontSize=14, leading=16, spaceAfter=100)
-    style_note = ParagraphStyle('ABNTNote', parent=styles['Normal'], alignment=TA_JUSTIFY, leftIndent=7*cm, fontSize=10, leading=12)
-    
-    style_h1 = ParagraphStyle('RepH1', parent=styles['Heading1'], fontSize=14, textColor=colors.black, spaceBefore=20, spaceAfter=12, textTransform='uppercase', fontName='Helvetica-Bold')
-    style_h2 = ParagraphStyle('RepH2', parent=styles['Heading2'], fontSize=12, textColor=colors.black, spaceBefore=10, spaceAfter=6, fontName='Helvetica-Bold')
-    style_normal = ParagraphStyle('RepNormal', parent=styles['Normal'], fontSize=11, leading=14, alignment=TA_JUSTIFY, spaceAfter=6)
-    style_caption = ParagraphStyle('RepCaption', parent=styles['Normal'], fontSize=10, leading=12, alignment=1, spaceAfter=12, spaceBefore=4)
-
-    # --- 1. CAPA ---
-    if data['cover']['institution']: story.append(Paragraph(data['cover']['institution'].upper(), style_center))
-    story.append(Paragraph(data['cover']['author'].upper(), style_center))
-    story.append(Paragraph(data['cover']['title'].upper(), style_title_cover))
-    if data['cover']['subtitle']: story.append(Paragraph(data['cover']['subtitle'], style_subtitle))
-    else: story.append(Spacer(1, 100))
-    story.append(Spacer(1, 200))
-    story.append(Paragraph(data['cover']['city'], style_center))
-    story.append(Paragraph(data['cover']['year'], style_center))
-    story.append(PageBreak())
-
-    # --- 2. FOLHA DE ROSTO ---
-    story.append(Paragraph(data['cover']['author'].upper(), style_center))
-    story.append(Spacer(1, 100))
-    story.append(Paragraph(data['cover']['title'].upper(), style_center))
-    if data['cover']['subtitle']: story.append(Paragraph(data['cover']['subtitle'], style_center))
-    story.append(Spacer(1, 50))
-    if data['cover']['theme']: story.append(Paragraph(data['cover']['theme'], style_note))
-    story.append(Spacer(1, 200))
-    story.append(Paragraph(data['cover']['city'], style_center))
-    story.append(Paragraph(data['cover']['year'], style_center))
-    story.append(PageBreak())
-
-    # --- 3. SUMÁRIO (Simples) ---
-    story.append(Paragraph(t['rep_sec_sum'].upper(), style_h1))
-    story.append(HorizontalLine(450, color=colors.black, thickness=0.5))
-    story.append(Spacer(1, 10))
-    
-    sections_map = [
-        ("1", t['rep_sec_1']), ("2", t['rep_sec_2']), ("3", t['rep_sec_3']),
-        ("4", t['rep_sec_4']), ("5", t['rep_sec_5']), ("6", t['rep_sec_6']),
-        ("7", t['rep_sec_7']), ("8", t['rep_sec_8'])
-    ]
-    
-    for sec_id, sec_title in sections_map:
-        # Check if section has content
-        has_content = False
-        if sec_id == "8": has_content = bool(data['annexes'])
-        else: has_content = bool(data['text_sections'].get(sec_id))
-        
-        if has_content:
-            story.append(Paragraph(f"{sec_id}. {sec_title}", style_normal))
-    
-    story.append(PageBreak())
-
-    # --- 4. CONTEÚDO (SEÇÕES 1-7) ---
-    for sec_id, sec_title in sections_map[:-1]: # Exclude Annexes from this loop
-        subsections = data['text_sections'].get(sec_id, [])
-        if subsections:
-            story.append(Paragraph(f"{sec_id}. {sec_title}", style_h1))
-            for idx, sub in enumerate(subsections):
-                if sub['title']: story.append(Paragraph(f"{sec_id}.{idx+1} {sub['title']}", style_h2))
-                if sub['content']:
-                    for line in sub['content'].split('\n'):
-                        if line.strip(): story.append(Paragraph(line, style_normal))
-            story.append(Spacer(1, 15))
-
-    # --- 5. ANEXOS (SEÇÃO 8) ---
-    if data['annexes']:
-        story.append(PageBreak())
-        story.append(Paragraph(f"8. {t['rep_sec_8']}", style_h1))
-        for idx, annex in enumerate(data['annexes']):
-            try:
-                # Process Image
-                img_stream = io.BytesIO(annex['image'])
-                img = Image(img_stream)
-                
-                # Resize Logic (Max Width 15cm)
-                max_width = 15 * cm
-                if img.drawWidth > max_width:
-                    ratio = max_width / img.drawWidth
-                    img.drawWidth = max_width
-                    img.drawHeight = img.drawHeight * ratio
-                
-                story.append(img)
-                story.append(Paragraph(f"Figura {idx+1}: {annex['caption']}", style_caption))
-                story.append(Spacer(1, 12))
-            except Exception as e:
-                story.append(Paragraph(f"[Erro ao renderizar imagem: {str(e)}]", style_normal))
-
+    for kind, payload in blocks:
+        if kind == 'space': story.append(Spacer(1, payload))
+        elif kind == 'page_break': story.append(PageBreak())
+        elif kind == 'rule': story.append(HorizontalLine(450, color=colors.HexColor(payload), thickness=0.5))
+        elif kind == 'table': story.append(_abnt_table(*payload))
+        elif kind == 'figure': story.extend(_annex_figure(annexes[payload[0]], readers[payload[0]], payload[1], styles))
+        else: story.append(Paragraph(pdf_markup(payload), styles[kind]))
     doc.build(story)
     return buffer.getvalue()
 
-# --- FUNÇÃO DE GERAÇÃO DE PDF (PROPOSTA ABNT) ---
+@profiled('generate_report_pdf')
+def generate_report_pdf(data, t):
+    # Estilos ABNT (compartilhados com a Proposta via registro de estilos)
+    return _abnt_pdf(get_document_ir().report(data, t), get_styles('report'), data['annexes'])
+
+@profiled('generate_proposal_pdf')
 def generate_proposal_pdf(data, t):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=3*cm, leftMargin=3*cm, topMargin=3*cm, bottomMargin=2*cm)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Estilos ABNT
-    style_center = ParagraphStyle('ABNTCenter', parent=styles['Normal'], alignment=1, fontSize=12, leading=14, spaceAfter=6)
-    style_title_cover = ParagraphStyle('ABNTTitle', parent=styles['Heading1'], alignment=1, fontSize=16, leading=20, fontName='Helvetica-Bold', spaceAfter=12, spaceBefore=100)
-    style_subtitle = ParagraphStyle('ABNTSub', parent=styles['Normal'], alignment=1, fontSize=14, leading=16, spaceAfter=100)
-    style_note = ParagraphStyle('ABNTNote', parent=styles['Normal'], alignment=TA_JUSTIFY, leftIndent=7*cm, fontSize=10, leading=12)
+    return _abnt_pdf(get_document_ir().proposal(data, t), get_styles('proposal'))
+
+# --- FUNÇÕES DE GERAÇÃO DE DOCX (RELATÓRIO E PROPOSTA ABNT) ---
+@profiled('generate_report_docx')
+def generate_report_docx(data, t):
+    if not DOCX_AVAILABLE: return None
+    from docx_writer import abnt_docx
+    return abnt_docx(get_document_ir().report(data, t), data['annexes'])
+
+@profiled('generate_proposal_docx')
+def generate_proposal_docx(data, t):
+    if not DOCX_AVAILABLE: return None
+    from docx_writer import abnt_docx
+    return abnt_docx(get_document_ir().proposal(data, t), accent_color=BLUE_COLOR)
+
+# --- CACHE DE RENDERIZAÇÃO (CONTENT-ADDRESSED, PROCESS-WIDE) ---
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Orçamento de memória do cache (64 MB)
+FRAGMENT_CACHE_MAX_BYTES = 16 * 1024 * 1024 # Fragmentos de story (Flowables) por seção
+LAYOUT_CACHE_MAX_BYTES = 2 * 1024 * 1024 # Medidas por seção usadas pelo ajuste automático de densidade
+ANNEX_CACHE_MAX_BYTES = 32 * 1024 * 1024 # Imagens de anexos já normalizadas
+ANNEX_READER_CACHE_MAX_BYTES = 128 * 1024 * 1024 # Anexos decodificados, prontos para o doc.build
+ANNEX_PREP_WORKERS = min(8, os.cpu_count() or 1)
+
+@st.cache_resource
+def get_render_cache():
+    # st.cache_resource mantém uma única instância por processo entre reruns e sessões
+    return RenderCache(max_bytes=RENDER_CACHE_MAX_BYTES)
+
+def _fragment_size(flowables):
+    # Estimativa: texto do parágrafo + overhead fixo por Flowable
+    return sum(len(getattr(f, 'text', '')) + 512 for f in flowables)
+
+@st.cache_resource
+def get_fragment_cache():
+    return RenderCache(max_bytes=FRAGMENT_CACHE_MAX_BYTES, sizeof=_fragment_size)
+
+def _layout_size(measures):
+    return 64 * len(measures) + 64
+
+@st.cache_resource
+def get_layout_cache():
+    # Medidas de layout por seção e escala (tuplas de números: bem menores que os Flowables)
+    return RenderCache(max_bytes=LAYOUT_CACHE_MAX_BYTES, sizeof=_layout_size)
+
+@st.cache_resource
+def get_document_ir():
+    # IR por seção/documento, compartilhada entre sessões: base dos caches de PDF, DOCX e preview
+    return DocumentIR()
+
+def _annex_size(prepared):
+    return len(prepared['image']) + len(prepared.get('thumb', b''))
+
+@st.cache_resource
+def get_annex_cache():
+    # Anexos normalizados por hash da imagem original (upload repetido não decodifica de novo)
+    return RenderCache(max_bytes=ANNEX_CACHE_MAX_BYTES, sizeof=_annex_size)
+
+def _reader_size(reader):
+    return reader.nbytes
+
+@st.cache_resource
+def get_annex_reader_cache():
+    return RenderCache(max_bytes=ANNEX_READER_CACHE_MAX_BYTES, sizeof=_reader_size)
+
+@st.cache_resource
+def get_annex_pool():
+    # PIL libera o GIL ao decodificar: threads bastam, sem serializar imagens entre processos
+    return ThreadPoolExecutor(max_workers=ANNEX_PREP_WORKERS, thread_name_prefix='annex')
+
+def prepare_annex_images(annexes):
+    # Um AnnexImageReader por anexo (ou a exceção da decodificação); imagens repetidas decodificam uma vez
+    from annex_images import AnnexImageReader, image_digest
+    cache = get_annex_reader_cache()
+    digests = [image_digest(annex['image']) for annex in annexes]
+    futures = {}
+    for digest, annex in zip(digests, annexes):
+        if digest not in futures: futures[digest] = get_annex_pool().submit(cache.get_or_render, digest, functools.partial(AnnexImageReader, annex['image']))
+    readers = []
+    for digest in digests:
+        try: readers.append(futures[digest].result())
+        except Exception as e: readers.append(e)
+    return readers
+
+@st.cache_resource
+def get_ats_cache():
+    # Compartilhado entre sessões; ATS_CACHE_DIR habilita a camada em disco (sobrevive a restarts)
+    return AtsResultCache(disk_dir=os.environ.get('ATS_CACHE_DIR') or None)
+
+def cached_render(kind, render_fn, *args):
+    return get_render_cache().get_or_render(content_key(kind, *args), lambda: render_fn(*args))
+
+def render_resume_pdf(data, scale_factor, lang_code):
+    return cached_render('resume_pdf', generate_pdf, data, scale_factor, lang_code)
+
+def render_resume_docx(data, scale_factor, lang_code):
+    if not DOCX_AVAILABLE: return None
+    return cached_render('resume_docx', generate_docx, data, scale_factor, lang_code)
+
+def cl_pdf_key(resume_data, cl_data, scale_factor, lang_code):
+    # A carta imprime date.today(), então a data entra na chave
+    return content_key('cl_pdf', resume_data, cl_data, scale_factor, lang_code, date.today().isoformat())
+
+def render_cl_pdf(resume_data, cl_data, scale_factor, lang_code):
+    return get_render_cache().get_or_render(cl_pdf_key(resume_data, cl_data, scale_factor, lang_code), lambda: generate_cl_pdf(resume_data, cl_data, scale_factor, lang_code))
+
+def render_proposal_pdf(data, t):
+    return cached_render('proposal_pdf', generate_proposal_pdf, data, t)
+
+def render_report_pdf(data, t):
+    # A chave usa as referências dos anexos; os bytes só são lidos do SQLite se for preciso gerar
+    return get_render_cache().get_or_render(content_key('report_pdf', data, t), lambda: generate_report_pdf(with_annex_blobs(data), t))
+
+def render_proposal_docx(data, t):
+    if not DOCX_AVAILABLE: return None
+    return cached_render('proposal_docx', generate_proposal_docx, data, t)
+
+def render_report_docx(data, t):
+    if not DOCX_AVAILABLE: return None
+    return get_render_cache().get_or_render(content_key('report_docx', data, t), lambda: generate_report_docx(with_annex_blobs(data), t))
+
+def deferred_export(render_fn, *args):
+    # Snapshot dos dados deste rerun; os bytes só são gerados (ou lidos do cache) no clique
+    snapshot = copy.deepcopy(args)
+    return lambda: render_fn(*snapshot)
+
+def deferred_export_live(render_fn, *args):
+    # Como deferred_export, mas a cópia é feita só no clique, a partir dos dados vivos da sessão:
+    # para o pacote (todos os documentos, anexos inclusive) copiar a cada rerun custaria o workspace inteiro
+    return lambda: render_fn(*copy.deepcopy(args))
+
+# --- PACOTE DE EXPORTAÇÃO (FORMATOS x IDIOMAS, EM PARALELO) ---
+BUNDLE_WORKERS = min(4, os.cpu_count() or 1) # Processos: os geradores são Python puro (GIL)
+BUNDLE_FORMATS = {
+    'resume_pdf': "Currículo / Resume (PDF)", 'resume_docx': "Currículo / Resume (DOCX)", 'cl_pdf': "Cover Letter (PDF)",
+    'proposal_pdf': "Proposta / Proposal (PDF)", 'proposal_docx': "Proposta / Proposal (DOCX)",
+    'report_pdf': "Relatório / Report (PDF)", 'report_docx': "Relatório / Report (DOCX)",
+}
+DOCX_FORMATS = ('resume_docx', 'proposal_docx', 'report_docx')
+BUNDLE_DEFAULT_FORMATS = ['resume_pdf', 'resume_docx', 'cl_pdf']
+
+@st.cache_resource
+def get_bundle_pool():
+    from export_bundle import make_pool
+    return make_pool(BUNDLE_WORKERS)
+
+def bundle_job(fmt, documents, scale_factor, lang_code):
+    # Mesmas chaves e nomes de arquivo dos botões individuais: o pacote reaproveita o cache (e vice-versa)
+    t = TRANSLATIONS[lang_code]
+    resume = documents['resume_data']
+    if fmt == 'resume_pdf': return f"resume_{lang_code}.pdf", content_key('resume_pdf', resume, scale_factor, lang_code), 'generate_pdf', (resume, scale_factor, lang_code)
+    if fmt == 'resume_docx': return f"resume_{lang_code}.docx", content_key('resume_docx', resume, scale_factor, lang_code), 'generate_docx', (resume, scale_factor, lang_code)
+    if fmt == 'cl_pdf':
+        cl_data = documents['cover_letter_data']
+        return f"cover_letter_{lang_code}.pdf", cl_pdf_key(resume, cl_data, scale_factor, lang_code), 'generate_cl_pdf', (resume, cl_data, scale_factor, lang_code)
+    if fmt in ('proposal_pdf', 'proposal_docx'):
+        ext = fmt.split('_')[1]
+        return f"projeto_{lang_code}.{ext}", content_key(fmt, documents['proposal_data'], t), f'generate_proposal_{ext}', (documents['proposal_data'], t)
+    if fmt in ('report_pdf', 'report_docx'):
+        # Bytes dos anexos só são lidos se o relatório precisar ser gerado
+        report, ext = documents['report_data'], fmt.split('_')[1]
+        return f"relatorio_{lang_code}.{ext}", content_key(fmt, report, t), f'generate_report_{ext}', lambda: (with_annex_blobs(report), t)
+    raise ValueError(f"Unknown bundle format: {fmt}")
+
+@profiled('render_bundle')
+def render_bundle(documents, formats, langs, scale_factor, fit_pages=None):
+    from export_bundle import build_bundle
+    if not DOCX_AVAILABLE: formats = [fmt for fmt in formats if fmt not in DOCX_FORMATS]
+    jobs = []
+    for lang_code in langs:
+        # Com o ajuste automático, cada idioma tem a sua escala (o texto muda de tamanho)
+        lang_scale = fit_resume_scale(documents['resume_data'], lang_code, fit_pages)[0] if fit_pages else scale_factor
+        jobs.extend(bundle_job(fmt, documents, lang_scale, lang_code) for fmt in formats)
+    pool = get_bundle_pool()
+    try: return build_bundle(jobs, get_render_cache(), pool)
+    except BrokenProcessPool:
+        # Um worker morreu (ex: falta de memória) e o pool cacheado não aceita mais tarefas:
+        # recria e tenta uma vez (o que já ficou pronto está no cache de renderização)
+        pool.shutdown(wait=False, cancel_futures=True)
+        get_bundle_pool.clear()
+        return build_bundle(jobs, get_render_cache(), get_bundle_pool())
+
+# --- PERSISTÊNCIA (BACKEND PLUGÁVEL COM AUTOSAVE) ---
+# APP_STATE_URL escolhe o backend (memory://, sqlite:///..., redis://...); com vários workers
+# todos apontam para o mesmo SQLite/Redis. Sem ela, usa APP_DB_PATH; vazio desliga a persistência.
+DOCUMENT_STATE_URL = os.environ.get('APP_STATE_URL', '')
+DOCUMENT_DB_PATH = os.environ.get('APP_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'documents.sqlite3'))
+
+@st.cache_resource
+def get_document_store():
+    if DOCUMENT_STATE_URL: return DocumentStore(open_backend(DOCUMENT_STATE_URL))
+    if not DOCUMENT_DB_PATH: return None
+    os.makedirs(os.path.dirname(DOCUMENT_DB_PATH) or '.', exist_ok=True)
+    return DocumentStore(SqliteBackend(DOCUMENT_DB_PATH))
+
+def open_document_session():
+    # Primeiro rerun da sessão: restaura pelo ?doc= da URL (sobrevive a refresh, restart e redeploy)
+    store = get_document_store()
+    if store is None or 'doc_id' in st.session_state: return
+    doc_id = st.query_params.get('doc') or store.new_document_id()
+    # Hashes do que esta sessão carregou/salvou: o autosave compara com eles (não com outras sessões)
+    st.session_state['doc_digests'] = {}
+    for kind, fields in store.load(doc_id, st.session_state['doc_digests']).items():
+        if kind in st.session_state: st.session_state[kind].update(fields)
+    st.session_state['doc_id'] = doc_id
+    st.query_params['doc'] = doc_id
+
+def autosave_documents():
+    # Chamado ao fim de cada rerun; o store grava em background só os campos que mudaram
+    store = get_document_store()
+    if store is None or 'doc_id' not in st.session_state: return
+    for kind in DOCUMENT_KINDS: store.save(st.session_state['doc_id'], kind, st.session_state[kind], st.session_state['doc_digests'])
+
+def annex_blob(annex, field):
+    # Anexo persistido guarda '<campo>_ref' (hash do blob no backend) em vez dos bytes
+    if f'{field}_ref' in annex: return get_document_store().get_blob(annex[f'{field}_ref'])
+    return annex.get(field)
+
+def with_annex_blobs(data):
+    if not any('image_ref' in annex for annex in data['annexes']): return data
+    return {**data, 'annexes': [{**annex, 'image': annex_blob(annex, 'image')} for annex in data['annexes']]}
+
+# --- AQUECIMENTO EM BACKGROUND (APP_WARMUP=0 DESLIGA) ---
+# Documento mínimo: passa pelos imports, estilos, fontes e doc.build de cada gerador
+WARMUP_RESUME = {'contact': {'name': 'Warm-up', 'email': '', 'phone': '', 'location': '', 'linkedin': ''}, 'summary': 'Warm-up', 'section_order': ['summary']}
+
+def warm_up():
+    with get_profiler().span('warm_up'):
+        warm_style_registry()
+        generate_pdf(WARMUP_RESUME, 1.0, 'pt')
+        generate_docx(WARMUP_RESUME, 1.0, 'pt')
+        for name in ('pdf_flowables', 'annex_images', 'streamlit_sortables'): importlib.import_module(name)
+        pdf_reader_class()
+    return True
+
+@st.cache_resource
+def start_warm_up():
+    # Uma vez por processo, ao fim do primeiro rerun: a primeira tela não espera pelos imports
+    # pesados, e o primeiro download/preview já encontra tudo carregado
+    if os.environ.get('APP_WARMUP', '1') in ('', '0'): return None
+    thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return thread
+
+# --- INTERFACE DO USUÁRIO ---
+@st.cache_resource
+def get_preview_renderer():
+    # Fragmentos HTML memoizados por seção, compartilhados entre sessões
+    return PreviewRenderer()
+
+def inject_preview_css(scale_factor):
+    # CSS Dinâmico (Preview) - compartilhado pelos previews de Currículo e Cover Letter
+    st.markdown(preview_css(scale_factor), unsafe_allow_html=True)
+
+# --- EDITOR DO CURRÍCULO (FRAGMENTOS) ---
+# Cada editor de seção e o preview são fragmentos com key: uma alteração reroda só o editor
+# da seção e o preview, sem o sidebar (sort_items), a navegação e o resto do app
+RESUME_PREVIEW_KEY = 'resume_preview'
+
+def resume_editor_key(section): return f"resume_editor_{section.lower()}"
+
+def resume_edit(section, action, *args):
+    # Callback dos widgets: roda antes dos fragmentos, então o preview já renderiza o dado novo
+    action(*args)
+    autosave_documents() # Rerun de fragmento não passa pelo finally do main()
+    st.rerun([resume_editor_key(section), RESUME_PREVIEW_KEY])
+
+def resume_form_edit(section, action, keys, required=()):
+    # Valores submetidos pelo form já estão no session_state (pelas keys) durante o callback
+    values = [st.session_state[key] for key in keys]
+    if all(st.session_state[key] for key in required): resume_edit(section, action, *values)
+
+@st.fragment(key=resume_editor_key("Contact"))
+def contact_editor(t):
+    data = st.session_state['resume_data']
+    with st.form("contact_form"):
+        st.text_input(t['lbl_name'], data['contact']['name'], key='res_contact_name')
+        st.text_input(t['lbl_email'], data['contact']['email'], key='res_contact_email')
+        st.text_input(t['lbl_phone'], data['contact']['phone'], key='res_contact_phone')
+        st.text_input(t['lbl_linkedin'], data['contact']['linkedin'], key='res_contact_linkedin')
+        st.text_input(t['lbl_location'], data['contact']['location'], key='res_contact_location')
+        st.text_input("Stack / Título Profissional (Abaixo do Nome)", data.get('stack', ''), key='res_stack')
+        st.form_submit_button(t['btn_update'], on_click=resume_form_edit, args=("Contact", update_contact, ['res_contact_name', 'res_contact_email', 'res_contact_phone', 'res_contact_linkedin', 'res_contact_location', 'res_stack']))
+
+@st.fragment(key=resume_editor_key("Summary"))
+def summary_editor(t):
+    data = st.session_state['resume_data']
+    with st.form("summary_form"):
+        st.text_area(t['lbl_summary'], data['summary'], height=150, key='res_summary')
+        st.text_area("Principais Feitos / Achievements (Opcional - aparecerá dentro do Resumo)", data.get('achievements', ''), height=100, key='res_achievements')
+        if st.form_submit_button(t['btn_save'], on_click=resume_form_edit, args=("Summary", update_summary, ['res_summary', 'res_achievements'])):
+            st.success("OK!")
+
+@st.fragment(key=resume_editor_key("Skills"))
+def skills_editor(t):
+    current_skills = ", ".join(st.session_state['resume_data']['skills'])
+    with st.form("skills_form"):
+        st.text_area(t['lbl_skills'], current_skills, key='res_skills')
+        if st.form_submit_button(t['btn_save'], on_click=resume_form_edit, args=("Skills", update_skills, ['res_skills'])):
+            st.success("OK!")
+
+@st.fragment(key=resume_editor_key("Experience"))
+def experience_editor(t):
+    for i, exp in enumerate(st.session_state['resume_data']['experience']):
+        with st.expander(f"{exp['position']} - {exp['company']}"):
+            st.write(f"{exp['start']} - {exp['end']}")
+            st.button(f"{t['btn_remove']} {i}", key=f"del_exp_{i}", on_click=resume_edit, args=("Experience", remove_experience, i))
+    with st.form("add_exp_form"):
+        st.text_input(t['lbl_company'], key='res_exp_company')
+        st.text_input(t['lbl_position'], key='res_exp_position')
+        col1, col2 = st.columns(2)
+        col1.text_input(t['lbl_start'], key='res_exp_start')
+        col2.text_input(t['lbl_end'], key='res_exp_end')
+        st.text_area(t['lbl_desc'], height=100, key='res_exp_desc')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Experience", add_experience, ['res_exp_company', 'res_exp_position', 'res_exp_start', 'res_exp_end', 'res_exp_desc'], ['res_exp_company', 'res_exp_position']))
+
+@st.fragment(key=resume_editor_key("Education"))
+def education_editor(t):
+    for i, edu in enumerate(st.session_state['resume_data']['education']):
+        with st.expander(f"{edu['degree']} - {edu['institution']}"):
+            st.button(f"{t['btn_remove']} {i}", key=f"del_edu_{i}", on_click=resume_edit, args=("Education", remove_education, i))
+    with st.form("add_edu_form"):
+        st.text_input(t['lbl_institution'], key='res_edu_institution')
+        st.text_input(t['lbl_degree'], key='res_edu_degree')
+        st.text_input(t['lbl_year'], key='res_edu_year')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Education", add_education, ['res_edu_institution', 'res_edu_degree', 'res_edu_year']))
+
+@st.fragment(key=resume_editor_key("Certifications"))
+def certifications_editor(t):
+    for i, cert in enumerate(st.session_state['resume_data']['certifications']):
+        st.text(f"• {cert['name']}")
+        st.button(f"{t['btn_remove']} {i}", key=f"del_cert_{i}", on_click=resume_edit, args=("Certifications", remove_certification, i))
+    with st.form("add_cert_form"):
+        st.text_input(t['lbl_name'], key='res_cert_name')
+        st.text_input(t['lbl_issuer'], key='res_cert_issuer')
+        st.text_input(t['lbl_year'], key='res_cert_year')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Certifications", add_certification, ['res_cert_name', 'res_cert_issuer', 'res_cert_year']))
+
+@st.fragment(key=resume_editor_key("Projects"))
+def projects_editor(t):
+    for i, proj in enumerate(st.session_state['resume_data'].get('projects', [])):
+        with st.expander(f"{proj['title']}"):
+            st.write(f"Link: {proj['link']}")
+            st.button(f"{t['btn_remove']} {i}", key=f"del_proj_{i}", on_click=resume_edit, args=("Projects", remove_project, i))
+    with st.form("add_proj_form"):
+        st.text_input(t.get('lbl_project_title', 'Título'), key='res_proj_title')
+        st.text_input(t.get('lbl_project_link', 'Link'), key='res_proj_link')
+        st.text_area(t.get('lbl_project_desc', 'Descrição'), key='res_proj_desc')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Projects", add_project, ['res_proj_title', 'res_proj_link', 'res_proj_desc']))
+
+@st.fragment(key=resume_editor_key("Languages"))
+def languages_editor(t):
+    for i, lang in enumerate(st.session_state['resume_data'].get('languages', [])):
+        with st.expander(f"{lang['name']}"):
+            st.write(f"{t['lbl_conv']}: {lang['conv']} | {t['lbl_comp']}: {lang['comp']} | {t['lbl_writ']}: {lang['writ']}")
+            st.button(f"{t['btn_remove']} {i}", key=f"del_lang_{i}", on_click=resume_edit, args=("Languages", remove_language, i))
+
+    with st.form("add_lang_form"):
+        st.text_input(t['lbl_language'], key='res_lang_name')
+        levels = [t['lbl_level_basic'], t['lbl_level_inter'], t['lbl_level_adv'], t['lbl_level_fluent'], t['lbl_level_native']]
+        c1, c2, c3 = st.columns(3)
+        c1.selectbox(t['lbl_conv'], levels, key='res_lang_conv')
+        c2.selectbox(t['lbl_comp'], levels, key='res_lang_comp')
+        c3.selectbox(t['lbl_writ'], levels, key='res_lang_writ')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Languages", add_language, ['res_lang_name', 'res_lang_conv', 'res_lang_comp', 'res_lang_writ'], ['res_lang_name']))
+
+@st.fragment(key=resume_editor_key("Awards"))
+def awards_editor(t):
+    for i, aw in enumerate(st.session_state['resume_data'].get('awards', [])):
+        with st.expander(f"{aw['title']}"):
+            st.write(f"{aw['issuer']} - {aw['date']}")
+            st.button(f"{t['btn_remove']} {i}", key=f"del_aw_{i}", on_click=resume_edit, args=("Awards", remove_award, i))
+
+    with st.form("add_award_form"):
+        st.text_input(t['lbl_award_title'], key='res_award_title')
+        st.text_input(t['lbl_award_issuer'], key='res_award_issuer')
+        st.text_input(t['lbl_award_date'], key='res_award_date')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Awards", add_award, ['res_award_title', 'res_award_issuer', 'res_award_date'], ['res_award_title']))
+
+@st.fragment(key=resume_editor_key("Volunteering"))
+def volunteering_editor(t):
+    for i, vol in enumerate(st.session_state['resume_data'].get('volunteering', [])):
+        with st.expander(f"{vol['role']} - {vol['org']}"):
+            st.write(f"{vol['start']} -> {vol['end']} ({vol['category']})")
+            st.button(f"{t['btn_remove']} {i}", key=f"del_vol_{i}", on_click=resume_edit, args=("Volunteering", remove_volunteering, i))
+
+    with st.form("add_vol_form"):
+        st.text_input(t['lbl_vol_role'], key='res_vol_role')
+        st.text_input(t['lbl_vol_org'], key='res_vol_org')
+        c1, c2 = st.columns(2)
+        c1.text_input(t['lbl_start'], key='res_vol_start')
+        c2.text_input(t['lbl_end'], key='res_vol_end')
+        st.text_input(t['lbl_vol_cat'], key='res_vol_category')
+        st.form_submit_button(t['btn_add'], on_click=resume_form_edit, args=("Volunteering", add_volunteering, ['res_vol_role', 'res_vol_org', 'res_vol_start', 'res_vol_end', 'res_vol_category'], ['res_vol_role']))
+
+RESUME_SECTION_EDITORS = {
+    "Contact": contact_editor, "Summary": summary_editor, "Skills": skills_editor, "Experience": experience_editor,
+    "Education": education_editor, "Certifications": certifications_editor, "Projects": projects_editor,
+    "Languages": languages_editor, "Awards": awards_editor, "Volunteering": volunteering_editor
+}
+
+# === TAB 1: RESUME BUILDER ===
+def resume_builder_tab(t, lang_code, scale_factor):
+    col_edit, col_prev = st.columns([1, 1.2])
     
-    style_h1 = ParagraphStyle('PropH1', parent=styles['Heading1'], fontSize=14, textColor=colors.HexColor(BLUE_COLOR), spaceBefore=20, spaceAfter=12, textTransform='uppercase')
-    style_h2 = ParagraphStyle('PropH2', parent=styles['Heading2'], fontSize=12, textColor=colors.black, spaceBefore=10, spaceAfter=6, fontName='Helvetica-Bold')
-    style_normal = ParagraphStyle('PropNormal', parent=styles['Normal'], fontSize=11, leading=14, alignment=TA_JUSTIFY, spaceAfter=6)
-
-    # --- 1. CAPA ---
-    if data['cover']['institution']:
-        story.append(Paragraph(data['cover']['institution'].upper(), style_center))
-    story.append(Paragraph(data['cover']['author'].upper(), style_center))
+    with col_edit:
+        st.header(t['section_editor'])
+        section_map = {
+            t['contact_header']: "Contact", t['summary_header']: "Summary", t['skills_header']: "Skills",
+            t['experience_header']: "Experience", t['education_header']: "Education", t['certifications_header']: "Certifications",
+            t.get('projects_header', 'PROJETOS'): "Projects",
+            t['languages_header']: "Languages", t['awards_header']: "Awards", t['volunteering_header']: "Volunteering"
+        }
+        # Preserve selection
+        section_selected = st.selectbox(t['go_to'], list(section_map.keys()))
+        RESUME_SECTION_EDITORS[section_map[section_selected]](t)
+
+    with col_prev:
+        resume_preview(t, lang_code, scale_factor)
+
+def resume_fit(lang_code):
+    # Com o ajuste automático ligado a escala acompanha o conteúdo (também no rerun do fragmento)
+    if not st.session_state.get('fit_enabled'): return None
+    return fit_resume_scale(st.session_state['resume_data'], lang_code, st.session_state.get('fit_pages', 1))
+
+def page_meter(t, lang_code, scale_factor, max_pages):
+    # Medidor "cabe em N página(s)": layout das medidas cacheadas por seção, sem gerar o PDF
+    report = resume_layout(st.session_state['resume_data'], scale_factor, lang_code, max_pages)
+    capacity = max_pages * report['frame_height']
+    if report['pages'] <= max_pages:
+        fill = report['used_height'] / capacity
+        st.progress(min(fill, 1.0), text=t['meter_fits'].format(max_pages=max_pages, percent=round(100 * fill), free=capacity - report['used_height']))
+        return
+    sections = dict.fromkeys(t.get(f"{item['section']}_header", item['section']) for item in report['overflow'])
+    st.progress(1.0, text=t['meter_overflow'].format(pages=report['pages'], max_pages=max_pages, sections=", ".join(sections)))
+    first = next((item for item in report['overflow'] if item['text']), None)
+    if first: st.caption(t['meter_first'].format(text=re.sub(r'<[^>]+>', '', first['text'])[:90]))
+
+@st.fragment(key=RESUME_PREVIEW_KEY)
+def resume_preview(t, lang_code, scale_factor):
+    st.markdown(f"### {t['preview_title']}")
+    fit = resume_fit(lang_code)
+    if fit:
+        scale_factor, pages = fit
+        st.caption(t['fit_result'].format(scale=scale_factor, pages=pages))
+    page_meter(t, lang_code, scale_factor, st.session_state.get('fit_pages', 1) if fit else 1)
+    st.download_button(label=t['download_btn'], data=deferred_export(render_resume_pdf, st.session_state['resume_data'], scale_factor, lang_code), file_name=f"resume_{lang_code}.pdf", mime="application/pdf", type="primary", on_click="ignore")
     
-    story.append(Paragraph(data['cover']['title'].upper(), style_title_cover))
-    if data['cover']['subtitle']:
-        story.append(Paragraph(data['cover']['subtitle'], style_subtitle))
+    if DOCX_AVAILABLE:
+        # Agora o DOCX usa o scale_factor
+        st.download_button(label="📥 Baixar / Download .docx (Word)", data=deferred_export(render_resume_docx, st.session_state['resume_data'], scale_factor, lang_code), file_name=f"resume_{lang_code}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", on_click="ignore")
     else:
-        story.append(Spacer(1, 100))
-        
-    story.append(Spacer(1, 200)) # Empurrar para baixo
-    story.append(Paragraph(data['cover']['city'], style_center))
-    story.append(Paragraph(data['cover']['year'], style_center))
-    story.append(PageBreak())
-
-    # --- 2. FOLHA DE ROSTO ---
-    story.append(Paragraph(data['cover']['author'].upper(), style_center))
-    story.append(Spacer(1, 100))
-    story.append(Paragraph(data['cover']['title'].upper(), style_center))
-    if data['cover']['subtitle']:
-        story.append(Paragraph(data['cover']['subtitle'], style_center))
+        st.warning("⚠️ Biblioteca 'python-docx' não detectada. Instale com `pip install python-docx` para habilitar exportação Word.")
+
     
-    story.append(Spacer(1, 50))
-    if data['cover']['theme']:
-        story.append(Paragraph(data['cover']['theme'], style_note))
+    inject_preview_css(scale_factor)
+
+    with get_profiler().span('preview.resume') as span:
+        # HTML Preview (Resume) with Dynamic Order - mesma IR do PDF/DOCX; só as seções alteradas são remontadas
+        html_content = get_preview_renderer().resume(resume_ir(st.session_state['resume_data'], lang_code))
+        span['html_bytes'] = len(html_content)
+        st.markdown(html_content, unsafe_allow_html=True)
+
+
+# === TAB 2: COVER LETTER BUILDER ===
+def cover_letter_builder_tab(t, lang_code, scale_factor):
+    col_cl_edit, col_cl_prev = st.columns([1, 1.2])
     
-    story.append(Spacer(1, 200)) # Empurrar para baixo
-    story.append(Paragraph(data['cover']['city'], style_center))
-    story.append(Paragraph(data['cover']['year'], style_center))
-    story.append(PageBreak())
+    with col_cl_edit:
+        st.header("Cover Letter Builder")
+        cl_data = st.session_state['cover_letter_data']
+        
+        with st.expander(t['cl_recipient_header'], expanded=True):
+            cl_data['recipient']['manager'] = st.text_input(t['lbl_manager'], cl_data['recipient']['manager'])
+            cl_data['recipient']['company'] = st.text_input(t['lbl_company_cl'], cl_data['recipient']['company'])
+            cl_data['recipient']['address'] = st.text_input(t['lbl_address'], cl_data['recipient']['address'])
+        
+        with st.expander(t['cl_hook_header'], expanded=True):
+            cl_data['opening']['greeting'] = st.text_input(t['lbl_greeting'], cl_data['opening']['greeting'])
+            cl_data['opening']['hook'] = st.text_area(t['lbl_hook'], cl_data['opening']['hook'], height=100)
+        
+        with st.expander(t['cl_narrative_header']):
+            cl_data['narrative'] = st.text_area(t['lbl_narrative'], cl_data['narrative'], height=150)
+        
+        with st.expander(t['cl_competencies_header']):
+            cl_data['competencies']['star1'] = st.text_area(t['lbl_star1'], cl_data['competencies']['star1'], height=100)
+            cl_data['competencies']['star2'] = st.text_area(t['lbl_star2'], cl_data['competencies']['star2'], height=100)
+        
+        with st.expander(t['cl_alignment_header']):
+            cl_data['alignment']['research'] = st.text_area(t['lbl_alignment'], cl_data['alignment']['research'], height=100)
+            cl_data['alignment']['differentiation'] = st.text_area(t['lbl_differentiation'], cl_data['alignment']['differentiation'], height=100)
+        
+        with st.expander(t['cl_closing_header']):
+            cl_data['closing'] = st.text_area(t['lbl_closing'], cl_data['closing'], height=80)
+
+    with col_cl_prev:
+        st.markdown(f"### {t['preview_title']}")
+        data = st.session_state['resume_data']
+        inject_preview_css(scale_factor)
+        st.download_button(label=t['download_cl_btn'], data=deferred_export(render_cl_pdf, st.session_state['resume_data'], cl_data, scale_factor, lang_code), file_name=f"cover_letter_{lang_code}.pdf", mime="application/pdf", type="primary", on_click="ignore")
+        
+        with get_profiler().span('preview.cover_letter') as span:
+            # HTML Preview (Cover Letter)
+            cl_html = get_preview_renderer().cover_letter(data, cl_data, date.today().strftime('%B %d, %Y'))
+            span['html_bytes'] = len(cl_html)
+            st.markdown(cl_html, unsafe_allow_html=True)
+
 
-    # --- 3. CONTEÚDO (SEÇÕES 1-9) ---
-    sections_order = [
+# === TAB 3: PROPOSAL BUILDER (ABNT) ===
+def proposal_builder_tab(t, lang_code, scale_factor):
+    st.header(t.get('prop_header', 'Proposta'))
+    p_data = st.session_state['proposal_data']
+
+    # 1. CAPA & FOLHA DE ROSTO
+    with st.expander("📘 Capa & Folha de Rosto (ABNT)", expanded=True):
+        c1, c2 = st.columns(2)
+        p_data['cover']['author'] = c1.text_input(t['lbl_author_prop'], p_data['cover']['author'])
+        p_data['cover']['institution'] = c2.text_input(t['lbl_institution'], p_data['cover']['institution'])
+        p_data['cover']['title'] = st.text_input(t['lbl_project_title'], p_data['cover']['title'])
+        p_data['cover']['subtitle'] = st.text_input(t['lbl_subtitle'], p_data['cover']['subtitle'])
+        c3, c4 = st.columns(2)
+        p_data['cover']['city'] = c3.text_input(t['lbl_city'], p_data['cover']['city'])
+        p_data['cover']['year'] = c4.text_input(t['lbl_year'], p_data['cover']['year'])
+        p_data['cover']['theme'] = st.text_area(t['lbl_theme'], p_data['cover']['theme'], height=70)
+
+    # 2. SEÇÕES DO PROJETO (1-9)
+    st.divider()
+    st.subheader("Estrutura do Projeto")
+    
+    sections_map = [
         ("1", t['sec_1']), ("2", t['sec_2']), ("3", t['sec_3']), ("4", t['sec_4']),
         ("5", t['sec_5']), ("6", t['sec_6']), ("7", t['sec_7']), ("8", t['sec_8']), ("9", t['sec_9'])
     ]
 
-    for sec_id, sec_title in sections_order:
-        # Título da Seção (ex: 1. RESUMO EXECUTIVO)
-        story.append(Paragraph(f"{sec_id}. {sec_title}", style_h1))
-        story.append(HorizontalLine(450, color=colors.HexColor("#DDDDDD"), thickness=0.5))
+    for sec_id, sec_title in sections_map:
+        with st.expander(f"{sec_id}. {sec_title}"):
+            
+            # Lógica Especial: Cronograma (5)
+            if sec_id == "5":
+                for i, item in enumerate(p_data['timeline']):
+                    c1, c2, c3 = st.columns([0.2, 0.7, 0.1])
+                    c1.text(item['date'])
+                    c2.text(item['milestone'])
+                    if c3.button("X", key=f"del_time_{i}"): remove_timeline_milestone(i); st.rerun()
+                with st.form("add_timeline_form"):
+                    c1, c2 = st.columns([0.3, 0.7])
+                    d_date = c1.date_input(t.get('lbl_date', 'Data'))
+                    d_milestone = c2.text_input(t.get('lbl_milestone', 'Marco'))
+                    if st.form_submit_button(t['btn_add']):
+                        if d_milestone: add_timeline_milestone(d_date, d_milestone); st.rerun()
+
+            # Lógica Especial: Orçamento (6)
+            elif sec_id == "6":
+                total = sum(item['amount'] for item in p_data['budget'])
+                st.markdown(f"**Total: {total:,.2f}**")
+                for i, item in enumerate(p_data['budget']):
+                    c1, c2, c3 = st.columns([0.6, 0.3, 0.1])
+                    c1.text(item['item'])
+                    c2.text(f"{item['amount']:.2f}")
+                    if c3.button("X", key=f"del_budget_{i}"): remove_budget_item(i); st.rerun()
+                with st.form("add_budget_form"):
+                    c1, c2 = st.columns([0.7, 0.3])
+                    b_item = c1.text_input(t.get('lbl_budget_item', 'Item'))
+                    b_amount = c2.number_input(t.get('lbl_amount', 'Valor'), min_value=0.0, step=100.0)
+                    if st.form_submit_button(t['btn_add']):
+                        if b_item: add_budget_item(b_item, b_amount); st.rerun()
+
+            # Lógica Padrão: Texto com Subseções
+            else:
+                subsections = p_data['text_sections'].get(sec_id, [])
+                for i, sub in enumerate(subsections):
+                    st.markdown(f"**{sec_id}.{i+1} {sub['title']}**")
+                    st.text(sub['content'][:60] + "..." if len(sub['content']) > 60 else sub['content'])
+                    if st.button(f"{t['btn_remove']} {i}", key=f"del_sub_{sec_id}_{i}"): remove_text_subsection(sec_id, i); st.rerun()
+                
+                with st.form(f"add_sub_{sec_id}"):
+                    s_title = st.text_input(t['lbl_sub_title'])
+                    s_content = st.text_area(t['lbl_sub_content'], height=100)
+                    if st.form_submit_button(t['btn_add']):
+                        if s_title and s_content: add_text_subsection(sec_id, s_title, s_content); st.rerun()
+
+    # Download
+    st.divider()
+    st.download_button(label=t.get('download_prop_btn', 'Baixar PDF'), data=deferred_export(render_proposal_pdf, p_data, t), file_name=f"projeto_{lang_code}.pdf", mime="application/pdf", type="primary", on_click="ignore")
+    if DOCX_AVAILABLE: st.download_button(label=t['download_docx_btn'], data=deferred_export(render_proposal_docx, p_data, t), file_name=f"projeto_{lang_code}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", on_click="ignore")
+
+
+# === TAB 4: REPORT BUILDER (ABNT) ===
+def report_builder_tab(t, lang_code, scale_factor):
+    st.header(t.get('rep_header', 'Relatório Técnico'))
+    r_data = st.session_state['report_data']
+
+    # 1. CAPA & FOLHA DE ROSTO
+    with st.expander("📘 Capa & Folha de Rosto (ABNT)", expanded=True):
+        c1, c2 = st.columns(2)
+        r_data['cover']['author'] = c1.text_input(t['lbl_author_prop'], r_data['cover']['author'], key="rep_auth")
+        r_data['cover']['institution'] = c2.text_input(t['lbl_institution'], r_data['cover']['institution'], key="rep_inst")
+        r_data['cover']['title'] = st.text_input(t['lbl_project_title'], r_data['cover']['title'], key="rep_title")
+        r_data['cover']['subtitle'] = st.text_input(t['lbl_subtitle'], r_data['cover']['subtitle'], key="rep_sub")
+        c3, c4 = st.columns(2)
+        r_data['cover']['city'] = c3.text_input(t['lbl_city'], r_data['cover']['city'], key="rep_city")
+        r_data['cover']['year'] = c4.text_input(t['lbl_year'], r_data['cover']['year'], key="rep_year")
+        r_data['cover']['theme'] = st.text_area(t['lbl_theme'], r_data['cover']['theme'], height=70, key="rep_theme")
+
+    # 2. SEÇÕES DO RELATÓRIO (1-7)
+    st.divider()
+    st.subheader("Conteúdo do Relatório")
+    
+    rep_sections = [
+        ("1", t['rep_sec_1']), ("2", t['rep_sec_2']), ("3", t['rep_sec_3']),
+        ("4", t['rep_sec_4']), ("5", t['rep_sec_5']), ("6", t['rep_sec_6']),
+        ("7", t['rep_sec_7'])
+    ]
+
+    for sec_id, sec_title in rep_sections:
+        with st.expander(f"{sec_id}. {sec_title}"):
+            subsections = r_data['text_sections'].get(sec_id, [])
+            for i, sub in enumerate(subsections):
+                st.markdown(f"**{sec_id}.{i+1} {sub['title']}**")
+                st.text(sub['content'][:60] + "..." if len(sub['content']) > 60 else sub['content'])
+                if st.button(f"{t['btn_remove']} {i}", key=f"del_rep_sub_{sec_id}_{i}"): remove_report_subsection(sec_id, i); st.rerun()
+            
+            with st.form(f"add_rep_sub_{sec_id}"):
+                s_title = st.text_input(t['lbl_sub_title'])
+                s_content = st.text_area(t['lbl_sub_content'], height=100)
+                if st.form_submit_button(t['btn_add']):
+                    if s_title and s_content: add_report_subsection(sec_id, s_title, s_content); st.rerun()
+
+    # 3. ANEXOS (IMAGENS)
+    st.divider()
+    with st.expander(f"8. {t['rep_sec_8']} (Imagens)"):
+        for i, annex in enumerate(r_data['annexes']):
+            st.image(annex_blob(annex, 'thumb') or annex_blob(annex, 'image'), caption=f"Fig {i+1}: {annex['caption']}", width=150)
+            if st.button(f"{t['btn_remove']} {i}", key=f"del_annex_{i}"): remove_report_annex(i); st.rerun()
         
-        # Lógica Especial: Cronograma (5)
-        if sec_id == "5": # Cronograma
-            if data['timeline']:
-                table_data = [[t.get('lbl_date', 'Data'), t.get('lbl_milestone', 'Marco')]]
-                for item in data['timeline']: table_data.append([item['date'], item['milestone']])
-                t_style = TableStyle([
-                    ('BACKGROUND', (0,0), (-1,0), colors.HexColor(BLUE_COLOR)), ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                    ('ALIGN', (0,0), (-1,-1), 'LEFT'), ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                    ('GRID', (0,0), (-1,-1), 0.5, colors.grey), ('BOTTOMPADDING', (0,0), (-1,0), 8), ('TOPPADDING', (0,0), (-1,0), 8)
-                ])
-                t_obj = Table(table_data, colWidths=[100, 350])
-                t_obj.setStyle(t_style)
-                story.append(t_obj)
-            else: story.append(Paragraph("N/A", style_normal))
-
-        elif sec_id == "6": # Orçamento
-            if data['budget']:
-                table_data = [[t.get('lbl_budget_item', 'Item'), t.get('lbl_amount', 'Valor')]]
-                total = 0.0
-                for item in data['budget']:
-                    table_data.append([item['item'], f"{item['amount']:,.2f}"])
-                    total += item['amount']
-                table_data.append(['TOTAL', f"{total:,.2f}"])
-                b_style = TableStyle([
-                    ('BACKGROUND', (0,0), (-1,0), colors.HexColor(BLUE_COLOR)), ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                    ('ALIGN', (1,0), (-1,-1), 'RIGHT'), ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                    ('GRID', (0,0), (-1,-1), 0.5, colors.grey), ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
-                    ('BACKGROUND', (0,-1), (-1,-1), colors.lightgrey), ('TEXTCOLOR', (0,-1), (-1,-1), colors.black),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 8), ('TOPPADDING', (0,0), (-1,-1), 8)
-                ])
-                b_obj = Table(table_data, colWidths=[350, 100])
-                b_obj.setStyle(b_style)
-                story.append(b_obj)
-            else: story.append(Paragraph("N/A", style_normal))
-
-        else: # Seções de Texto (1, 2, 3, 4, 7, 8, 9)
-            subsections = data['text_sections'].get(sec_id, [])
-            if not subsections:
-                story.append(Paragraph("...", style_normal))
-            for idx, sub in enumerate(subsections):
-                # Subseção (ex: 1.1 Título)
-                if sub['title']:
-                    story.append(Paragraph(f"{sec_id}.{idx+1} {sub['title']}", style_h2))
-                if sub['content']:
-                    for line in sub['content'].split('\n'):
-                        if line.strip(): story.append(Paragraph(line, style_normal))
+        with st.form("add_annex_form"):
+            uploaded_file = st.file_uploader(t['lbl_img_upload'], type=['png', 'jpg', 'jpeg'])
+            caption = st.text_input(t['lbl_img_caption'])
+            if st.form_submit_button(t['btn_add']):
+                if uploaded_file and caption:
+                    add_report_annex(uploaded_file.getvalue(), caption)
+                    st.rerun()
+
+    # Download
+    st.divider()
+    st.download_button(label=t.get('download_rep_btn', 'Baixar Relatório PDF'), data=deferred_export(render_report_pdf, r_data, t), file_name=f"relatorio_{lang_code}.pdf", mime="application/pdf", type="primary", on_click="ignore")
+    if DOCX_AVAILABLE: st.download_button(label=t['download_docx_btn'], data=deferred_export(render_report_docx, r_data, t), file_name=f"relatorio_{lang_code}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", on_click="ignore")
+
+
+# === TAB 5: ATS SIMULATOR ===
+def ats_simulator_tab(t, lang_code, scale_factor):
+    st.header(t['ats_header'])
+    st.markdown(t['ats_desc'])
+    
+    if PDF_BACKEND is None:
+        st.error(t['ats_error_lib'])
+    else:
+        uploaded_pdf = st.file_uploader(t['ats_upload'], type=["pdf"])
+        
+        if uploaded_pdf is not None:
+            if st.button("🔍 Analisar PDF"):
+                with st.spinner("Processando como um robô (ATS)..."):
+                    # 1. Extração + 2. Análise (em streaming), cacheadas pelo SHA-256 do arquivo
+                    raw_text, score, parsed_data, sections_found = get_ats_cache().analyze(uploaded_pdf.getvalue())
+                    
+                    # 3. Atualizar Estado
+                    st.session_state['ats_data']['score'] = score
+                    st.session_state['ats_data']['raw_text'] = raw_text
+                    st.session_state['ats_data']['sections_found'] = sections_found
+                    st.session_state['ats_data']['parsed_content'] = parsed_data
         
-        story.append(Spacer(1, 15))
+        # Dashboard de Resultados
+        if st.session_state['ats_data']['raw_text']:
+            st.divider()
+            
+            # Métricas de Topo
+            c1, c2, c3 = st.columns(3)
+            final_score = st.session_state['ats_data']['score']
+            score_color = "green" if final_score > 80 else "orange" if final_score > 50 else "red"
+            
+            c1.metric(label=t['ats_score'], value=f"{final_score}/100")
+            c2.metric(label=t['ats_text_len'], value=len(st.session_state['ats_data']['raw_text']))
+            c3.metric(label=t['ats_sec_found'], value=f"{len(st.session_state['ats_data']['sections_found'])}/7")
+            
+            # Visualização de Dados
+            col_left, col_right = st.columns(2)
+            
+            with col_left:
+                st.subheader(t['ats_parsed_data'])
+                st.json(st.session_state['ats_data']['parsed_content'])
+                
+            with col_right:
+                st.subheader(t['ats_raw_text'])
+                st.text_area("Raw Output", st.session_state['ats_data']['raw_text'], height=400, disabled=True)
 
-    doc.build(story)
-    return buffer.getvalue()
+        # --- ANÁLISE EM LOTE (ZIP) ---
+        st.divider()
+        with st.expander(t['ats_batch_header']):
+            batch_zip = st.file_uploader(t['ats_batch_upload'], type=["zip"], key="ats_batch_zip")
+            if batch_zip is not None and st.button(t['ats_batch_run']):
+                with zipfile.ZipFile(batch_zip) as zf:
+                    total = sum(1 for info in zf.infolist() if info.filename.lower().endswith('.pdf'))
+                batch_zip.seek(0)
+                results = []
+                progress = st.progress(0.0)
+                started = time.perf_counter()
+                # Pool de processos: cada PDF é extraído e pontuado em paralelo, com timeout por arquivo
+                for result in score_batch(iter_batch_sources(batch_zip)):
+                    results.append(result)
+                    progress.progress(len(results) / max(total, 1), text=f"{len(results)}/{total}")
+                st.session_state['ats_data']['batch_results'] = results
+                st.session_state['ats_data']['batch_elapsed'] = time.perf_counter() - started
+
+            results = st.session_state['ats_data']['batch_results']
+            if results:
+                elapsed = st.session_state['ats_data']['batch_elapsed']
+                scores = [r['score'] for r in results if r['status'] == 'ok']
+                c1, c2, c3 = st.columns(3)
+                c1.metric(label=t['ats_batch_files'], value=len(results))
+                c2.metric(label=t['ats_batch_rate'], value=f"{len(results) / elapsed:.1f}" if elapsed else "-")
+                c3.metric(label=t['ats_batch_avg'], value=f"{sum(scores) / len(scores):.1f}" if scores else "-")
+                rows = [result_row(r) for r in results]
+                st.dataframe(rows, use_container_width=True)
+                d1, d2 = st.columns(2)
+                d1.download_button("📥 CSV", data=results_to_csv(results), file_name="ats_batch.csv", mime="text/csv", on_click="ignore")
+                d2.download_button("📥 JSONL", data="".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results), file_name="ats_batch.jsonl", mime="application/json", on_click="ignore")
+
+
+TAB_BUILDERS = {
+    'resume': resume_builder_tab, 'cover': cover_letter_builder_tab, 'proposal': proposal_builder_tab,
+    'report': report_builder_tab, 'ats': ats_simulator_tab
+}
 
-# --- INTERFACE DO USUÁRIO ---
-def main():
+def profiling_panel(profiler):
+    # Renderizado depois do span 'rerun', então já inclui o rerun atual; mostra as latências do
+    # audit (da sessão, ou do processo com APP_PROFILE) com o status OK ou com erro
+    _, audit_details = run_system_audit()
+    if "latency_ms" not in audit_details: return
+    with st.sidebar.expander("⏱️ Profiling (ms)", expanded=True):
+        latencies = audit_details["latency_ms"]
+        if latencies: st.dataframe([{"span": name, **row} for name, row in latencies.items()], hide_index=True)
+        else: st.caption("No spans recorded yet.")
+        if profiler.trace_path: st.caption(f"Trace file: `{profiler.trace_path}`")
+        if st.button("Reset", key='profiling_reset'): profiler.clear(profiling_session()); st.rerun()
+
+def render_app():
     with st.sidebar:
         st.header("🌐 & ⚙️")
         lang_option = st.radio("Language / Idioma", ["Português", "English"], horizontal=True)
@@ -1166,14 +1640,15 @@ def main():
 
         st.divider()
         st.subheader(t['settings'])
-        density_mode = st.select_slider(t['density_label'], options=["Confortável", "Normal", "Compacto", "Super Compacto"], value="Normal", help=t['density_help'])
-        scale_map = {"Confortável": 1.05, "Normal": 1.0, "Compacto": 0.9, "Super Compacto": 0.85}
-        scale_factor = scale_map[density_mode]
+        density_mode = st.select_slider(t['density_label'], options=list(DENSITY_PRESETS.keys()), value="Normal", help=t['density_help'], disabled=st.session_state.get('fit_enabled', False))
+        if st.toggle(t['fit_label'], key='fit_enabled', help=t['fit_help']):
+            st.number_input(t['fit_pages_label'], min_value=1, max_value=4, value=1, step=1, key='fit_pages')
+        fit = resume_fit(lang_code)
+        scale_factor = fit[0] if fit else DENSITY_PRESETS[density_mode]
         st.session_state['resume_data']['updated_at'] = st.date_input(t['lbl_updated'], value=st.session_state['resume_data'].get('updated_at', date.today()))
         
         st.divider()
         # --- REORDER SECTIONS (DRAG & DROP) ---
-        st.markdown("### Reorder Sections")
         default_order = ["summary", "skills", "experience", "education", "certifications", "projects", "languages", "awards", "volunteering"]
         if "section_order" not in st.session_state['resume_data']:
             st.session_state['resume_data']['section_order'] = default_order
@@ -1183,542 +1658,74 @@ def main():
         for k in default_order: 
             if k not in current_order_keys: current_order_keys.append(k)
 
-        key_map = {
-            'summary': t['summary_header'], 'skills': t['skills_header'], 'experience': t['experience_header'],
-            'education': t['education_header'], 'certifications': t['certifications_header'], 'projects': t.get('projects_header', 'PROJETOS'),
-            'languages': t['languages_header'], 'awards': t['awards_header'], 'volunteering': t['volunteering_header']
-        }
-        
-        # Prepare list for Sortables (Must be strings for single container)
-        # Create a list of readable titles based on current order
-        items_to_sort = []
-        for k in current_order_keys:
-            if k in key_map:
-                items_to_sort.append(key_map[k])
-        
-        sorted_titles = sort_items(items_to_sort)
-        
-        # Map back from Title -> Key
-        if sorted_titles:
-            # Create reverse map: Title -> Key
-            title_to_key = {v: k for k, v in key_map.items()}
-            new_order = []
-            for title in sorted_titles:
-                if title in title_to_key:
-                    new_order.append(title_to_key[title])
-            
-            st.session_state['resume_data']['section_order'] = new_order
-
-
-        st.divider()
-        audit_ok, audit_details = run_system_audit()
-        if audit_ok: st.success("System Status: ✅ Operational")
-        else: st.error(f"System Error: {audit_details}")
-
-    st.title(t['app_title'])
-    
-    # --- TABS: RESUME vs COVER LETTER vs PROPOSAL vs REPORT vs ATS SIMULATOR ---
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([t['tab_resume'], t['tab_cover'], t.get('tab_proposal', 'Proposta'), t.get('tab_report', 'Relatório'), t.get('tab_ats', 'Simulador ATS')])
-
-    # === TAB 1: RESUME BUILDER ===
-    with tab1:
-        col_edit, col_prev = st.columns([1, 1.2])
-        
-        with col_edit:
-            st.header(t['section_editor'])
-            section_map = {
-                t['contact_header']: "Contact", t['summary_header']: "Summary", t['skills_header']: "Skills",
-                t['experience_header']: "Experience", t['education_header']: "Education", t['certifications_header']: "Certifications",
-                t.get('projects_header', 'PROJETOS'): "Projects",
-                t['languages_header']: "Languages", t['awards_header']: "Awards", t['volunteering_header']: "Volunteering"
+        # O componente de arrastar (streamlit_sortables) só é importado quando o reordenador é aberto
+        if st.toggle("↕️ Reorder Sections", key='reorder_sections'):
+            key_map = {
+                'summary': t['summary_header'], 'skills': t['skills_header'], 'experience': t['experience_header'],
+                'education': t['education_header'], 'certifications': t['certifications_header'], 'projects': t.get('projects_header', 'PROJETOS'),
+                'languages': t['languages_header'], 'awards': t['awards_header'], 'volunteering': t['volunteering_header']
             }
-            # Preserve selection
-            section_selected = st.selectbox(t['go_to'], list(section_map.keys()))
-            section_logic = section_map[section_selected]
-
-            if section_logic == "Contact":
-                with st.form("contact_form"):
-                    st.session_state['resume_data']['contact']['name'] = st.text_input(t['lbl_name'], st.session_state['resume_data']['contact']['name'])
-                    st.session_state['resume_data']['contact']['email'] = st.text_input(t['lbl_email'], st.session_state['resume_data']['contact']['email'])
-                    st.session_state['resume_data']['contact']['phone'] = st.text_input(t['lbl_phone'], st.session_state['resume_data']['contact']['phone'])
-                    st.session_state['resume_data']['contact']['linkedin'] = st.text_input(t['lbl_linkedin'], st.session_state['resume_data']['contact']['linkedin'])
-                    st.session_state['resume_data']['contact']['location'] = st.text_input(t['lbl_location'], st.session_state['resume_data']['contact']['location'])
-                    st.session_state['resume_data']['stack'] = st.text_input("Stack / Título Profissional (Abaixo do Nome)", st.session_state['resume_data'].get('stack', ''))
-                    st.form_submit_button(t['btn_update'])
-            
-            elif section_logic == "Summary":
-                with st.form("summary_form"):
-                    new_summary = st.text_area(t['lbl_summary'], st.session_state['resume_data']['summary'], height=150)
-                    new_achievements = st.text_area("Principais Feitos / Achievements (Opcional - aparecerá dentro do Resumo)", st.session_state['resume_data'].get('achievements', ''), height=100)
-                    if st.form_submit_button(t['btn_save']):
-                        st.session_state['resume_data']['summary'] = new_summary
-                        st.session_state['resume_data']['achievements'] = new_achievements
-                        st.success("OK!")
-
-            elif section_logic == "Skills":
-                current_skills = ", ".join(st.session_state['resume_data']['skills'])
-                with st.form("skills_form"):
-                    skills_input = st.text_area(t['lbl_skills'], current_skills)
-                    if st.form_submit_button(t['btn_save']):
-                        st.session_state['resume_data']['skills'] = [s.strip() for s in skills_input.split(",") if s.strip()]
-                        st.success("OK!")
-
-            elif section_logic == "Experience":
-                for i, exp in enumerate(st.session_state['resume_data']['experience']):
-                    with st.expander(f"{exp['position']} - {exp['company']}"):
-                        st.write(f"{exp['start']} - {exp['end']}")
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_exp_{i}"): remove_experience(i); st.rerun()
-                with st.form("add_exp_form"):
-                    company = st.text_input(t['lbl_company'])
-                    position = st.text_input(t['lbl_position'])
-                    col1, col2 = st.columns(2)
-                    start = col1.text_input(t['lbl_start'])
-                    end = col2.text_input(t['lbl_end'])
-                    desc = st.text_area(t['lbl_desc'], height=100)
-                    if st.form_submit_button(t['btn_add']):
-                        if company and position: add_experience(company, position, start, end, desc); st.rerun()
-
-            elif section_logic == "Education":
-                for i, edu in enumerate(st.session_state['resume_data']['education']):
-                    with st.expander(f"{edu['degree']} - {edu['institution']}"):
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_edu_{i}"): remove_education(i); st.rerun()
-                with st.form("add_edu_form"):
-                    inst = st.text_input(t['lbl_institution'])
-                    degree = st.text_input(t['lbl_degree'])
-                    year = st.text_input(t['lbl_year'])
-                    if st.form_submit_button(t['btn_add']): add_education(inst, degree, year); st.rerun()
-
-            elif section_logic == "Certifications":
-                for i, cert in enumerate(st.session_state['resume_data']['certifications']):
-                    st.text(f"• {cert['name']}")
-                    if st.button(f"{t['btn_remove']} {i}", key=f"del_cert_{i}"): remove_certification(i); st.rerun()
-                with st.form("add_cert_form"):
-                    name = st.text_input(t['lbl_name'])
-                    issuer = st.text_input(t['lbl_issuer'])
-                    year = st.text_input(t['lbl_year'])
-                    if st.form_submit_button(t['btn_add']): add_certification(name, issuer, year); st.rerun()
-
-            elif section_logic == "Projects":
-                for i, proj in enumerate(st.session_state['resume_data'].get('projects', [])):
-                    with st.expander(f"{proj['title']}"):
-                        st.write(f"Link: {proj['link']}")
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_proj_{i}"): remove_project(i); st.rerun()
-                with st.form("add_proj_form"):
-                    title = st.text_input(t.get('lbl_project_title', 'Título'))
-                    link = st.text_input(t.get('lbl_project_link', 'Link'))
-                    desc = st.text_area(t.get('lbl_project_desc', 'Descrição'))
-                    if st.form_submit_button(t['btn_add']): add_project(title, link, desc); st.rerun()
-
-            elif section_logic == "Languages":
-                for i, lang in enumerate(st.session_state['resume_data'].get('languages', [])):
-                    with st.expander(f"{lang['name']}"):
-                        st.write(f"{t['lbl_conv']}: {lang['conv']} | {t['lbl_comp']}: {lang['comp']} | {t['lbl_writ']}: {lang['writ']}")
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_lang_{i}"): remove_language(i); st.rerun()
-                
-                with st.form("add_lang_form"):
-                    name = st.text_input(t['lbl_language'])
-                    levels = [t['lbl_level_basic'], t['lbl_level_inter'], t['lbl_level_adv'], t['lbl_level_fluent'], t['lbl_level_native']]
-                    c1, c2, c3 = st.columns(3)
-                    conv = c1.selectbox(t['lbl_conv'], levels)
-                    comp = c2.selectbox(t['lbl_comp'], levels)
-                    writ = c3.selectbox(t['lbl_writ'], levels)
-                    if st.form_submit_button(t['btn_add']):
-                        if name: add_language(name, conv, comp, writ); st.rerun()
 
-            elif section_logic == "Awards":
-                for i, aw in enumerate(st.session_state['resume_data'].get('awards', [])):
-                    with st.expander(f"{aw['title']}"):
-                        st.write(f"{aw['issuer']} - {aw['date']}")
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_aw_{i}"): remove_award(i); st.rerun()
-                
-                with st.form("add_award_form"):
-                    title = st.text_input(t['lbl_award_title'])
-                    issuer = st.text_input(t['lbl_award_issuer'])
-                    date_str = st.text_input(t['lbl_award_date'])
-                    if st.form_submit_button(t['btn_add']):
-                        if title: add_award(title, issuer, date_str); st.rerun()
+            # Prepare list for Sortables (Must be strings for single container)
+            # Create a list of readable titles based on current order
+            items_to_sort = []
+            for k in current_order_keys:
+                if k in key_map:
+                    items_to_sort.append(key_map[k])
 
-            elif section_logic == "Volunteering":
-                for i, vol in enumerate(st.session_state['resume_data'].get('volunteering', [])):
-                    with st.expander(f"{vol['role']} - {vol['org']}"):
-                        st.write(f"{vol['start']} -> {vol['end']} ({vol['category']})")
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_vol_{i}"): remove_volunteering(i); st.rerun()
-                
-                with st.form("add_vol_form"):
-                    role = st.text_input(t['lbl_vol_role'])
-                    org = st.text_input(t['lbl_vol_org'])
-                    c1, c2 = st.columns(2)
-                    start = c1.text_input(t['lbl_start'])
-                    end = c2.text_input(t['lbl_end'])
-                    category = st.text_input(t['lbl_vol_cat'])
-                    if st.form_submit_button(t['btn_add']):
-                        if role: add_volunteering(role, org, start, end, category); st.rerun()
+            from streamlit_sortables import sort_items
+            sorted_titles = sort_items(items_to_sort)
 
-        with col_prev:
-            st.markdown(f"### {t['preview_title']}")
-            pdf_bytes = generate_pdf(st.session_state['resume_data'], scale_factor, lang_code)
-            st.download_button(label=t['download_btn'], data=pdf_bytes, file_name=f"resume_{lang_code}.pdf", mime="application/pdf", type="primary")
-            
-            if Document:
-                # Agora o DOCX usa o scale_factor
-                docx_bytes = generate_docx(st.session_state['resume_data'], scale_factor, lang_code)
-                if docx_bytes:
-                    st.download_button(label="📥 Baixar / Download .docx (Word)", data=docx_bytes, file_name=f"resume_{lang_code}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-            else:
-                st.warning("⚠️ Biblioteca 'python-docx' não detectada. Instale com `pip install python-docx` para habilitar exportação Word.")
-
-            
-            # CSS Dinâmico (Preview)
-            st.markdown(f"""
-                <style>
-                .resume-preview {{ font-family: 'Times New Roman', Times, serif; background-color: white; padding: {2 * scale_factor}rem; border-radius: 5px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); color: #000; line-height: {1.3 * scale_factor}; }}
-                .resume-header {{ text-align: center; padding-bottom: {5 * scale_factor}px; margin-bottom: {5 * scale_factor}px; }}
-                .resume-name {{ color: #000; font-size: {2.5 * scale_factor}em; font-weight: bold; margin: 0; }}
-                .resume-stack {{ font-family: Arial, Helvetica, sans-serif; font-size: {1.1 * scale_factor}em; color: #000; margin-top: 5px; margin-bottom: 5px; }}
-                .resume-contact {{ font-size: {0.9 * scale_factor}em; color: #000; margin-top: 5px; }}
-                .resume-section-title {{ color: #000; font-size: {1.2 * scale_factor}em; font-weight: bold; margin-top: {12 * scale_factor}px; margin-bottom: {2 * scale_factor}px; text-transform: uppercase; text-align: center; }}
-                .resume-item {{ margin-bottom: {10 * scale_factor}px; }}
-                .resume-item-header {{ font-family: 'Times New Roman', serif; font-weight: bold; font-size: {1.05 * scale_factor}em; color: #000; margin-bottom: 2px; }}
-                .resume-item-sub {{ font-style: italic; color: #000; font-size: {0.95 * scale_factor}em; font-family: 'Times New Roman', serif; margin-bottom: 2px; }}
-                .resume-description {{ margin-top: 2px; font-size: {0.95 * scale_factor}em; text-align: justify; color: #000; }}
-                .resume-paragraph {{ margin-bottom: {3 * scale_factor}px; }}
-                .resume-achievements {{ margin-top: {8 * scale_factor}px; font-weight: bold; margin-bottom: {2 * scale_factor}px; color: #000; }}
-                </style>
-            """, unsafe_allow_html=True)
-
-            # HTML Preview (Resume) with Dynamic Order
-            data = st.session_state['resume_data']
-            stack_html = f'<div class="resume-stack">{data.get("stack", "")}</div>' if data.get("stack") else ""
-            html_content = f"""<div class="resume-preview"><div class="resume-header"><h1 class="resume-name">{data['contact']['name']}</h1>{stack_html}<div class="resume-contact">📞 {data['contact']['phone']} | ✉️ {data['contact']['email']}<br>📍 {data['contact']['location']} | 🔗 {data['contact']['linkedin']}</div></div>"""
-            
-            section_order = data.get('section_order', ["summary", "skills", "experience", "education", "certifications", "projects", "languages", "awards", "volunteering"])
-            
-            for section in section_order:
-                if section == 'summary' and data['summary']:
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['summary_header']}</div><div class="resume-description">"""
-                    for line in data['summary'].split('\n'):
-                        if line.strip(): html_content += f"<div class='resume-paragraph'>{line}</div>"
-                    
-                    if data.get('achievements'):
-                         ach_label = "FEITOS" if lang_code == 'pt' else "KEY ACHIEVEMENTS"
-                         html_content += f"<div class='resume-achievements'>{ach_label}</div>"
-                         for line in data.get('achievements').split('\n'):
-                             if line.strip(): html_content += f"<div class='resume-paragraph'>{line}</div>"
-                    html_content += "</div></div>"
-
-                elif section == 'skills' and data['skills']:
-                     html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['skills_header']}</div><div class="resume-description">{', '.join(data['skills'])}</div></div>"""
-                
-                elif section == 'experience' and data['experience']:
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['experience_header']}</div>"""
-                    for exp in data['experience']:
-                        html_content += f"""<div class="resume-item"><div class="resume-item-header">{exp['position']} - {exp['company']}</div><div class="resume-item-sub">{exp['start']} - {exp['end']}</div><div class="resume-description">"""
-                        for line in exp['description'].split('\n'):
-                            if line.strip(): html_content += f"<div class='resume-paragraph'>{line}</div>"
-                        html_content += "</div></div>"
-                    html_content += "</div>"
-
-                elif section == 'education' and data['education']:
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['education_header']}</div>"""
-                    for edu in data['education']:
-                        html_content += f"""<div class="resume-item"><div class="resume-item-header">{edu['degree']}</div><div class="resume-item-sub">{edu['institution']} - {t['lbl_year']}: {edu['year']}</div></div>"""
-                    html_content += "</div>"
-
-                elif section == 'certifications' and data['certifications']:
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['certifications_header']}</div><ul>"""
-                    for cert in data['certifications']: html_content += f"""<li><b>{cert['name']}</b> ({cert['issuer']}, {cert['year']})</li>"""
-                    html_content += "</ul></div>"
-                
-                elif section == 'projects' and data.get('projects'):
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t.get('projects_header', 'PROJETOS')}</div><ul>"""
-                    for proj in data['projects']:
-                        link_html = f" | <a href='{proj['link']}' target='_blank'>Link</a>" if proj.get('link') else ""
-                        html_content += f"""<li><b>{proj['title']}</b>{link_html}</li>"""
-                        if proj.get('description'):
-                            html_content += "<div class='resume-description'>"
-                            for line in proj['description'].split('\n'):
-                                if line.strip(): html_content += f"<div>{line}</div>"
-                            html_content += "</div>"
-                    html_content += "</ul></div>"
-
-                elif section == 'languages' and data.get('languages'):
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['languages_header']}</div><ul>"""
-                    for lang in data['languages']:
-                        html_content += f"""<li><b>{lang['name']}</b> - {t['lbl_conv']}: {lang['conv']} | {t['lbl_comp']}: {lang['comp']} | {t['lbl_writ']}: {lang['writ']}</li>"""
-                    html_content += "</ul></div>"
-
-                elif section == 'awards' and data.get('awards'):
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['awards_header']}</div><ul>"""
-                    for aw in data['awards']:
-                        html_content += f"""<li>{aw['title']} | {t['connector_offered_by']} {aw['issuer']} | {aw['date']}</li>"""
-                    html_content += "</ul></div>"
-
-                elif section == 'volunteering' and data.get('volunteering'):
-                    html_content += f"""<div class="resume-section"><div class="resume-section-title">{t['volunteering_header']}</div><ul>"""
-                    for vol in data['volunteering']:
-                        html_content += f"""<li><b>{vol['role']}</b> | {vol['org']} | {vol['start']} -> {vol['end']} | {vol['category']}</li>"""
-                    html_content += "</ul></div>"
-
-            html_content += "</div>"
-            st.markdown(html_content, unsafe_allow_html=True)
-
-    # === TAB 2: COVER LETTER BUILDER ===
-    with tab2:
-        col_cl_edit, col_cl_prev = st.columns([1, 1.2])
-        
-        with col_cl_edit:
-            st.header("Cover Letter Builder")
-            cl_data = st.session_state['cover_letter_data']
-            
-            with st.expander(t['cl_recipient_header'], expanded=True):
-                cl_data['recipient']['manager'] = st.text_input(t['lbl_manager'], cl_data['recipient']['manager'])
-                cl_data['recipient']['company'] = st.text_input(t['lbl_company_cl'], cl_data['recipient']['company'])
-                cl_data['recipient']['address'] = st.text_input(t['lbl_address'], cl_data['recipient']['address'])
-            
-            with st.expander(t['cl_hook_header'], expanded=True):
-                cl_data['opening']['greeting'] = st.text_input(t['lbl_greeting'], cl_data['opening']['greeting'])
-                cl_data['opening']['hook'] = st.text_area(t['lbl_hook'], cl_data['opening']['hook'], height=100)
-            
-            with st.expander(t['cl_narrative_header']):
-                cl_data['narrative'] = st.text_area(t['lbl_narrative'], cl_data['narrative'], height=150)
-            
-            with st.expander(t['cl_competencies_header']):
-                cl_data['competencies']['star1'] = st.text_area(t['lbl_star1'], cl_data['competencies']['star1'], height=100)
-                cl_data['competencies']['star2'] = st.text_area(t['lbl_star2'], cl_data['competencies']['star2'], height=100)
-            
-            with st.expander(t['cl_alignment_header']):
-                cl_data['alignment']['research'] = st.text_area(t['lbl_alignment'], cl_data['alignment']['research'], height=100)
-                cl_data['alignment']['differentiation'] = st.text_area(t['lbl_differentiation'], cl_data['alignment']['differentiation'], height=100)
-            
-            with st.expander(t['cl_closing_header']):
-                cl_data['closing'] = st.text_area(t['lbl_closing'], cl_data['closing'], height=80)
+            # Map back from Title -> Key
+            if sorted_titles:
+                # Create reverse map: Title -> Key
+                title_to_key = {v: k for k, v in key_map.items()}
+                new_order = []
+                for title in sorted_titles:
+                    if title in title_to_key:
+                        new_order.append(title_to_key[title])
 
-        with col_cl_prev:
-            st.markdown(f"### {t['preview_title']}")
-            cl_pdf_bytes = generate_cl_pdf(st.session_state['resume_data'], cl_data, scale_factor, lang_code)
-            st.download_button(label=t['download_cl_btn'], data=cl_pdf_bytes, file_name=f"cover_letter_{lang_code}.pdf", mime="application/pdf", type="primary")
-            
-            # HTML Preview (Cover Letter)
-            cl_html = f"""
-            <div class="resume-preview">
-                <div class="resume-header">
-                    <h1 class="resume-name">{data['contact']['name']}</h1>
-                    <div class="resume-contact">📞 {data['contact']['phone']} | ✉️ {data['contact']['email']}</div>
-                </div>
-                <div style="margin-top: 20px; font-family: Arial; line-height: 1.6;">
-                    <p><strong>{date.today().strftime('%B %d, %Y')}</strong></p>
-                    <p>{cl_data['recipient']['manager']}<br>{cl_data['recipient']['company']}<br>{cl_data['recipient']['address']}</p>
-                    <p>{cl_data['opening']['greeting']}:</p>
-                    <p>{cl_data['opening']['hook']}</p>
-                    <p>{cl_data['narrative']}</p>
-                    <p>{cl_data['competencies']['star1']}</p>
-                    <p>{cl_data['competencies']['star2']}</p>
-                    <p>{cl_data['alignment']['research']}</p>
-                    <ul>
-            """
-            for line in cl_data['alignment']['differentiation'].split('\n'):
-                if line.strip(): cl_html += f"<li>{line}</li>"
-            
-            cl_html += f"""
-                    </ul>
-                    <p>{cl_data['closing']}</p>
-                    <br>
-                    <p>Sincerely,</p>
-                    <br>
-                    <p><strong>{data['contact']['name']}</strong></p>
-                </div>
-            </div>
-            """
-            st.markdown(cl_html, unsafe_allow_html=True)
+                st.session_state['resume_data']['section_order'] = new_order
 
-    # === TAB 3: PROPOSAL BUILDER (ABNT) ===
-    with tab3:
-        st.header(t.get('prop_header', 'Proposta'))
-        p_data = st.session_state['proposal_data']
-
-        # 1. CAPA & FOLHA DE ROSTO
-        with st.expander("📘 Capa & Folha de Rosto (ABNT)", expanded=True):
-            c1, c2 = st.columns(2)
-            p_data['cover']['author'] = c1.text_input(t['lbl_author_prop'], p_data['cover']['author'])
-            p_data['cover']['institution'] = c2.text_input(t['lbl_institution'], p_data['cover']['institution'])
-            p_data['cover']['title'] = st.text_input(t['lbl_project_title'], p_data['cover']['title'])
-            p_data['cover']['subtitle'] = st.text_input(t['lbl_subtitle'], p_data['cover']['subtitle'])
-            c3, c4 = st.columns(2)
-            p_data['cover']['city'] = c3.text_input(t['lbl_city'], p_data['cover']['city'])
-            p_data['cover']['year'] = c4.text_input(t['lbl_year'], p_data['cover']['year'])
-            p_data['cover']['theme'] = st.text_area(t['lbl_theme'], p_data['cover']['theme'], height=70)
-
-        # 2. SEÇÕES DO PROJETO (1-9)
-        st.divider()
-        st.subheader("Estrutura do Projeto")
-        
-        sections_map = [
-            ("1", t['sec_1']), ("2", t['sec_2']), ("3", t['sec_3']), ("4", t['sec_4']),
-            ("5", t['sec_5']), ("6", t['sec_6']), ("7", t['sec_7']), ("8", t['sec_8']), ("9", t['sec_9'])
-        ]
 
-        for sec_id, sec_title in sections_map:
-            with st.expander(f"{sec_id}. {sec_title}"):
-                
-                # Lógica Especial: Cronograma (5)
-                if sec_id == "5":
-                    for i, item in enumerate(p_data['timeline']):
-                        c1, c2, c3 = st.columns([0.2, 0.7, 0.1])
-                        c1.text(item['date'])
-                        c2.text(item['milestone'])
-                        if c3.button("X", key=f"del_time_{i}"): remove_timeline_milestone(i); st.rerun()
-                    with st.form("add_timeline_form"):
-                        c1, c2 = st.columns([0.3, 0.7])
-                        d_date = c1.date_input(t.get('lbl_date', 'Data'))
-                        d_milestone = c2.text_input(t.get('lbl_milestone', 'Marco'))
-                        if st.form_submit_button(t['btn_add']):
-                            if d_milestone: add_timeline_milestone(d_date, d_milestone); st.rerun()
-
-                # Lógica Especial: Orçamento (6)
-                elif sec_id == "6":
-                    total = sum(item['amount'] for item in p_data['budget'])
-                    st.markdown(f"**Total: {total:,.2f}**")
-                    for i, item in enumerate(p_data['budget']):
-                        c1, c2, c3 = st.columns([0.6, 0.3, 0.1])
-                        c1.text(item['item'])
-                        c2.text(f"{item['amount']:.2f}")
-                        if c3.button("X", key=f"del_budget_{i}"): remove_budget_item(i); st.rerun()
-                    with st.form("add_budget_form"):
-                        c1, c2 = st.columns([0.7, 0.3])
-                        b_item = c1.text_input(t.get('lbl_budget_item', 'Item'))
-                        b_amount = c2.number_input(t.get('lbl_amount', 'Valor'), min_value=0.0, step=100.0)
-                        if st.form_submit_button(t['btn_add']):
-                            if b_item: add_budget_item(b_item, b_amount); st.rerun()
-
-                # Lógica Padrão: Texto com Subseções
-                else:
-                    subsections = p_data['text_sections'].get(sec_id, [])
-                    for i, sub in enumerate(subsections):
-                        st.markdown(f"**{sec_id}.{i+1} {sub['title']}**")
-                        st.text(sub['content'][:60] + "..." if len(sub['content']) > 60 else sub['content'])
-                        if st.button(f"{t['btn_remove']} {i}", key=f"del_sub_{sec_id}_{i}"): remove_text_subsection(sec_id, i); st.rerun()
-                    
-                    with st.form(f"add_sub_{sec_id}"):
-                        s_title = st.text_input(t['lbl_sub_title'])
-                        s_content = st.text_area(t['lbl_sub_content'], height=100)
-                        if st.form_submit_button(t['btn_add']):
-                            if s_title and s_content: add_text_subsection(sec_id, s_title, s_content); st.rerun()
+        with st.expander(t['bundle_header']):
+            formats = st.multiselect(t['bundle_formats'], list(BUNDLE_FORMATS), default=BUNDLE_DEFAULT_FORMATS, format_func=BUNDLE_FORMATS.get, key='bundle_formats')
+            langs = st.multiselect(t['bundle_langs'], list(TRANSLATIONS), default=list(TRANSLATIONS), format_func=lambda code: {'pt': "Português", 'en': "English"}[code], key='bundle_langs')
+            documents = {kind: st.session_state[kind] for kind in ('resume_data', 'cover_letter_data', 'proposal_data', 'report_data')}
+            fit_pages = st.session_state.get('fit_pages', 1) if st.session_state.get('fit_enabled') else None
+            st.download_button(t['bundle_btn'], data=deferred_export_live(render_bundle, documents, formats, langs, scale_factor, fit_pages), file_name="documentos.zip", mime="application/zip", disabled=not (formats and langs), on_click="ignore")
 
-        # Download
-        st.divider()
-        prop_pdf_bytes = generate_proposal_pdf(p_data, t)
-        st.download_button(label=t.get('download_prop_btn', 'Baixar PDF'), data=prop_pdf_bytes, file_name=f"projeto_{lang_code}.pdf", mime="application/pdf", type="primary")
-
-    # === TAB 4: REPORT BUILDER (ABNT) ===
-    with tab4:
-        st.header(t.get('rep_header', 'Relatório Técnico'))
-        r_data = st.session_state['report_data']
-
-        # 1. CAPA & FOLHA DE ROSTO
-        with st.expander("📘 Capa & Folha de Rosto (ABNT)", expanded=True):
-            c1, c2 = st.columns(2)
-            r_data['cover']['author'] = c1.text_input(t['lbl_author_prop'], r_data['cover']['author'], key="rep_auth")
-            r_data['cover']['institution'] = c2.text_input(t['lbl_institution'], r_data['cover']['institution'], key="rep_inst")
-            r_data['cover']['title'] = st.text_input(t['lbl_project_title'], r_data['cover']['title'], key="rep_title")
-            r_data['cover']['subtitle'] = st.text_input(t['lbl_subtitle'], r_data['cover']['subtitle'], key="rep_sub")
-            c3, c4 = st.columns(2)
-            r_data['cover']['city'] = c3.text_input(t['lbl_city'], r_data['cover']['city'], key="rep_city")
-            r_data['cover']['year'] = c4.text_input(t['lbl_year'], r_data['cover']['year'], key="rep_year")
-            r_data['cover']['theme'] = st.text_area(t['lbl_theme'], r_data['cover']['theme'], height=70, key="rep_theme")
-
-        # 2. SEÇÕES DO RELATÓRIO (1-7)
         st.divider()
-        st.subheader("Conteúdo do Relatório")
-        
-        rep_sections = [
-            ("1", t['rep_sec_1']), ("2", t['rep_sec_2']), ("3", t['rep_sec_3']),
-            ("4", t['rep_sec_4']), ("5", t['rep_sec_5']), ("6", t['rep_sec_6']),
-            ("7", t['rep_sec_7'])
-        ]
-
-        for sec_id, sec_title in rep_sections:
-            with st.expander(f"{sec_id}. {sec_title}"):
-                subsections = r_data['text_sections'].get(sec_id, [])
-                for i, sub in enumerate(subsections):
-                    st.markdown(f"**{sec_id}.{i+1} {sub['title']}**")
-                    st.text(sub['content'][:60] + "..." if len(sub['content']) > 60 else sub['content'])
-                    if st.button(f"{t['btn_remove']} {i}", key=f"del_rep_sub_{sec_id}_{i}"): remove_report_subsection(sec_id, i); st.rerun()
-                
-                with st.form(f"add_rep_sub_{sec_id}"):
-                    s_title = st.text_input(t['lbl_sub_title'])
-                    s_content = st.text_area(t['lbl_sub_content'], height=100)
-                    if st.form_submit_button(t['btn_add']):
-                        if s_title and s_content: add_report_subsection(sec_id, s_title, s_content); st.rerun()
-
-        # 3. ANEXOS (IMAGENS)
-        st.divider()
-        with st.expander(f"8. {t['rep_sec_8']} (Imagens)"):
-            for i, annex in enumerate(r_data['annexes']):
-                st.image(annex['image'], caption=f"Fig {i+1}: {annex['caption']}", width=150)
-                if st.button(f"{t['btn_remove']} {i}", key=f"del_annex_{i}"): remove_report_annex(i); st.rerun()
-            
-            with st.form("add_annex_form"):
-                uploaded_file = st.file_uploader(t['lbl_img_upload'], type=['png', 'jpg', 'jpeg'])
-                caption = st.text_input(t['lbl_img_caption'])
-                if st.form_submit_button(t['btn_add']):
-                    if uploaded_file and caption:
-                        add_report_annex(uploaded_file.getvalue(), caption)
-                        st.rerun()
-
-        # Download
-        st.divider()
-        rep_pdf_bytes = generate_report_pdf(r_data, t)
-        st.download_button(label=t.get('download_rep_btn', 'Baixar Relatório PDF'), data=rep_pdf_bytes, file_name=f"relatorio_{lang_code}.pdf", mime="application/pdf", type="primary")
+        st.toggle("⏱️ Profiling", key='profiling', help="Times generators, previews and reruns of this session (APP_PROFILE=1 turns it on for every session).")
+        audit_ok, audit_details = run_system_audit()
+        if audit_ok: st.success("System Status: ✅ Operational")
+        else: st.error(f"System Error: { {check: ok for check, ok in audit_details.items() if check != 'latency_ms'} }")
+        if 'doc_id' in st.session_state: st.caption(f"💾 Autosave: `{st.session_state['doc_id'][:8]}`")
 
+    st.title(t['app_title'])
     
-    # === TAB 5: ATS SIMULATOR ===
-    with tab5:
-        st.header(t['ats_header'])
-        st.markdown(t['ats_desc'])
-        
-        if PdfReader is None:
-            st.error(t['ats_error_lib'])
-        else:
-            uploaded_pdf = st.file_uploader(t['ats_upload'], type=["pdf"])
-            
-            if uploaded_pdf is not None:
-                if st.button("🔍 Analisar PDF"):
-                    with st.spinner("Processando como um robô (ATS)..."):
-                        # 1. Extração
-                        raw_text = extract_text_from_pdf(uploaded_pdf)
-                        
-                        # 2. Análise
-                        score, parsed_data, sections_found = analyze_ats_compatibility(raw_text)
-                        
-                        # 3. Atualizar Estado
-                        st.session_state['ats_data']['score'] = score
-                        st.session_state['ats_data']['raw_text'] = raw_text
-                        st.session_state['ats_data']['sections_found'] = sections_found
-                        st.session_state['ats_data']['parsed_content'] = parsed_data
-            
-            # Dashboard de Resultados
-            if st.session_state['ats_data']['raw_text']:
-                st.divider()
-                
-                # Métricas de Topo
-                c1, c2, c3 = st.columns(3)
-                final_score = st.session_state['ats_data']['score']
-                score_color = "green" if final_score > 80 else "orange" if final_score > 50 else "red"
-                
-                c1.metric(label=t['ats_score'], value=f"{final_score}/100")
-                c2.metric(label=t['ats_text_len'], value=len(st.session_state['ats_data']['raw_text']))
-                c3.metric(label=t['ats_sec_found'], value=f"{len(st.session_state['ats_data']['sections_found'])}/7")
-                
-                # Visualização de Dados
-                col_left, col_right = st.columns(2)
-                
-                with col_left:
-                    st.subheader(t['ats_parsed_data'])
-                    st.json(st.session_state['ats_data']['parsed_content'])
-                    
-                with col_right:
-                    st.subheader(t['ats_raw_text'])
-                    st.text_area("Raw Output", st.session_state['ats_data']['raw_text'], height=400, disabled=True)
+    # --- NAVEGAÇÃO: RESUME vs COVER LETTER vs PROPOSAL vs REPORT vs ATS SIMULATOR ---
+    # Diferente de st.tabs, apenas o builder selecionado é executado a cada rerun
+    tab_labels = {
+        'resume': t['tab_resume'], 'cover': t['tab_cover'], 'proposal': t.get('tab_proposal', 'Proposta'),
+        'report': t.get('tab_report', 'Relatório'), 'ats': t.get('tab_ats', 'Simulador ATS')
+    }
+    active_tab = st.radio("Navigation", list(tab_labels.keys()), format_func=lambda k: tab_labels[k], horizontal=True, key='active_tab', label_visibility="collapsed")
+    TAB_BUILDERS[active_tab](t, lang_code, scale_factor)
+    return active_tab
+
+def main():
+    open_document_session()
+    profiler = get_profiler()
+    if 'profiling' not in st.session_state: st.session_state['profiling'] = profiler.enabled
+    try:
+        with profiler.span('rerun') as span:
+            span['tab'] = render_app()
+    finally:
+        # Também em st.rerun() (exceção de controle), para não perder a alteração que o disparou
+        autosave_documents()
+    start_warm_up()
+    profiling_panel(profiler)
 
 if __name__ == "__main__":
     main()
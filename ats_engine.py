@@ -0,0 +1,391 @@
+"""Motor do Simulador ATS: extração de texto de PDF, detecção de seções e pontuação.
+
+Não depende do Streamlit, então pode ser importado pela interface (app.py), pela CLI
+(cli.py) e pelos workers do pool de processos do modo em lote.
+"""
+import csv
+import functools
+import hashlib
+import importlib.util
+import inspect
+import io
+import json
+import mmap
+import os
+import re
+import signal
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from caching import RenderCache, DiskCache
+from headless import spawn_context
+
+# PyPDF2/pypdf custam ~100 ms de import: só o nome é resolvido aqui, o módulo é
+# importado na primeira extração (quem só abre as outras abas não paga esse custo)
+PDF_BACKEND = next((name for name in ('PyPDF2', 'pypdf') if importlib.util.find_spec(name)), None)
+
+@functools.lru_cache(maxsize=None)
+def pdf_reader_class():
+    return importlib.import_module(PDF_BACKEND).PdfReader if PDF_BACKEND else None
+
+# --- EXTRAÇÃO & ANÁLISE ---
+# Limites de extração: uploads grandes/adversariais não podem estourar a memória do worker
+ATS_MAX_PAGES = 50
+ATS_MAX_CHARS = 200_000
+
+def iter_pdf_text(source, max_pages=ATS_MAX_PAGES, max_chars=ATS_MAX_CHARS):
+    # Gera o texto página a página. `source` pode ser um caminho (lido via mmap,
+    # sem bufferizar o arquivo inteiro) ou um arquivo em memória (ex: upload do Streamlit).
+    if PDF_BACKEND is None: return
+    if isinstance(source, (str, os.PathLike)):
+        # Arquivo vazio não pode ser mapeado: vai pelo caminho em memória, que dá o mesmo erro de PDF vazio
+        if os.path.getsize(source) == 0: source = io.BytesIO(b"")
+        else:
+            with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter_pdf_text(mm, max_pages, max_chars)
+            return
+    reader = pdf_reader_class()(source)
+    remaining = max_chars
+    for page_no, page in enumerate(reader.pages):
+        if page_no >= max_pages or remaining <= 0: break
+        page_text = ((page.extract_text() or "") + "\n")[:remaining]
+        remaining -= len(page_text)
+        yield page_text
+
+def extract_text_from_pdf(uploaded_file, max_pages=ATS_MAX_PAGES, max_chars=ATS_MAX_CHARS):
+    if PDF_BACKEND is None: return None
+    try:
+        return "".join(iter_pdf_text(uploaded_file, max_pages, max_chars))
+    except Exception as e:
+        return f"Error: {e}"
+
+# Palavras-chave de seção por idioma. Um idioma novo é só mais uma entrada aqui:
+# todas as palavras entram no mesmo autômato, sem passadas extras sobre o texto.
+ATS_SECTION_KEYWORDS = {
+    'en': {
+        'contact': ['email', 'e-mail', 'phone', 'linkedin', 'github', 'contact'],
+        'experience': ['experience', 'work history', 'employment'],
+        'education': ['education', 'academic', 'degree'],
+        'skills': ['skills', 'technologies'],
+        'summary': ['summary', 'profile', 'about'],
+        'languages': ['languages'],
+        'certifications': ['certifications', 'courses'],
+    },
+    'pt': {
+        'contact': ['telefone', 'celular', 'contato'],
+        'experience': ['experiência', 'histórico profissional'],
+        'education': ['educação', 'formação', 'acadêmica'],
+        'skills': ['habilidades', 'competências', 'tecnologias', 'ferramentas'],
+        'summary': ['resumo', 'perfil', 'sobre'],
+        'languages': ['idiomas', 'linguas'],
+        'certifications': ['certificações', 'cursos'],
+    },
+}
+
+def _trie_pattern(words):
+    # Regex em forma de trie: em cada posição o motor segue um único caminho de prefixos,
+    # então o custo por caractere é limitado pelo tamanho da maior palavra-chave
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word: node = node.setdefault(ch, {})
+        node[''] = {}
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches: return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+    return emit(trie)
+
+def _lower_keep_offsets(text):
+    lower = text.lower()
+    if len(lower) == len(text): return lower
+    # Raros caracteres que mudam de tamanho ao minusculizar (ex: 'İ') ficam como estão
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+class SectionMatcher:
+    """Encontra todas as palavras-chave de seção (com offsets) numa única varredura do texto."""
+    def __init__(self, keywords_by_lang):
+        self.keyword_section = {}
+        for sections in keywords_by_lang.values():
+            for sec_name, words in sections.items():
+                for word in words:
+                    if self.keyword_section.setdefault(word.lower(), sec_name) != sec_name:
+                        raise ValueError(f"Keyword '{word}' assigned to more than one section")
+        self.sections = list(dict.fromkeys(sec_name for sections in keywords_by_lang.values() for sec_name in sections))
+        self.pattern = re.compile(_trie_pattern(self.keyword_section))
+
+    def finditer(self, text, offset=0):
+        # Yields (seção, palavra-chave, início, fim). Retoma em start + 1 para também achar
+        # palavras que se sobrepõem, como faziam as buscas independentes por seção.
+        lower = _lower_keep_offsets(text)
+        search = self.pattern.search
+        match = search(lower)
+        while match:
+            keyword = match.group()
+            yield self.keyword_section[keyword], keyword, match.start() + offset, match.end() + offset
+            match = search(lower, match.start() + 1)
+
+    def header_section(self, line):
+        # Seção do cabeçalho em `line`; '' para cabeçalho sem palavra-chave (ex: PROJETOS); None se não é cabeçalho.
+        # Cabeçalho = linha curta só de palavras (sem "Rótulo: valor", datas ou e-mails), com até
+        # ATS_HEADER_MAX_WORDS palavras ou toda em maiúsculas
+        title = line.strip(_HEADER_TRIM)
+        if not title or len(title) > ATS_HEADER_MAX_CHARS or not _HEADER_TEXT.fullmatch(title): return None
+        words = len(title.split())
+        match = self.pattern.search(_lower_keep_offsets(title))
+        if match and (words <= ATS_HEADER_MAX_WORDS or title.isupper()): return self.keyword_section[match.group()]
+        if title.isupper() and words <= ATS_HEADER_MAX_WORDS + 1 and len(title) >= 4: return ''
+        return None
+
+ATS_MATCHER = SectionMatcher(ATS_SECTION_KEYWORDS)
+_ATS_OVERLAP = 32 # Cauda mantida entre chunks para achar palavras-chave na fronteira das páginas
+
+# --- SEGMENTAÇÃO EM SEÇÕES (UMA PASSADA, SEM MODELO DE NLP) ---
+ATS_HEADER_MAX_CHARS = 40
+ATS_HEADER_MAX_WORDS = 3
+_HEADER_TRIM = " \t\r•·*#:|-–—.)(0123456789"
+_HEADER_TEXT = re.compile(r"[^\W\d_]+(?:[\s&/,-]+[^\W\d_]+)*")
+
+def _trimmed(text, start, end):
+    # Offsets do trecho sem os espaços/quebras das pontas
+    while start < end and text[start].isspace(): start += 1
+    while end > start and text[end - 1].isspace(): end -= 1
+    return start, end
+
+def segment_sections(text, matcher=ATS_MATCHER):
+    """Divide o texto em seções numa única passada pelas linhas: ``[(seção, cabeçalho, início, fim)]``.
+
+    ``início``/``fim`` delimitam o conteúdo entre a linha de cabeçalho e o próximo cabeçalho
+    (sem os espaços das pontas). ``seção`` é '' para cabeçalhos sem palavra-chave conhecida, que
+    só encerram a seção anterior; cada seção conhecida é aberta uma única vez (um segundo
+    "Experience" no meio do texto é conteúdo). Custo linear no tamanho do texto.
+    """
+    spans = []
+    opened = set()
+    current = None # (seção, cabeçalho, início do conteúdo)
+    pos, length = 0, len(text)
+    while pos < length:
+        line_end = text.find('\n', pos)
+        if line_end == -1: line_end = length
+        # Linhas longas nem passam pelo teste de cabeçalho
+        section = matcher.header_section(text[pos:line_end]) if line_end - pos <= 2 * ATS_HEADER_MAX_CHARS else None
+        if section is not None and section not in opened:
+            if current: spans.append((current[0], current[1], *_trimmed(text, current[2], pos)))
+            if section: opened.add(section)
+            current = (section, text[pos:line_end].strip(), line_end + 1)
+        pos = line_end + 1
+    if current: spans.append((current[0], current[1], *_trimmed(text, min(current[2], length), length)))
+    return [span for span in spans if span[0]]
+
+def analyze_ats_compatibility(text):
+    # Aceita o texto completo ou um iterável de chunks (ex: iter_pdf_text), consumido em streaming
+    chunks = [text] if isinstance(text, str) or text is None else text
+    found = {} # seção -> offset da primeira palavra-chave
+    parts = []
+    length = 0
+    leading_ws = trailing_ws = 0
+    seen_content = False
+    double_space = False
+    tail = ""
+    for chunk in chunks:
+        if not chunk: continue
+        parts.append(chunk)
+        length += len(chunk)
+        # Controle de espaços nas pontas para reproduzir len(text.strip())
+        stripped = chunk.strip()
+        if not seen_content:
+            if stripped:
+                seen_content = True
+                leading_ws += len(chunk) - len(chunk.lstrip())
+            else: leading_ws += len(chunk)
+        if stripped: trailing_ws = len(chunk) - len(chunk.rstrip())
+        elif seen_content: trailing_ws += len(chunk)
+
+        # Varredura única do chunk + cauda do anterior; para quando todas as seções já apareceram
+        window = tail + chunk
+        if len(found) < len(ATS_MATCHER.sections):
+            for sec_name, _, start, _ in ATS_MATCHER.finditer(window, length - len(window)): found.setdefault(sec_name, start)
+        if "  " in window: double_space = True
+        tail = window[-_ATS_OVERLAP:]
+
+    if length - leading_ws - trailing_ws < 50:
+        return 0, {}, []
+
+    # Conteúdo de cada seção: do cabeçalho ao próximo; sem cabeçalho, a linha da primeira palavra-chave
+    text = "".join(parts)
+    segments = {sec_name: (header, start, end) for sec_name, header, start, end in segment_sections(text)}
+    score = 100
+    sections = {}
+    found_sections = []
+    for sec_name in ATS_MATCHER.sections:
+        if sec_name in found:
+            found_sections.append(sec_name)
+            if sec_name in segments: header, start, end = segments[sec_name]
+            else:
+                header, start = None, text.rfind('\n', 0, found[sec_name]) + 1
+                end = text.find('\n', start)
+                start, end = _trimmed(text, start, len(text) if end == -1 else end)
+            sections[sec_name] = {'header': header, 'start': start, 'end': end, 'text': text[start:end]}
+        else:
+            sections[sec_name] = "NOT FOUND"
+            score -= 10 # Penalidade por seção faltante
+            
+    # 3. Penalidades de Formatação
+    # Excesso de espaços em branco (simboliza formatação quebrada)
+    if double_space: 
+        score -= 5
+    # Texto muito curto para um CV
+    if length < 500:
+        score -= 20
+        
+    # Limites
+    return max(0, score), sections, found_sections
+
+def analyze_pdf(source, max_pages=ATS_MAX_PAGES, max_chars=ATS_MAX_CHARS):
+    # Extração e análise numa única passada: o scorer consome as páginas à medida que são extraídas
+    pages = []
+    def stream():
+        for page_text in iter_pdf_text(source, max_pages, max_chars):
+            pages.append(page_text)
+            yield page_text
+    try:
+        score, parsed_data, sections_found = analyze_ats_compatibility(stream())
+    except Exception as e:
+        raw_text = f"Error: {e}"
+        return (raw_text, *analyze_ats_compatibility(raw_text))
+    return "".join(pages), score, parsed_data, sections_found
+
+# --- MODO EM LOTE (POOL DE PROCESSOS) ---
+ATS_FILE_TIMEOUT = 30 # Segundos por arquivo
+ATS_MAX_FILE_BYTES = 25 * 1024 * 1024 # Membros de zip maiores que isso são recusados sem descompactar
+ATS_RESULT_FIELDS = ['file', 'status', 'score', 'sections_found', 'chars', 'pages', 'extract_s', 'error']
+
+class ExtractionTimeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+def _empty_result(name, status='ok', error=''):
+    return {'file': name, 'status': status, 'score': None, 'sections_found': [], 'chars': 0, 'pages': 0, 'extract_s': 0.0, 'error': error}
+
+def score_file(name, source, timeout=ATS_FILE_TIMEOUT, max_pages=ATS_MAX_PAGES, max_chars=ATS_MAX_CHARS):
+    # Executado no worker. `source` é um caminho (lido via mmap) ou os bytes de um membro de zip.
+    result = _empty_result(name)
+    if isinstance(source, (bytes, bytearray)): source = io.BytesIO(source)
+    # Timeout via SIGALRM (Unix): workers do pool executam as tarefas na thread principal
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    started = time.perf_counter()
+    pages = []
+    def stream():
+        for page_text in iter_pdf_text(source, max_pages, max_chars):
+            pages.append(len(page_text))
+            yield page_text
+    try:
+        score, _, sections_found = analyze_ats_compatibility(stream())
+        result.update(score=score, sections_found=sections_found)
+    except ExtractionTimeout:
+        result.update(status='timeout', error=f"exceeded {timeout}s")
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    result.update(chars=sum(pages), pages=len(pages), extract_s=round(time.perf_counter() - started, 4))
+    return result
+
+def iter_batch_sources(source):
+    # Yields (nome, caminho-ou-bytes) para um diretório (recursivo) ou um arquivo .zip de PDFs.
+    # Lido de forma preguiçosa: só os arquivos em processamento ficam em memória.
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.lower().endswith('.pdf'):
+                    path = os.path.join(root, file_name)
+                    yield os.path.relpath(path, source), path
+        return
+    with zipfile.ZipFile(source) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith('.pdf'): continue
+            if info.file_size > ATS_MAX_FILE_BYTES:
+                yield info.filename, None
+                continue
+            yield info.filename, zf.read(info)
+
+def score_batch(sources, workers=None, timeout=ATS_FILE_TIMEOUT, max_pages=ATS_MAX_PAGES, max_chars=ATS_MAX_CHARS, mp_context=None):
+    # Pontua (nome, fonte) num pool de processos e devolve os resultados à medida que terminam.
+    # A janela de submissões é limitada, então a memória não cresce com o tamanho do lote.
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context or spawn_context()) as pool:
+        pending = set()
+        for name, source in sources:
+            if source is None:
+                yield _empty_result(name, 'skipped', f"larger than {ATS_MAX_FILE_BYTES} bytes")
+                continue
+            pending.add(pool.submit(score_file, name, source, timeout, max_pages, max_chars))
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished: yield future.result()
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished: yield future.result()
+
+def result_row(result):
+    # Linha plana para CSV (seções separadas por ';')
+    return {**result, 'sections_found': ';'.join(result['sections_found'])}
+
+def results_to_csv(results):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ATS_RESULT_FIELDS)
+    writer.writeheader()
+    for result in results: writer.writerow(result_row(result))
+    return buffer.getvalue()
+
+# --- CACHE DE RESULTADOS (SHA-256 DO PDF + VERSÃO DO SCORER) ---
+ATS_SCORER_VERSION = "1" # Incremente para invalidar o cache manualmente
+ATS_CACHE_MAX_BYTES = 32 * 1024 * 1024
+ATS_DISK_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+@functools.lru_cache(maxsize=None)
+def scorer_fingerprint():
+    # Muda sozinho quando as regras mudam: palavras-chave, limites de extração ou o código
+    # das funções de extração/pontuação entram no hash
+    parts = [ATS_SCORER_VERSION, ATS_SECTION_KEYWORDS, ATS_MAX_PAGES, ATS_MAX_CHARS]
+    for fn in (iter_pdf_text, analyze_ats_compatibility, segment_sections, SectionMatcher.header_section, SectionMatcher.finditer, _trie_pattern):
+        try: parts.append(inspect.getsource(fn))
+        except (OSError, TypeError): parts.append(fn.__qualname__)
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _analysis_size(result):
+    # O texto das seções repete o texto extraído
+    return 2 * len(result[0]) + 1024
+
+class AtsResultCache:
+    """Resultados de analyze_pdf por conteúdo do arquivo: memória (LRU) + disco opcional."""
+    def __init__(self, max_bytes=ATS_CACHE_MAX_BYTES, disk_dir=None, disk_max_bytes=ATS_DISK_CACHE_MAX_BYTES):
+        self.memory = RenderCache(max_bytes=max_bytes, sizeof=_analysis_size)
+        self.disk = DiskCache(disk_dir, disk_max_bytes) if disk_dir else None
+
+    def key(self, pdf_bytes):
+        return f"{hashlib.sha256(pdf_bytes).hexdigest()}-{scorer_fingerprint()}"
+
+    def analyze(self, pdf_bytes):
+        # Mesmo retorno de analyze_pdf: (raw_text, score, parsed_data, sections_found)
+        key = self.key(pdf_bytes)
+        def compute():
+            if self.disk:
+                stored = self.disk.get(key)
+                if stored is not None: return tuple(stored)
+            result = analyze_pdf(io.BytesIO(pdf_bytes))
+            if self.disk: self.disk.put(key, list(result))
+            return result
+        return self.memory.get_or_render(key, compute)
+
@@ -0,0 +1,285 @@
+"""Benchmarks reprodutíveis dos geradores de documentos e do Simulador ATS.
+
+Uso:
+    python bench.py                          # suíte completa, imprime a tabela
+    python bench.py --quick                  # pula os casos extremos
+    python bench.py --save baseline.json     # grava o baseline
+    python bench.py --baseline baseline.json # compara e sinaliza regressões (exit 1)
+    python bench.py --startup                # cold start: import por dependência e primeiro render
+
+Cada caso mede tempo de parede (mediana de --repeat execuções), pico de memória
+(tracemalloc, numa execução separada) e tamanho da saída em bytes. Os dados são
+sintéticos e determinísticos (seed fixa), então execuções na mesma máquina são comparáveis.
+Os casos de --startup rodam cada um num interpretador novo (sem memória/saída medidas).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from headless import silence_bare_mode_warnings
+silence_bare_mode_warnings()
+
+import app
+import annex_images
+import ats_engine
+import document_ir
+import docx_writer
+import preview_html
+
+WORDS = ("developed scalable services team leadership python data pipeline cloud architecture "
+         "improved latency reduced costs delivered platform migration stakeholders agile mentoring").split()
+
+# --- GERADORES DE DADOS SINTÉTICOS ---
+def _sentence(rng, n_words=18):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+def _paragraphs(rng, n_paragraphs, n_sentences=3):
+    return "\n".join(" ".join(_sentence(rng) for _ in range(n_sentences)) for _ in range(n_paragraphs))
+
+def make_resume(n_experience, desc_paragraphs=2, seed=0):
+    rng = random.Random(seed)
+    return {
+        "contact": {"name": "Maria Silva", "email": "maria@example.com", "phone": "+55 11 99999-9999", "linkedin": "linkedin.com/in/maria", "location": "São Paulo, Brasil"},
+        "summary": _paragraphs(rng, 2),
+        "achievements": _paragraphs(rng, 2, 1),
+        "stack": "Senior Python Engineer",
+        "skills": [rng.choice(WORDS).title() for _ in range(20)],
+        "experience": [{"company": f"Company {i}", "position": "Software Engineer", "start": "2018", "end": "2020", "description": _paragraphs(rng, desc_paragraphs)} for i in range(n_experience)],
+        "education": [{"institution": "USP", "degree": "BSc Computer Science", "year": "2015"}],
+        "certifications": [{"name": f"Cert {i}", "issuer": "Issuer", "year": "2021"} for i in range(5)],
+        "projects": [{"title": f"Project {i}", "link": f"github.com/maria/p{i}", "description": _paragraphs(rng, 1)} for i in range(3)],
+        "languages": [{"name": "English", "conv": "Fluent", "comp": "Fluent", "writ": "Advanced"}],
+        "awards": [{"title": "Award", "issuer": "Org", "date": "2022"}],
+        "volunteering": [{"role": "Mentor", "org": "NGO", "start": "2019", "end": "2020", "category": "Social"}],
+        "section_order": ["summary", "skills", "experience", "education", "certifications", "projects", "languages", "awards", "volunteering"],
+    }
+
+def make_cover_letter(seed=0):
+    rng = random.Random(seed)
+    return {
+        "recipient": {"manager": "João Souza", "company": "ACME", "address": "Av. Paulista, 1000"},
+        "opening": {"greeting": "Prezado João", "hook": _sentence(rng)},
+        "narrative": _paragraphs(rng, 3),
+        "competencies": {"star1": _paragraphs(rng, 1), "star2": _paragraphs(rng, 1)},
+        "alignment": {"research": _paragraphs(rng, 1), "differentiation": _paragraphs(rng, 4, 1)},
+        "closing": _sentence(rng),
+    }
+
+def _cover(seed):
+    rng = random.Random(seed)
+    return {"institution": "Universidade", "author": "Maria Silva", "title": "Projeto de Teste", "subtitle": _sentence(rng, 6), "city": "São Paulo", "year": "2026", "theme": _sentence(rng)}
+
+def make_image(width=1600, height=1200, seed=0):
+    # PNG com gradiente + ruído leve: tamanho realista, mas determinístico
+    from PIL import Image as PILImage
+    rng = random.Random(seed)
+    img = PILImage.linear_gradient('L').resize((width, height)).convert('RGB')
+    pixels = img.load()
+    for _ in range(2000): pixels[rng.randrange(width), rng.randrange(height)] = (rng.randrange(256), 0, 0)
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def make_photo(width=4000, height=3000, seed=0):
+    # "Foto de celular": JPEG de 12 MP com textura (não comprime como um diagrama)
+    from PIL import Image as PILImage
+    rng = random.Random(seed)
+    noise = PILImage.frombytes('RGB', (width // 4, height // 4), rng.randbytes(width * height * 3 // 16)).resize((width, height))
+    img = PILImage.blend(noise, PILImage.linear_gradient('L').resize((width, height)).convert('RGB'), 0.7)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+def make_report(n_images, seed=0, photo=False, normalized=False, distinct=False):
+    # normalized=True simula anexos enviados pela interface (já reamostrados no upload);
+    # distinct=True gera uma foto diferente (2000x1500) por figura em vez de repetir a mesma
+    rng = random.Random(seed)
+    def annex(i):
+        image = make_photo(2000, 1500, seed=seed + i) if distinct else (make_photo(seed=seed) if photo else make_image(seed=seed))
+        return annex_images.normalize_annex_image(image) if normalized else {"image": image}
+    shared = annex(0) if n_images and not distinct else None
+    return {
+        "cover": _cover(seed),
+        "text_sections": {str(i): [{"title": f"Subseção {j}", "content": _paragraphs(rng, 3)} for j in range(3)] for i in range(1, 8)},
+        "annexes": [{**(annex(i) if distinct else shared), "caption": f"Figura sintética {i}"} for i in range(n_images)],
+    }
+
+def make_proposal(n_budget, seed=0):
+    rng = random.Random(seed)
+    return {
+        "cover": _cover(seed),
+        "text_sections": {sec_id: [{"title": f"Subseção {j}", "content": _paragraphs(rng, 2)} for j in range(2)] for sec_id in ["1", "2", "3", "4", "7", "8", "9"]},
+        "timeline": [{"date": f"2026-{(i % 12) + 1:02d}-01", "milestone": _sentence(rng, 6)} for i in range(24)],
+        "budget": [{"item": _sentence(rng, 5), "amount": round(rng.uniform(100, 10000), 2)} for i in range(n_budget)],
+    }
+
+def make_text_pdf(n_pages, seed=0):
+    # PDF "de currículo" com N páginas de texto corrido, para o caminho de extração do ATS
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    rng = random.Random(seed)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    headers = ["EXPERIENCE", "EDUCATION", "SKILLS", "SUMMARY", "LANGUAGES", "CERTIFICATIONS", "Contact: email"]
+    for page in range(n_pages):
+        c.setFont('Times-Roman', 10)
+        y = 750
+        c.drawString(50, y, headers[page % len(headers)])
+        for _ in range(60):
+            y -= 12
+            c.drawString(50, y, _sentence(rng, 14))
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+# --- CASOS ---
+def build_cases(quick=False):
+    t = app.TRANSLATIONS['pt']
+    cover_letter = make_cover_letter()
+    cases = []
+    for n in [1, 10, 100] + ([] if quick else [1000]):
+        resume = make_resume(n)
+        cases.append((f"generate_pdf/exp={n}", lambda resume=resume: app.generate_pdf(resume, 1.0, 'pt')))
+        cases.append((f"generate_docx/exp={n}", lambda resume=resume: app.generate_docx(resume, 1.0, 'pt')))
+    for n in [10, 100] + ([] if quick else [1000]):
+        resume, renderer, ir = make_resume(n), preview_html.PreviewRenderer(), document_ir.DocumentIR()
+        cases.append((f"document_ir/exp={n}", lambda resume=resume: document_ir.DocumentIR().resume(resume, t, 'pt')))
+        cases.append((f"preview_resume/exp={n}", lambda resume=resume: preview_html.PreviewRenderer().resume(document_ir.DocumentIR().resume(resume, t, 'pt'))))
+        cases.append((f"preview_resume/exp={n},memoized", lambda resume=resume, renderer=renderer, ir=ir: renderer.resume(ir.resume(resume, t, 'pt'))))
+    for n in [1, 3] + ([] if quick else [10]):
+        resume = make_resume(n, desc_paragraphs=1)
+        cases.append((f"fit_resume_scale/exp={n}", lambda resume=resume: app.fit_resume_scale(resume, 'pt', 2)))
+        cases.append((f"resume_layout/exp={n}", lambda resume=resume: app.resume_layout(resume, 1.0, 'pt')))
+    long_resume = make_resume(10, desc_paragraphs=20)
+    cases.append(("generate_pdf/long_descriptions", lambda: app.generate_pdf(long_resume, 1.0, 'pt')))
+    cases.append(("generate_docx/long_descriptions", lambda: app.generate_docx(long_resume, 1.0, 'pt')))
+    cases.append(("generate_cl_pdf", lambda: app.generate_cl_pdf(make_resume(1), cover_letter, 1.0, 'pt')))
+    for n in [0, 10] + ([] if quick else [50]):
+        report = make_report(n)
+        cases.append((f"generate_report_pdf/images={n}", lambda report=report: app.generate_report_pdf(report, t)))
+        cases.append((f"generate_report_docx/images={n}", lambda report=report: app.generate_report_docx(report, t)))
+    for normalized in ([True] if quick else [False, True]):
+        report = make_report(10, photo=True, normalized=normalized)
+        cases.append((f"generate_report_pdf/photos=10{',normalized' if normalized else ''}", lambda report=report: app.generate_report_pdf(report, t)))
+    report = make_report(10 if quick else 40, normalized=True, distinct=True)
+    cases.append((f"generate_report_pdf/figures={len(report['annexes'])},distinct", lambda: app.generate_report_pdf(report, t)))
+    for n in [10, 500] + ([] if quick else [5000]):
+        proposal = make_proposal(n)
+        cases.append((f"generate_proposal_pdf/budget={n}", lambda proposal=proposal: app.generate_proposal_pdf(proposal, t)))
+        cases.append((f"generate_proposal_docx/budget={n}", lambda proposal=proposal: app.generate_proposal_docx(proposal, t)))
+    for n in [2, 50] + ([] if quick else [300]):
+        pdf = make_text_pdf(n)
+        cases.append((f"extract_text_from_pdf/pages={n}", lambda pdf=pdf, n=n: ats_engine.extract_text_from_pdf(io.BytesIO(pdf), max_pages=n, max_chars=sys.maxsize)))
+        text = ats_engine.extract_text_from_pdf(io.BytesIO(pdf), max_pages=n, max_chars=sys.maxsize)
+        cases.append((f"analyze_ats_compatibility/pages={n}", lambda text=text: ats_engine.analyze_ats_compatibility(text)))
+        cases.append((f"segment_sections/pages={n}", lambda text=text: ats_engine.segment_sections(text)))
+    return cases
+
+def _output_size(result):
+    if isinstance(result, (bytes, bytearray, str)): return len(result)
+    if isinstance(result, tuple): return len(json.dumps(result, default=str))
+    return 0
+
+def _cold():
+    # Mede o custo real de renderização: sem reaproveitar IR/fragmentos/anexos/template DOCX cacheados entre execuções
+    app.get_document_ir().cache.clear()
+    app.get_fragment_cache().clear()
+    app.get_layout_cache().clear()
+    app.get_annex_reader_cache().clear()
+    docx_writer.docx_template.cache_clear()
+
+def matches(name, pattern):
+    # Cada parte do filtro (separadas por '/' ou ',') precisa aparecer no nome do caso; partes
+    # 'chave=valor' só casam inteiras (exp=1 não seleciona exp=10), as demais por substring
+    tokens = re.split(r'[/,]', name)
+    return all(any(part == token if '=' in part else part in token for token in tokens) for part in re.split(r'[/,]', pattern) if part)
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        _cold()
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    _cold()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'wall_s': round(statistics.median(times), 5), 'min_s': round(min(times), 5), 'peak_mem_bytes': peak, 'output_bytes': _output_size(result)}
+
+# --- STARTUP (INTERPRETADOR NOVO POR EXECUÇÃO) ---
+STARTUP_DEPENDENCIES = ('streamlit', 'streamlit_sortables', 'reportlab.platypus', 'docx', 'pypdf', 'PIL.Image')
+STARTUP_PROBE = "import time\n{setup}\nstarted = time.perf_counter()\n{stmt}\nprint(time.perf_counter() - started)"
+
+def build_startup_cases():
+    # (nome, setup fora da medição, trecho medido)
+    cases = [(f"startup/import={name}", "", f"import {name}") for name in STARTUP_DEPENDENCIES]
+    cases.append(("startup/import=app", "", "import app"))
+    for kind, fn in (('resume_pdf', 'generate_pdf'), ('resume_docx', 'generate_docx')):
+        render = f"app.{fn}(app.WARMUP_RESUME, 1.0, 'pt')"
+        cases.append((f"startup/first_render={kind}", "import app", render))
+        cases.append((f"startup/first_render={kind},warm", "import app; app.warm_up()", render))
+    return cases
+
+def measure_startup(setup, stmt, repeat):
+    code = STARTUP_PROBE.format(setup=setup, stmt=stmt)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    times = [float(subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True, check=True).stdout.split()[-1]) for _ in range(repeat)]
+    return {'wall_s': round(statistics.median(times), 5), 'min_s': round(min(times), 5), 'peak_mem_bytes': 0, 'output_bytes': 0}
+
+# --- COMPARAÇÃO COM BASELINE ---
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous: continue
+        for metric in ('wall_s', 'peak_mem_bytes'):
+            before, after = previous[metric], current[metric]
+            if before and after > before * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.py", description="Benchmark the document generators and the ATS simulator.")
+    parser.add_argument('--quick', action='store_true', help="Skip the extreme sizes (1000 entries, 50 images, 300 pages).")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (median is reported).")
+    parser.add_argument('--filter', default='', help="Only run matching cases: each '/'- or ','-separated part must appear in the name; key=value parts match whole tokens (exp=1 does not select exp=10).")
+    parser.add_argument('--save', help="Write results to this JSON file (e.g. a new baseline).")
+    parser.add_argument('--baseline', help="Compare against this JSON baseline and exit 1 on regressions.")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Relative slowdown/memory growth flagged as a regression.")
+    parser.add_argument('--startup', action='store_true', help="Measure cold start instead: import time per dependency and time to first render, each in a fresh interpreter.")
+    args = parser.parse_args(argv)
+
+    if args.startup: cases = [(name, lambda setup=setup, stmt=stmt: measure_startup(setup, stmt, args.repeat)) for name, setup, stmt in build_startup_cases()]
+    else: cases = [(name, lambda fn=fn: measure(fn, args.repeat)) for name, fn in build_cases(args.quick)]
+    results = {}
+    print(f"{'case':45} {'wall (s)':>10} {'peak mem (KB)':>14} {'output (KB)':>12}")
+    for name, run in cases:
+        if not matches(name, args.filter): continue
+        results[name] = run()
+        r = results[name]
+        print(f"{name:45} {r['wall_s']:>10.4f} {r['peak_mem_bytes'] / 1024:>14.0f} {r['output_bytes'] / 1024:>12.1f}", flush=True)
+
+    report = {'python': platform.python_version(), 'platform': platform.platform(), 'repeat': args.repeat, 'results': results}
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f: json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f: baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions: print(f"REGRESSION {line}")
+        if regressions: return 1
+        print(f"No regressions above {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Caches compartilhados pelo app, pela CLI e pelo motor ATS (sem dependência do Streamlit)."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# --- CHAVES (CONTENT-ADDRESSED) ---
+def _hash_default(obj):
+    # Bytes (ex: imagens de anexos) entram na chave pelo digest, não pelo conteúdo
+    if isinstance(obj, (bytes, bytearray)): return hashlib.sha256(obj).hexdigest()
+    return str(obj)
+
+def content_key(kind, *parts):
+    payload = json.dumps([kind, *parts], sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=_hash_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# --- CACHE EM MEMÓRIA (LRU LIMITADO POR BYTES) ---
+class RenderCache:
+    """LRU limitado por bytes que agrupa renderizações idênticas em andamento."""
+    def __init__(self, max_bytes=64 * 1024 * 1024, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+        return None
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+        # Outra sessão já está gerando o mesmo documento: aguarda o resultado dela
+        if not owner: return future.result()
+        try:
+            value = render()
+        except BaseException as e:
+            with self._lock: self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value):
+        if value is None: return
+        value_size = self.sizeof(value)
+        if value_size > self.max_bytes: return
+        if key in self._entries: self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, value_size)
+        self.size += value_size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+# --- CACHE EM DISCO (JSON) ---
+class DiskCache:
+    """Camada opcional em disco: um JSON por chave, limitado em bytes (remove os mais antigos)."""
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self._files())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _files(self):
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if file_name.endswith('.json'): yield os.path.join(root, file_name)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f: value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try: os.utime(path) # mtime funciona como "último acesso" para a remoção
+        except OSError: pass
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f: f.write(payload)
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self.size += len(payload) - previous
+            if self.size > self.max_bytes: self._prune()
+
+    def _prune(self):
+        entries = []
+        for path in self._files():
+            try: entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+            except OSError: pass
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self.size <= self.max_bytes: break
+            try: os.remove(path)
+            except OSError: continue
+            self.size -= size
@@ -0,0 +1,277 @@
+"""Linha de comando (headless) para gerar documentos e pontuar PDFs em lote, sem a interface Streamlit.
+
+Uso:
+    python cli.py render records.jsonl -o out/ --formats pdf,docx,cl --workers 8
+    python cli.py render records.jsonl -o out.zip --lang en --density Compacto
+    python cli.py render records.jsonl -o out/ --fit-pages 1
+    python cli.py render records.jsonl -o out.zip --allow-failures
+    python cli.py ats curriculos/ -o results.csv --workers 8 --timeout 20
+
+No ``render``, cada linha do JSONL é um registro com ``resume_data`` (obrigatório para pdf/docx)
+e ``cover_letter_data`` (obrigatório para cl). Campos opcionais por registro:
+``id``, ``lang`` e ``scale_factor`` (que tem precedência sobre ``--fit-pages``). Uma linha que
+não é um objeto JSON conta como registro com falha (id ``line-<n>``), sem parar o lote.
+Qualquer falha dá código de saída 1, também com ``--allow-failures``.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from headless import silence_bare_mode_warnings
+silence_bare_mode_warnings()
+# Falhas de leitura já aparecem por arquivo nos resultados do `ats`
+logging.getLogger("pypdf").setLevel(logging.ERROR)
+
+import app
+import ats_engine
+
+RENDER_FORMATS = {
+    'pdf': ("resume_{lang}.pdf", lambda rec, sf, lang: app.generate_pdf(rec['resume_data'], sf, lang)),
+    'docx': ("resume_{lang}.docx", lambda rec, sf, lang: app.generate_docx(rec['resume_data'], sf, lang)),
+    'cl': ("cover_letter_{lang}.pdf", lambda rec, sf, lang: app.generate_cl_pdf(rec['resume_data'], rec['cover_letter_data'], sf, lang)),
+}
+
+# --- ENTRADA (STREAMING) ---
+def iter_records(path):
+    # Lê o JSONL linha a linha: memória constante independente do tamanho da entrada.
+    # Yields (id, registro, erro); linha malformada vem com registro None e o erro com o número da linha
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip(): continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict): raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+            except ValueError as e:
+                yield f"line-{line_no}", None, f"line {line_no}: {type(e).__name__}: {e}"
+                continue
+            yield str(record.get('id', line_no)), record, None
+    finally:
+        if stream is not sys.stdin: stream.close()
+
+def safe_name(record_id):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', record_id)
+
+# --- SAÍDA (DIRETÓRIO OU ZIP) COM MANIFESTO PARA RETOMADA ---
+class OutputSink:
+    """Grava os arquivos gerados e registra os IDs concluídos no manifesto.
+
+    Cada registro é confirmado individualmente (escrita atômica + linha no manifesto),
+    então uma execução interrompida retoma do último registro gravado. Em modo zip os
+    arquivos vão para um diretório de staging (``<saida>.zip.parts``), empacotado no
+    zip final só quando o lote termina. Falhas também entram no manifesto (sem ``files``):
+    não contam como concluídas e, se o zip for gerado mesmo assim, viram ``failures.jsonl``.
+    """
+    def __init__(self, output):
+        self.output = output
+        self.is_zip = output.endswith('.zip')
+        self.directory = output + '.parts' if self.is_zip else output
+        if self.is_zip and os.path.exists(output) and not os.path.isdir(self.directory):
+            raise SystemExit(f"{output} already exists and there is no interrupted run to resume.")
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest_path = os.path.join(self.directory, '.manifest.jsonl')
+        self.done = self._load_manifest()
+        self._manifest = open(self.manifest_path, 'a', encoding='utf-8')
+
+    def _load_manifest(self):
+        done = set()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                for line in f:
+                    try: entry = json.loads(line)
+                    except ValueError: break # Linha parcial de uma execução interrompida
+                    if 'files' in entry: done.add(entry['id'])
+        return done
+
+    def write(self, record_id, files):
+        prefix = safe_name(record_id)
+        for name, payload in files.items():
+            path = os.path.join(self.directory, f"{prefix}_{name}")
+            with open(path + '.tmp', 'wb') as f: f.write(payload)
+            os.replace(path + '.tmp', path)
+        self._log({'id': record_id, 'files': list(files)})
+        self.done.add(record_id)
+
+    def fail(self, record_id, error):
+        self._log({'id': record_id, 'error': error})
+
+    def _log(self, entry):
+        self._manifest.write(json.dumps(entry) + '\n')
+        self._manifest.flush()
+
+    def close(self):
+        self._manifest.close()
+
+    def pack(self):
+        # Empacota o staging em streaming (um arquivo por vez) e remove o diretório.
+        # Registros que falharam (e não deram certo numa nova tentativa) vão para failures.jsonl
+        if not self.is_zip: return
+        failures = {}
+        with zipfile.ZipFile(self.output + '.tmp', 'w', zipfile.ZIP_DEFLATED) as zf:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if 'files' not in entry:
+                        failures[entry['id']] = entry['error']
+                        continue
+                    prefix = safe_name(entry['id'])
+                    for name in entry['files']:
+                        zf.write(os.path.join(self.directory, f"{prefix}_{name}"), f"{prefix}/{name}")
+            failures = [json.dumps({'id': record_id, 'error': error}) + '\n' for record_id, error in failures.items() if record_id not in self.done]
+            if failures: zf.writestr('failures.jsonl', "".join(failures))
+        os.replace(self.output + '.tmp', self.output)
+        shutil.rmtree(self.directory)
+
+# --- WORKER ---
+def render_record(job):
+    record_id, record, formats, default_lang, default_scale, fit_pages = job
+    lang = record.get('lang', default_lang)
+    scale_factor = float(record.get('scale_factor', default_scale))
+    files = {}
+    try:
+        if fit_pages and 'scale_factor' not in record: scale_factor = app.fit_resume_scale(record['resume_data'], lang, fit_pages)[0]
+        for fmt in formats:
+            name_tpl, render = RENDER_FORMATS[fmt]
+            payload = render(record, scale_factor, lang)
+            if payload is None: raise RuntimeError(f"'{fmt}' renderer unavailable (missing dependency)")
+            files[name_tpl.format(lang=lang)] = payload
+    except Exception as e:
+        return record_id, None, f"{type(e).__name__}: {e}"
+    return record_id, files, None
+
+# --- COMANDO: RENDER ---
+def run_render(args):
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    unknown = [f for f in formats if f not in RENDER_FORMATS]
+    if unknown: raise SystemExit(f"Unknown format(s): {', '.join(unknown)}")
+    scale_factor = args.scale_factor if args.scale_factor is not None else app.DENSITY_PRESETS[args.density]
+
+    sink = OutputSink(args.output)
+    stats = {'done': 0, 'failed': 0, 'skipped': 0, 'docs': 0}
+    started = last_report = time.perf_counter()
+    max_pending = args.workers * 4 # Janela limitada: a entrada nunca é carregada inteira
+    errors = open(args.errors, 'a', encoding='utf-8') if args.errors else sys.stderr
+
+    def collect(future):
+        finish(*future.result())
+
+    def finish(record_id, files, error):
+        if error:
+            stats['failed'] += 1
+            errors.write(json.dumps({'id': record_id, 'error': error}) + '\n')
+            sink.fail(record_id, error)
+        else:
+            sink.write(record_id, files)
+            stats['done'] += 1
+            stats['docs'] += len(files)
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            pending = set()
+            for record_id, record, error in iter_records(args.input):
+                if record_id in sink.done:
+                    stats['skipped'] += 1
+                    continue
+                if error:
+                    finish(record_id, None, error)
+                    continue
+                pending.add(pool.submit(render_record, (record_id, record, formats, args.lang, scale_factor, args.fit_pages)))
+                if len(pending) >= max_pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished: collect(future)
+                now = time.perf_counter()
+                if not args.quiet and now - last_report >= args.progress_every:
+                    last_report = now
+                    print(f"[render] {stats['done']} ok, {stats['failed']} failed, {stats['docs'] / (now - started):.1f} docs/s", file=sys.stderr)
+            for future in wait(pending).done: collect(future)
+    finally:
+        sink.close()
+        if errors is not sys.stderr: errors.close()
+
+    # Com falhas, o staging fica no disco: rodar de novo tenta só os registros que falharam.
+    # Com --allow-failures o zip sai com os registros que deram certo (e o código de saída continua 1)
+    if not stats['failed'] or args.allow_failures: sink.pack()
+    elif sink.is_zip: print(f"[render] {stats['failed']} failed; outputs kept in {sink.directory} (re-run to retry, or pass --allow-failures to pack the successful records).", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    summary = {**stats, 'elapsed_s': round(elapsed, 3), 'docs_per_s': round(stats['docs'] / elapsed, 2) if elapsed else 0.0}
+    print(json.dumps(summary))
+    return 1 if stats['failed'] else 0
+
+# --- COMANDO: ATS (PONTUAÇÃO EM LOTE) ---
+def run_ats(args):
+    to_stdout = args.output == '-'
+    out = sys.stdout if to_stdout else open(args.output, 'w', encoding='utf-8', newline='')
+    as_csv = args.output.endswith('.csv')
+    writer = None
+    if as_csv:
+        writer = csv.DictWriter(out, fieldnames=ats_engine.ATS_RESULT_FIELDS)
+        writer.writeheader()
+    counts = {'ok': 0, 'error': 0, 'timeout': 0, 'skipped': 0}
+    started = last_report = time.perf_counter()
+    log = sys.stderr
+    try:
+        sources = ats_engine.iter_batch_sources(args.input)
+        for result in ats_engine.score_batch(sources, workers=args.workers, timeout=args.timeout, max_pages=args.max_pages, max_chars=args.max_chars):
+            counts[result['status']] += 1
+            if writer: writer.writerow(ats_engine.result_row(result))
+            else: out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+            now = time.perf_counter()
+            if not args.quiet and now - last_report >= args.progress_every:
+                last_report = now
+                print(f"[ats] {sum(counts.values())} files, {sum(counts.values()) / (now - started):.1f} files/s", file=log)
+    finally:
+        if not to_stdout: out.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    summary = {'files': total, **counts, 'elapsed_s': round(elapsed, 3), 'files_per_s': round(total / elapsed, 2) if elapsed else 0.0}
+    print(json.dumps(summary), file=log if to_stdout else sys.stdout)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless tools for the ATS resume generator.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    render = sub.add_parser('render', help="Render resumes/cover letters from a JSONL stream.")
+    render.add_argument('input', help="JSONL file with one record per line ('-' for stdin).")
+    render.add_argument('-o', '--output', required=True, help="Output directory, or a path ending in .zip.")
+    render.add_argument('--formats', default='pdf', help="Comma-separated: pdf, docx, cl (default: pdf).")
+    render.add_argument('--lang', default='pt', choices=sorted(app.TRANSLATIONS), help="Default language (records may override with 'lang').")
+    render.add_argument('--density', default='Normal', choices=list(app.DENSITY_PRESETS), help="Default layout density preset.")
+    render.add_argument('--scale-factor', type=float, help="Explicit scale factor (overrides --density).")
+    render.add_argument('--fit-pages', type=int, help="Per record, the largest scale that fits the resume on N pages (overrides --density/--scale-factor).")
+    render.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Process pool size (default: CPU count).")
+    render.add_argument('--errors', help="Append per-record failures as JSONL to this file (default: stderr).")
+    render.add_argument('--allow-failures', action='store_true', help="With a .zip output, pack the records that succeeded even if some failed (listed in failures.jsonl inside the zip); the exit code is still 1.")
+    render.add_argument('--progress-every', type=float, default=5.0, help="Seconds between throughput reports.")
+    render.add_argument('--quiet', action='store_true', help="Only print the final summary.")
+    render.set_defaults(func=run_render)
+
+    ats = sub.add_parser('ats', help="Score a directory or .zip of PDFs with the ATS simulator.")
+    ats.add_argument('input', help="Directory (searched recursively) or .zip file with PDFs.")
+    ats.add_argument('-o', '--output', default='-', help="Results file: .csv, or JSONL for anything else ('-' for stdout, default).")
+    ats.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Process pool size (default: CPU count).")
+    ats.add_argument('--timeout', type=float, default=ats_engine.ATS_FILE_TIMEOUT, help="Per-file timeout in seconds (0 disables).")
+    ats.add_argument('--max-pages', type=int, default=ats_engine.ATS_MAX_PAGES, help="Pages extracted per file.")
+    ats.add_argument('--max-chars', type=int, default=ats_engine.ATS_MAX_CHARS, help="Characters extracted per file.")
+    ats.add_argument('--progress-every', type=float, default=5.0, help="Seconds between throughput reports.")
+    ats.add_argument('--quiet', action='store_true', help="Only print the final summary.")
+    ats.set_defaults(func=run_ats)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
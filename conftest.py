@@ -0,0 +1 @@
+# Presença deste arquivo põe a raiz do repositório no sys.path dos testes (módulos planos na raiz)
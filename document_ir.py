@@ -0,0 +1,218 @@
+"""Representação intermediária (IR) dos documentos, consumida pelos backends PDF, DOCX e HTML.
+
+Cada documento vira uma sequência de blocos ``(tipo, conteúdo)``. Nos blocos de texto o
+conteúdo é uma tupla de runs ``(texto, marca)`` (``''`` normal, ``'b'`` negrito, ``'link'``);
+``space``, ``page_break``, ``rule``, ``table`` e ``figure`` levam o próprio parâmetro. A IR
+decide o que sai e em que ordem; cada backend só traduz tipos em estilos, então o PDF, o DOCX
+e o preview não divergem. O texto do usuário entra cru: o escape é feito por cada backend.
+Sem dependência do Streamlit.
+"""
+from caching import RenderCache, content_key
+
+IR_CACHE_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_SECTION_ORDER = ["summary", "skills", "experience", "education", "certifications", "projects", "languages", "awards", "volunteering"]
+
+def _text(kind, text):
+    return (kind, ((text, ''),))
+
+def _lines(text, kind='body'):
+    # Uma linha não vazia por bloco (mesma regra em todos os backends)
+    return [_text(kind, line) for line in text.split('\n') if line.strip()]
+
+def _section(title, blocks):
+    return (_text('section', title.upper()), *blocks)
+
+# --- SEÇÕES (CURRÍCULO) ---
+def _header(data, t, lang_code):
+    contact = data['contact']
+    blocks = [_text('name', contact['name'])]
+    if data.get('stack'): blocks.append(_text('stack', data['stack']))
+    contact_parts = [contact['phone'], contact['email'], contact['location'], contact['linkedin']]
+    blocks.append(_text('contact', " • ".join([p for p in contact_parts if p])))
+    blocks.append(('space', 4))
+    return tuple(blocks)
+
+def _summary(data, t, lang_code):
+    if not data.get('summary'): return ()
+    blocks = _lines(data['summary'])
+    if data.get('achievements'):
+        blocks.append(('space', 4))
+        blocks.append(('label', (("FEITOS" if lang_code == 'pt' else "KEY ACHIEVEMENTS", 'b'),)))
+        blocks.extend(_lines(data['achievements']))
+    return _section(t['summary_header'], blocks)
+
+def _skills(data, t, lang_code):
+    if not data.get('skills'): return ()
+    return _section(t['skills_header'], [_text('body', ", ".join(data['skills']))])
+
+def _experience(data, t, lang_code):
+    if not data.get('experience'): return ()
+    blocks = []
+    for exp in data['experience']:
+        blocks.append(_text('item', f"{exp['position']} | {exp['company']}"))
+        blocks.append(_text('date', f"{exp['start']} - {exp['end']}"))
+        if exp['description']: blocks.extend(_lines(exp['description']))
+        blocks.append(('space', 6))
+    return _section(t['experience_header'], blocks)
+
+def _education(data, t, lang_code):
+    if not data.get('education'): return ()
+    blocks = []
+    for edu in data['education']:
+        blocks.append(_text('degree', f"{edu['degree']}"))
+        blocks.append(_text('date', f"{edu['institution']} • {t['lbl_year']}: {edu['year']}"))
+        blocks.append(('space', 4))
+    return _section(t['education_header'], blocks)
+
+def _certifications(data, t, lang_code):
+    if not data.get('certifications'): return ()
+    return _section(t['certifications_header'], [('bullet', ((cert['name'], 'b'), (f" ({cert['issuer']}, {cert['year']})", ''))) for cert in data['certifications']])
+
+def _projects(data, t, lang_code):
+    if not data.get('projects'): return ()
+    blocks = []
+    for proj in data['projects']:
+        runs = ((proj['title'], 'b'),)
+        if proj.get('link'): runs += ((" | ", ''), (proj['link'], 'link'))
+        blocks.append(('bullet', runs))
+        if proj.get('description'): blocks.extend(_lines(proj['description']))
+        blocks.append(('space', 3))
+    return _section(t['projects_header'], blocks)
+
+def _languages(data, t, lang_code):
+    if not data.get('languages'): return ()
+    return _section(t['languages_header'], [
+        ('bullet', ((lang['name'], 'b'), (f" - {t['lbl_conv']}: {lang['conv']} | {t['lbl_comp']}: {lang['comp']} | {t['lbl_writ']}: {lang['writ']}", '')))
+        for lang in data['languages']])
+
+def _awards(data, t, lang_code):
+    if not data.get('awards'): return ()
+    return _section(t['awards_header'], [('bullet', ((f"{aw['title']} | {t['connector_offered_by']} {aw['issuer']} | {aw['date']}", ''),)) for aw in data['awards']])
+
+def _volunteering(data, t, lang_code):
+    if not data.get('volunteering'): return ()
+    return _section(t['volunteering_header'], [
+        ('bullet', ((vol['role'], 'b'), (f" | {vol['org']} | {vol['start']} -> {vol['end']} | {vol['category']}", '')))
+        for vol in data['volunteering']])
+
+# Seção -> (construtor, campos do currículo que ela lê, rótulos de TRANSLATIONS que ela usa)
+RESUME_SECTIONS = {
+    'header': (_header, ('contact', 'stack'), ()),
+    'summary': (_summary, ('summary', 'achievements'), ('summary_header',)),
+    'skills': (_skills, ('skills',), ('skills_header',)),
+    'experience': (_experience, ('experience',), ('experience_header',)),
+    'education': (_education, ('education',), ('education_header', 'lbl_year')),
+    'certifications': (_certifications, ('certifications',), ('certifications_header',)),
+    'projects': (_projects, ('projects',), ('projects_header',)),
+    'languages': (_languages, ('languages',), ('languages_header', 'lbl_conv', 'lbl_comp', 'lbl_writ')),
+    'awards': (_awards, ('awards',), ('awards_header', 'connector_offered_by')),
+    'volunteering': (_volunteering, ('volunteering',), ('volunteering_header',)),
+}
+
+def resume_parts(data):
+    return ['header'] + data.get('section_order', DEFAULT_SECTION_ORDER)
+
+# --- DOCUMENTOS ABNT (RELATÓRIO E PROPOSTA) ---
+def _abnt_cover(cover):
+    # Capa e folha de rosto: iguais no Relatório e na Proposta
+    blocks = []
+    if cover['institution']: blocks.append(_text('center', cover['institution'].upper()))
+    blocks.append(_text('center', cover['author'].upper()))
+    blocks.append(_text('title_cover', cover['title'].upper()))
+    blocks.append(_text('subtitle', cover['subtitle']) if cover['subtitle'] else ('space', 100))
+    blocks += [('space', 200), _text('center', cover['city']), _text('center', cover['year']), ('page_break', None)]
+
+    blocks += [_text('center', cover['author'].upper()), ('space', 100), _text('center', cover['title'].upper())]
+    if cover['subtitle']: blocks.append(_text('center', cover['subtitle']))
+    blocks.append(('space', 50))
+    if cover['theme']: blocks.append(_text('note', cover['theme']))
+    blocks += [('space', 200), _text('center', cover['city']), _text('center', cover['year']), ('page_break', None)]
+    return blocks
+
+def _subsections(sec_id, subsections):
+    blocks = []
+    for idx, sub in enumerate(subsections):
+        if sub['title']: blocks.append(_text('h2', f"{sec_id}.{idx+1} {sub['title']}"))
+        if sub['content']: blocks.extend(_lines(sub['content'], 'normal'))
+    return blocks
+
+def report(data, t):
+    """Blocos do Relatório ABNT; ``figure`` aponta o índice do anexo em ``data['annexes']``."""
+    blocks = _abnt_cover(data['cover'])
+    sections_map = [(str(n), t[f'rep_sec_{n}']) for n in range(1, 9)]
+
+    # Sumário (simples): só as seções com conteúdo
+    blocks += [_text('h1', t['rep_sec_sum'].upper()), ('rule', '#000000'), ('space', 10)]
+    for sec_id, sec_title in sections_map:
+        has_content = bool(data['annexes']) if sec_id == "8" else bool(data['text_sections'].get(sec_id))
+        if has_content: blocks.append(_text('normal', f"{sec_id}. {sec_title}"))
+    blocks.append(('page_break', None))
+
+    # Conteúdo (seções 1-7)
+    for sec_id, sec_title in sections_map[:-1]:
+        subsections = data['text_sections'].get(sec_id, [])
+        if subsections:
+            blocks.append(_text('h1', f"{sec_id}. {sec_title}"))
+            blocks += _subsections(sec_id, subsections)
+            blocks.append(('space', 15))
+
+    # Anexos (seção 8)
+    if data['annexes']:
+        blocks += [('page_break', None), _text('h1', f"8. {t['rep_sec_8']}")]
+        blocks += [('figure', (idx, f"Figura {idx+1}: {annex['caption']}")) for idx, annex in enumerate(data['annexes'])]
+    return tuple(blocks)
+
+def proposal(data, t):
+    """Blocos da Proposta ABNT; ``table`` leva ``(tipo, linhas)`` com o cabeçalho na primeira linha."""
+    blocks = _abnt_cover(data['cover'])
+    for n in range(1, 10):
+        sec_id = str(n)
+        blocks += [_text('h1', f"{sec_id}. {t[f'sec_{n}']}"), ('rule', '#DDDDDD')]
+        if sec_id == "5": # Cronograma
+            if data['timeline']:
+                rows = [(t.get('lbl_date', 'Data'), t.get('lbl_milestone', 'Marco'))] + [(item['date'], item['milestone']) for item in data['timeline']]
+                blocks.append(('table', ('timeline', tuple(rows))))
+            else: blocks.append(_text('normal', "N/A"))
+        elif sec_id == "6": # Orçamento
+            if data['budget']:
+                rows = [(t.get('lbl_budget_item', 'Item'), t.get('lbl_amount', 'Valor'))] + [(item['item'], f"{item['amount']:,.2f}") for item in data['budget']]
+                rows.append(('TOTAL', f"{sum(item['amount'] for item in data['budget']):,.2f}"))
+                blocks.append(('table', ('budget', tuple(rows))))
+            else: blocks.append(_text('normal', "N/A"))
+        else: # Seções de texto
+            subsections = data['text_sections'].get(sec_id, [])
+            blocks += _subsections(sec_id, subsections) if subsections else [_text('normal', "...")]
+        blocks.append(('space', 15))
+    return tuple(blocks)
+
+# --- CACHE ---
+def _ir_size(blocks):
+    return len(repr(blocks))
+
+class DocumentIR:
+    """IR memoizada pelo hash dos dados que cada parte lê; segura para várias sessões/threads."""
+    def __init__(self, max_bytes=IR_CACHE_MAX_BYTES):
+        self.cache = RenderCache(max_bytes=max_bytes, sizeof=_ir_size)
+
+    def resume(self, data, t, lang_code):
+        """``[(seção, chave, blocos)]`` na ordem do documento.
+
+        A chave identifica o conteúdo da seção e serve de base para os caches dos backends:
+        editar uma experiência não invalida as outras seções em nenhum deles.
+        """
+        sections = []
+        for part in resume_parts(data):
+            if part not in RESUME_SECTIONS: continue
+            build, fields, labels = RESUME_SECTIONS[part]
+            key = content_key('ir', part, [data.get(field) for field in fields], [t.get(label) for label in labels], lang_code)
+            sections.append((part, key, self.cache.get_or_render(key, lambda: build(data, t, lang_code))))
+        return sections
+
+    def report(self, data, t):
+        # Só a legenda de cada anexo entra na chave: a imagem é lida pelo backend
+        captions = [annex['caption'] for annex in data['annexes']]
+        key = content_key('ir', 'report', data['cover'], data['text_sections'], captions, t)
+        return self.cache.get_or_render(key, lambda: report(data, t))
+
+    def proposal(self, data, t):
+        return self.cache.get_or_render(content_key('ir', 'proposal', data, t), lambda: proposal(data, t))
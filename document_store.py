@@ -0,0 +1,127 @@
+"""Armazenamento persistente dos documentos com autosave debounced, sem dependência do Streamlit.
+
+Cada documento (currículo, cover letter, proposta, relatório, simulador ATS) é gravado
+campo a campo (chave de primeiro nível do dict), então um rerun que só altera o resumo
+reescreve um campo. Imagens dos anexos ficam como blobs endereçados pelo hash e só são
+lidas quando um PDF é gerado; a sessão guarda apenas as referências. Onde os dados
+ficam (memória, SQLite, Redis) é decidido pelo backend (``state_backends``).
+"""
+import atexit
+import hashlib
+import threading
+import time
+import uuid
+
+from caching import RenderCache
+from state_backends import decode_payload, dump_value, pack_payload
+
+DOCUMENT_KINDS = ('resume_data', 'cover_letter_data', 'proposal_data', 'report_data', 'ats_data')
+AUTOSAVE_DEBOUNCE_S = 2.0 # Grava após 2 s sem novas alterações...
+AUTOSAVE_MAX_DELAY_S = 10.0 # ...ou no máximo 10 s depois da primeira alteração pendente
+BLOB_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+class DocumentStore:
+    """Documentos por ``doc_id`` sobre um StateBackend, com escrita debounced só dos campos alterados.
+
+    O hash do último valor carregado/salvo de cada campo fica com quem chama (``digests``, um
+    dict por sessão): a memória some com a sessão e nenhuma sessão (ou worker) compara suas
+    edições com o que outra gravou.
+    """
+    def __init__(self, backend, debounce=AUTOSAVE_DEBOUNCE_S, max_delay=AUTOSAVE_MAX_DELAY_S):
+        self.backend = backend
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending = {} # (doc_id, kind, field) -> JSON canônico ainda não gravado
+        self._first_pending = self._last_change = 0.0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock() # Um flush por vez: lotes chegam ao backend na ordem em que saem da fila
+        self._blobs = RenderCache(max_bytes=BLOB_CACHE_MAX_BYTES)
+        self._closed = False
+        threading.Thread(target=self._flush_loop, name='document-autosave', daemon=True).start()
+        atexit.register(self.close)
+
+    # --- DOCUMENTOS ---
+    @staticmethod
+    def new_document_id():
+        return uuid.uuid4().hex
+
+    def load(self, doc_id, digests):
+        # Inclui alterações ainda pendentes (outra sessão no mesmo processo pode tê-las feito)
+        self.flush()
+        documents = {}
+        for (kind, field), payload in self.backend.load_document(doc_id).items():
+            value = decode_payload(payload)
+            documents.setdefault(kind, {})[field] = value
+            digests[(kind, field)] = hashlib.sha256(dump_value(value)).digest()
+        return documents
+
+    def save(self, doc_id, kind, document, digests):
+        # Barato o bastante para rodar a cada rerun: só campos que mudaram desde o último
+        # load/save desta sessão (``digests``) viram escrita
+        changed = {}
+        for field, value in document.items():
+            raw = dump_value(value)
+            digest = hashlib.sha256(raw).digest()
+            if digests.get((kind, field)) != digest:
+                digests[(kind, field)] = digest
+                changed[(doc_id, kind, field)] = raw
+        if not changed: return 0
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending: self._first_pending = now
+            self._pending.update(changed)
+            self._last_change = now
+            self._cond.notify()
+        return len(changed)
+
+    def flush(self):
+        # Retirar da fila e gravar sob o mesmo lock: com a thread de autosave e o load() chamando
+        # ao mesmo tempo, um lote mais antigo nunca é gravado depois de um mais novo
+        with self._write_lock:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            if not pending: return 0
+            try:
+                # Compressão só aqui, fora do rerun e apenas dos campos alterados
+                self.backend.write_fields({key: pack_payload(raw) for key, raw in pending.items()})
+            except Exception:
+                # Devolve para a fila sem sobrescrever alterações mais novas
+                with self._cond:
+                    for key, raw in pending.items(): self._pending.setdefault(key, raw)
+                raise
+            return len(pending)
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed: self._cond.wait()
+                if self._closed: return
+                # Espera o usuário parar de digitar (debounce), sem adiar indefinidamente
+                now = time.monotonic()
+                due = min(self._last_change + self.debounce, self._first_pending + self.max_delay)
+                if now < due:
+                    self._cond.wait(due - now)
+                    continue
+            try: self.flush()
+            except Exception: time.sleep(self.debounce) # Backend ocupado/indisponível: tenta de novo
+
+    # --- BLOBS (IMAGENS DOS ANEXOS) ---
+    def put_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        self.backend.put_blob(digest, data)
+        return digest
+
+    def get_blob(self, digest):
+        def read():
+            data = self.backend.get_blob(digest)
+            if data is None: raise KeyError(f"Blob {digest} not found")
+            return bytes(data)
+        return self._blobs.get_or_render(digest, read)
+
+    def close(self):
+        if self._closed: return
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+        self.backend.close()
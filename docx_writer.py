@@ -0,0 +1,285 @@
+"""DOCX dos documentos a partir dos blocos da IR (``document_ir``), sem dependência do Streamlit.
+
+Currículo: o template (margens, fonte base e estilos de parágrafo nomeados) é montado com o
+python-docx uma vez por escala e guardado já zipado, sem o ``word/document.xml``. Cada
+exportação só gera o XML do corpo, parágrafo a parágrafo, direto no zip: a formatação fica
+nos estilos e os runs só marcam o negrito dentro da linha.
+
+Relatório e Proposta ABNT: montados com o python-docx (tabelas e figuras), com estilos
+equivalentes aos do PDF.
+"""
+import functools
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+DOCUMENT_PART = 'word/document.xml'
+TEMPLATE_CACHE_SIZE = 64 # Escalas distintas (presets + ajuste automático) mantidas em memória
+
+# Caracteres que o XML 1.0 não aceita (o python-docx recusava o texto inteiro)
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+def _x(value):
+    return escape(_INVALID_XML.sub('', str(value)))
+
+# --- ESTILOS NOMEADOS (POR ESCALA) ---
+def _paragraph_styles(scale_factor):
+    # Os mesmos valores que a versão run a run aplicava (scaled() com mínimo de 6 pt)
+    def scaled(size, min_size=6): return max(size * scale_factor, min_size)
+    return {
+        'ResumeName': dict(size=scaled(24), bold=True, center=True, before=scaled(0), after=scaled(0)),
+        'ResumeStack': dict(size=scaled(12), center=True, before=scaled(0), after=scaled(6), font='Arial'),
+        'ResumeContact': dict(size=scaled(10), center=True, before=scaled(0), after=scaled(12)),
+        'ResumeSection': dict(size=scaled(13), bold=True, center=True, before=scaled(12), after=0),
+        'ResumeBody': dict(before=scaled(0), after=scaled(0)),
+        'ResumeLabel': dict(size=scaled(10.5), bold=True, before=scaled(6), after=0),
+        'ResumeItem': dict(size=scaled(11.5), bold=True, before=scaled(6), after=0),
+        'ResumeDegree': dict(size=scaled(11.5), bold=True, before=scaled(6), after=scaled(0)),
+        'ResumeDate': dict(size=scaled(10.5), italic=True, after=scaled(2)),
+        'ResumeBullet': dict(size=scaled(10.5), after=0, indent_cm=0.5),
+    }
+
+# Estilos internos que o Word espera encontrar; o resto do styles.xml padrão é descartado
+_BUILTIN_STYLES = {'Normal', 'DefaultParagraphFont', 'TableNormal', 'NoList'}
+
+def _build_template(scale_factor):
+    from docx import Document
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.oxml.ns import qn
+    from docx.shared import Cm, Pt
+
+    doc = Document()
+    for section in doc.sections:
+        # Base margins 1.27cm (~0.5 inch) adjusted by scale
+        section.top_margin = section.bottom_margin = section.left_margin = section.right_margin = Cm(1.27 * scale_factor)
+
+    normal = doc.styles['Normal']
+    normal.font.name = 'Times New Roman'
+    normal.font.size = Pt(max(10.5 * scale_factor, 6))
+    normal.paragraph_format.space_after = Pt(0) # Minimalist - sem espaço automático
+    normal.paragraph_format.line_spacing = 1.15
+
+    styles = _paragraph_styles(scale_factor)
+    root = doc.styles.element
+    for element in list(root):
+        # Template enxuto: sem estilos latentes nem as ~160 definições que o currículo não usa
+        if element.tag == qn('w:latentStyles') or (element.tag == qn('w:style') and element.get(qn('w:styleId')) not in _BUILTIN_STYLES):
+            root.remove(element)
+    for style_id, spec in styles.items():
+        style = doc.styles.add_style(style_id, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = normal
+        if 'size' in spec: style.font.size = Pt(spec['size'])
+        if 'font' in spec: style.font.name = spec['font']
+        if spec.get('bold'): style.font.bold = True
+        if spec.get('italic'): style.font.italic = True
+        fmt = style.paragraph_format
+        fmt.alignment = WD_ALIGN_PARAGRAPH.CENTER if spec.get('center') else WD_ALIGN_PARAGRAPH.LEFT
+        if 'before' in spec: fmt.space_before = Pt(spec['before'])
+        fmt.space_after = Pt(spec['after'])
+        if 'indent_cm' in spec: fmt.left_indent = Cm(spec['indent_cm'])
+
+    # Partes opcionais do template padrão (miniatura, stylesWithEffects, customXml, numeração
+    # que só apontava para os estilos de lista removidos) não vão para o arquivo
+    for rId, rel in list(doc.part.rels.items()):
+        if rel.reltype in (RT.CUSTOM_XML, RT.NUMBERING) or rel.reltype.endswith('/stylesWithEffects'): doc.part.drop_rel(rId)
+    for rId, rel in list(doc.part.package.rels.items()):
+        if rel.reltype == RT.THUMBNAIL: del doc.part.package.rels[rId]
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def docx_template(scale_factor):
+    """``(zip sem o document.xml, início do document.xml, fim do document.xml)`` da escala."""
+    source = zipfile.ZipFile(io.BytesIO(_build_template(scale_factor)))
+    document = source.read(DOCUMENT_PART).decode('utf-8')
+    body_start = document.index('<w:body>') + len('<w:body>')
+    body_end = document.index('<w:sectPr')
+    package = io.BytesIO()
+    with zipfile.ZipFile(package, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            if info.filename != DOCUMENT_PART: target.writestr(info, source.read(info.filename), zipfile.ZIP_DEFLATED)
+    return package.getvalue(), document[:body_start].encode('utf-8'), document[body_end:].encode('utf-8')
+
+# --- XML DO CORPO ---
+_PARAGRAPH = '<w:p><w:pPr><w:pStyle w:val="{}"/></w:pPr>{}</w:p>'.format
+_RUN = '<w:r><w:t xml:space="preserve">{}</w:t></w:r>'.format
+_BOLD_RUN = '<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{}</w:t></w:r>'.format
+
+# Tipo de bloco da IR -> estilo nomeado do template
+RESUME_STYLES = {
+    'name': 'ResumeName', 'stack': 'ResumeStack', 'contact': 'ResumeContact', 'section': 'ResumeSection',
+    'body': 'ResumeBody', 'label': 'ResumeLabel', 'item': 'ResumeItem', 'degree': 'ResumeDegree',
+    'date': 'ResumeDate', 'bullet': 'ResumeBullet',
+}
+
+def _runs(runs):
+    return "".join(_BOLD_RUN(_x(text)) if mark == 'b' else _RUN(_x(text)) for text, mark in runs)
+
+def resume_body(sections):
+    """Parágrafos (XML) do corpo a partir dos blocos da IR de cada seção, em ordem."""
+    for blocks in sections:
+        for kind, payload in blocks:
+            # O espaçamento vertical já vem dos estilos (space_before/space_after)
+            if kind == 'space': continue
+            runs = _runs(payload)
+            if kind == 'bullet': runs = _RUN("• ") + runs
+            yield _PARAGRAPH(RESUME_STYLES[kind], runs)
+
+def resume_docx(sections, scale_factor):
+    """Bytes do .docx: o zip do template mais o document.xml escrito em streaming."""
+    package, head, tail = docx_template(scale_factor)
+    buffer = io.BytesIO(package)
+    with zipfile.ZipFile(buffer, 'a', zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(DOCUMENT_PART, 'w') as part:
+            part.write(head)
+            for paragraph in resume_body(sections): part.write(paragraph.encode('utf-8'))
+            part.write(tail)
+    return buffer.getvalue()
+
+# --- DOCUMENTOS ABNT (RELATÓRIO E PROPOSTA) ---
+# Mesmos tamanhos e espaçamentos dos estilos ABNT do PDF (Helvetica -> Arial)
+_ABNT_STYLES = {
+    'center': dict(size=12, center=True, after=6),
+    'title_cover': dict(size=16, bold=True, center=True, before=100, after=12),
+    'subtitle': dict(size=14, center=True, after=100),
+    'note': dict(size=10, justify=True, indent_cm=7),
+    'h1': dict(size=14, bold=True, caps=True, before=20, after=12),
+    'h2': dict(size=12, bold=True, before=10, after=6),
+    'normal': dict(size=11, justify=True, after=6),
+    'caption': dict(size=10, center=True, before=4, after=12),
+}
+_ABNT_TABLE_WIDTHS = {'timeline': (100, 350), 'budget': (350, 100)} # pt, como no PDF
+# Elementos que vêm depois de w:pBdr na sequência do w:pPr (o Word exige a ordem do schema)
+_AFTER_BORDER = ('w:shd', 'w:tabs', 'w:suppressAutoHyphens', 'w:spacing', 'w:ind', 'w:jc', 'w:outlineLvl', 'w:rPr', 'w:sectPr', 'w:pPrChange')
+
+def _clean(value):
+    return _INVALID_XML.sub('', str(value))
+
+def _abnt_styles(doc, accent_color):
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Cm, Pt, RGBColor
+    styles = {}
+    for kind, spec in _ABNT_STYLES.items():
+        style = doc.styles.add_style(f"Abnt{kind.title().replace('_', '')}", WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = doc.styles['Normal']
+        style.font.size = Pt(spec['size'])
+        if spec.get('bold'): style.font.bold = True
+        if spec.get('caps'): style.font.all_caps = True
+        if kind == 'h1' and accent_color: style.font.color.rgb = RGBColor.from_string(accent_color.lstrip('#'))
+        fmt = style.paragraph_format
+        fmt.alignment = WD_ALIGN_PARAGRAPH.CENTER if spec.get('center') else WD_ALIGN_PARAGRAPH.JUSTIFY if spec.get('justify') else WD_ALIGN_PARAGRAPH.LEFT
+        fmt.space_before = Pt(spec.get('before', 0))
+        fmt.space_after = Pt(spec.get('after', 0))
+        if 'indent_cm' in spec: fmt.left_indent = Cm(spec['indent_cm'])
+        styles[kind] = style
+    return styles
+
+def _rule(paragraph, color):
+    # Linha horizontal = borda inferior do parágrafo anterior (o título da seção)
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    border, bottom = OxmlElement('w:pBdr'), OxmlElement('w:bottom')
+    for name, value in (('w:val', 'single'), ('w:sz', '4'), ('w:space', '1'), ('w:color', color.lstrip('#'))): bottom.set(qn(name), value)
+    border.append(bottom)
+    paragraph._p.get_or_add_pPr().insert_element_before(border, *_AFTER_BORDER)
+
+def _shade(cell, color):
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    shading = OxmlElement('w:shd')
+    for name, value in (('w:val', 'clear'), ('w:color', 'auto'), ('w:fill', color.lstrip('#'))): shading.set(qn(name), value)
+    cell._tc.get_or_add_tcPr().append(shading)
+
+def _table(doc, kind, rows, accent_color):
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
+    table = doc.add_table(rows=len(rows), cols=2)
+    table.style = doc.styles['Table Grid']
+    # table.cell(r, c) recalcula a grade inteira a cada chamada: percorre as linhas uma vez só
+    for r, (row, table_row) in enumerate(zip(rows, table.rows)):
+        for c, (value, cell) in enumerate(zip(row, table_row.cells)):
+            cell.width = Pt(_ABNT_TABLE_WIDTHS[kind][c])
+            paragraph = cell.paragraphs[0]
+            run = paragraph.add_run(_clean(value))
+            run.font.size = Pt(10)
+            # Orçamento: valores à direita e linha de TOTAL em negrito/cinza, como no PDF
+            if kind == 'budget' and c == 1: paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+            if r == 0:
+                run.font.bold = True
+                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
+                _shade(cell, accent_color or '#000000')
+            elif kind == 'budget' and r == len(rows) - 1:
+                run.font.bold = True
+                _shade(cell, '#D3D3D3')
+    # Espaço/quebra de página pendentes vão para o parágrafo da primeira célula (o Word respeita
+    # page_break_before no início da tabela), como o Spacer/PageBreak antes da Table no PDF
+    return table.rows[0].cells[0].paragraphs[0]
+
+def _figure(doc, styles, annex, caption):
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+    paragraph = doc.add_paragraph(style=styles['center'])
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    try:
+        if annex.get('width'): width, height = annex['width'], annex['height']
+        else:
+            from PIL import Image
+            from annex_images import display_size
+            with Image.open(io.BytesIO(annex['image'])) as img: width, height = display_size(*img.size)
+        paragraph.add_run().add_picture(io.BytesIO(annex['image']), width=Pt(width), height=Pt(height))
+    except Exception as e:
+        paragraph.style = styles['normal']
+        paragraph.add_run(_clean(f"[Erro ao renderizar imagem: {str(e)}]"))
+        return paragraph
+    doc.add_paragraph(_clean(caption), style=styles['caption'])
+    return paragraph
+
+def abnt_docx(blocks, annexes=(), accent_color=None):
+    """Bytes do .docx de um documento ABNT a partir dos blocos da IR (Relatório ou Proposta).
+
+    Espaçadores viram espaço antes do parágrafo seguinte e quebras de página, ``page_break_before``.
+    """
+    from docx import Document
+    from docx.shared import Cm, Inches, Pt
+
+    doc = Document()
+    for section in doc.sections:
+        section.page_width, section.page_height = Inches(8.5), Inches(11) # letter, como o PDF
+        section.left_margin = section.right_margin = section.top_margin = Cm(3)
+        section.bottom_margin = Cm(2)
+    normal = doc.styles['Normal']
+    normal.font.name = 'Arial'
+    normal.font.size = Pt(11)
+    normal.paragraph_format.space_after = Pt(0)
+    styles = _abnt_styles(doc, accent_color)
+
+    space, page_break, last = 0, False, None
+    for kind, payload in blocks:
+        if kind == 'space': space += payload; continue
+        if kind == 'page_break': page_break = True; continue
+        if kind == 'rule':
+            if last is not None: _rule(last, payload)
+            continue
+        if kind == 'table': first = _table(doc, *payload, accent_color)
+        elif kind == 'figure': first = _figure(doc, styles, annexes[payload[0]], payload[1])
+        else:
+            first = last = doc.add_paragraph(style=styles[kind])
+            for text, mark in payload:
+                run = last.add_run(_clean(text))
+                if mark == 'b': run.bold = True
+        # Espaço e quebra de página pendentes vão para o primeiro parágrafo do bloco
+        if first is not None:
+            fmt = first.paragraph_format
+            if space: fmt.space_before = (first.style.paragraph_format.space_before or 0) + Pt(space)
+            if page_break: fmt.page_break_before = True
+        space, page_break = 0, False
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
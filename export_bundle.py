@@ -0,0 +1,46 @@
+"""Pacote de exportação: vários documentos gerados em paralelo e entregues num único zip.
+
+Os geradores (ReportLab, python-docx) são Python puro e presos ao GIL, então cada documento
+roda em um processo do pool; o processo do app só consulta o cache de renderização, envia
+o que faltar e monta o zip. O tempo total fica próximo ao do documento mais lento.
+"""
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from headless import silence_bare_mode_warnings, spawn_context
+
+def _init_worker():
+    silence_bare_mode_warnings()
+    import app
+    app.warm_style_registry()
+
+def render_document(renderer, args):
+    """Executado no worker: ``app.<renderer>(*args)``."""
+    import app
+    return getattr(app, renderer)(*args)
+
+def make_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=spawn_context(), initializer=_init_worker)
+
+def _submit(pool, renderer, args):
+    return pool.submit(render_document, renderer, args() if callable(args) else args)
+
+def build_bundle(jobs, cache, pool):
+    """Zip com ``jobs`` = ``[(nome no zip, chave do cache, gerador, args)]``; ``args`` pode ser uma função.
+
+    Tudo que não está no cache é enviado ao pool de uma vez; os resultados voltam para o cache.
+    """
+    futures = {}
+    for _, key, renderer, args in jobs:
+        if key not in futures and cache.get(key) is None: futures[key] = _submit(pool, renderer, args)
+    buffer = io.BytesIO()
+    # PDF e DOCX já são comprimidos: ZIP_STORED evita recomprimir à toa
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zf:
+        for name, key, renderer, args in jobs:
+            future = futures.get(key)
+            # Sem future: já estava no cache (se foi despejado nesse meio tempo, gera de novo no pool)
+            render = future.result if future else lambda renderer=renderer, args=args: _submit(pool, renderer, args).result()
+            payload = cache.get_or_render(key, render)
+            if payload is not None: zf.writestr(name, payload)
+    return buffer.getvalue()
@@ -0,0 +1,19 @@
+"""Execução fora do ``streamlit run``: CLI, benchmarks e os processos dos pools.
+
+Sem dependência do Streamlit no import (ele só é carregado por quem silencia os avisos).
+"""
+import logging
+import multiprocessing
+
+BARE_MODE_LOGGERS = ("streamlit.runtime.scriptrunner_utils.script_run_context", "streamlit.runtime.state.session_state_proxy")
+
+def silence_bare_mode_warnings():
+    # O app.py roda em "bare mode" fora do `streamlit run`: silencia os avisos de contexto.
+    # O streamlit é importado antes, senão a configuração de logging dele reativa os loggers
+    import streamlit
+    for name in BARE_MODE_LOGGERS: logging.getLogger(name).disabled = True
+
+def spawn_context():
+    # Pools de processos usam spawn: o servidor do Streamlit tem várias threads, e fork com
+    # threads pode travar o filho num lock que outra thread segurava
+    return multiprocessing.get_context('spawn')
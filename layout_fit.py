@@ -0,0 +1,96 @@
+"""Paginação estimada a partir das medidas dos Flowables, sem doc.build (nem canvas).
+
+Reproduz a regra do Frame do ReportLab para Paragraphs e Spacers: espaço antes/depois
+sobreposto (``overlapAttachedSpace``), espaço antes ignorado no topo da página e quebra
+de parágrafo por linhas (sem linha órfã). Assim o ajuste automático de densidade testa
+várias escalas em microssegundos e o PDF é construído uma única vez, na escala escolhida;
+o mesmo posicionamento alimenta o medidor de páginas do editor (``layout_report``).
+"""
+import copy
+
+_FUZZ = 1e-6 # Mesma tolerância do rl_config._FUZZ
+
+def measure_flowables(flowables, avail_width):
+    """``(altura, entrelinha, linhas, espaço antes, espaço depois)`` por Flowable; linhas=0 não quebra."""
+    measures = []
+    for flowable in flowables:
+        # Cópia: o wrap guarda o layout na instância (os fragmentos cacheados ficam intactos)
+        f = copy.copy(flowable)
+        _, height = f.wrap(avail_width, 1e9)
+        para = getattr(f, 'blPara', None)
+        lines = len(para.lines) if para is not None and len(para.lines) > 1 else 0
+        measures.append((height, f.style.leading if lines else 0, lines, f.getSpaceBefore(), f.getSpaceAfter()))
+    return tuple(measures)
+
+def _layout(measures, frame_height):
+    """Posiciona as medidas em sequência: ``([(página inicial, página final)], páginas, espaço livre)``."""
+    spans = []
+    pages, y, at_top, prev_after = 1, frame_height, True, 0
+    for height, leading, lines, before, after in measures:
+        start = None
+        while True:
+            space = 0 if at_top else max(before - prev_after, 0)
+            avail = y - space
+            if avail > 0 and height <= avail + _FUZZ:
+                y -= space + height + after
+                prev_after = after
+                at_top = at_top and not (space + height + after)
+                break
+            # Paragraph.split: as linhas que cabem ficam (mínimo 2), o resto vai para a próxima página
+            fit = int(avail / leading) if lines and avail > 0 else 0
+            if fit >= 2 and fit < lines:
+                if start is None: start = pages
+                lines -= fit
+                height = lines * leading
+            elif at_top:
+                # Maior que a página vazia (o doc.build recusaria): conta e segue
+                y -= height + after
+                break
+            pages, y, at_top, prev_after = pages + 1, frame_height, True, 0
+        spans.append((pages if start is None else start, pages))
+    return spans, pages, y
+
+def paginate(measures, frame_height):
+    """Retorna ``(páginas, espaço livre na última página)`` para as medidas em sequência."""
+    _, pages, remaining = _layout(measures, frame_height)
+    return pages, remaining
+
+def layout_report(sections, frame_height, max_pages=1):
+    """Layout por seção a partir de ``[(seção, medidas)]`` na ordem do story.
+
+    ``sections`` traz a página inicial/final e a altura de cada seção; ``overflow`` lista os
+    Flowables (seção, índice no fragmento) que terminam depois de ``max_pages``.
+    """
+    names, measures = [], []
+    for name, section_measures in sections:
+        names.extend((name, index) for index in range(len(section_measures)))
+        measures.extend(section_measures)
+    spans, pages, remaining = _layout(measures, frame_height)
+    remaining = max(remaining, 0) # O espaço depois do último Flowable pode passar do rodapé
+    report = {
+        'pages': pages, 'max_pages': max_pages, 'frame_height': frame_height, 'remaining': remaining,
+        'used_height': pages * frame_height - remaining, 'sections': {}, 'overflow': [],
+    }
+    for (name, index), (start, end), measure in zip(names, spans, measures):
+        section = report['sections'].setdefault(name, {'start_page': start, 'end_page': end, 'height': 0.0})
+        section['end_page'] = end
+        section['height'] += measure[0]
+        if end > max_pages: report['overflow'].append({'section': name, 'index': index, 'start_page': start, 'end_page': end, 'split': start != end})
+    return report
+
+def largest_fitting(candidates, pages_at, target_pages):
+    """Maior candidato (lista crescente) com ``pages_at(c) <= target_pages``, por busca binária.
+
+    Retorna ``(candidato, páginas)``; se nenhum couber, o menor candidato e suas páginas.
+    """
+    lo, hi = 0, len(candidates) - 1
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        pages = pages_at(candidates[mid])
+        if pages <= target_pages:
+            best = (candidates[mid], pages)
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best or (candidates[0], pages_at(candidates[0]))
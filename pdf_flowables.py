@@ -0,0 +1,27 @@
+"""Flowables customizados dos PDFs (importado sob demanda: carrega o ReportLab platypus)."""
+from reportlab.lib import colors
+from reportlab.platypus import Flowable
+
+class HorizontalLine(Flowable):
+    def __init__(self, width, color=colors.black, thickness=1):
+        Flowable.__init__(self)
+        self.width = width
+        self.color = color
+        self.thickness = thickness
+    def draw(self):
+        self.canv.setStrokeColor(self.color)
+        self.canv.setLineWidth(self.thickness)
+        self.canv.line(0, 0, self.width, 0)
+
+class AnnexImage(Flowable):
+    """Figura de anexo a partir de um AnnexImageReader preparado fora do doc.build."""
+    def __init__(self, reader, width, height):
+        Flowable.__init__(self)
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = 'CENTER'
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask='auto')
@@ -0,0 +1,125 @@
+"""Pré-visualização HTML do Currículo e da Cover Letter (sem dependência do Streamlit).
+
+Os templates são compilados uma vez (``str.format`` já ligado). O Currículo vem dos blocos da
+IR (``document_ir``), os mesmos do PDF e do DOCX: cada seção é memoizada pela chave da IR e o
+documento sai de um único join. O conteúdo do usuário é escapado uma única vez, ao entrar no
+template.
+"""
+import functools
+import itertools
+from html import escape
+
+from caching import RenderCache, content_key
+
+PREVIEW_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+def _e(value):
+    return escape(str(value), quote=True)
+
+# --- TEMPLATES (CURRÍCULO) ---
+_DOCUMENT = '<div class="resume-preview">'
+_HEADER = '<div class="resume-header">{}</div>'.format
+_SECTION = '<div class="resume-section">{}</div>'.format
+_DESCRIPTION = '<div class="resume-description">{}</div>'.format
+_LIST = '<ul>{}</ul>'.format
+_SPACE = '<div style="height: {}pt"></div>'.format
+_FOOTER = '</div>'
+# Tipo de bloco da IR -> template do bloco (recebe os runs já escapados)
+_BLOCKS = {
+    'name': '<h1 class="resume-name">{}</h1>'.format,
+    'stack': '<div class="resume-stack">{}</div>'.format,
+    'contact': '<div class="resume-contact">{}</div>'.format,
+    'section': '<div class="resume-section-title">{}</div>'.format,
+    'body': "<div class='resume-paragraph'>{}</div>".format,
+    'label': "<div class='resume-achievements'>{}</div>".format,
+    'item': '<div class="resume-item-header">{}</div>'.format,
+    'degree': '<div class="resume-item-header">{}</div>'.format,
+    'date': '<div class="resume-item-sub">{}</div>'.format,
+    'bullet': '<li>{}</li>'.format,
+}
+# Blocos consecutivos do mesmo grupo vão para um único contêiner (lista ou descrição)
+_GROUPS = {'bullet': _LIST, 'body': _DESCRIPTION, 'label': _DESCRIPTION}
+_RUNS = {'': '{}'.format, 'b': '<b>{}</b>'.format, 'link': "<a href='{0}' target='_blank'>{0}</a>".format}
+
+def _runs(runs):
+    return "".join(_RUNS[mark](_e(text)) for text, mark in runs)
+
+def _lines(text, template):
+    # Uma linha não vazia por elemento (mesma regra do preview original)
+    return "".join(template(_e(line)) for line in text.split('\n') if line.strip())
+
+def _blocks(part, blocks):
+    html = []
+    for group, items in itertools.groupby(blocks, key=lambda block: _GROUPS.get(block[0])):
+        body = "".join(_SPACE(payload) if kind == 'space' else _BLOCKS[kind](_runs(payload)) for kind, payload in items)
+        html.append(group(body) if group else body)
+    return (_HEADER if part == 'header' else _SECTION)("".join(html)) if blocks else ""
+
+# --- TEMPLATES (COVER LETTER) ---
+_CL_HEADER = '<div class="resume-preview"><div class="resume-header"><h1 class="resume-name">{name}</h1><div class="resume-contact">📞 {phone} | ✉️ {email}</div></div><div style="margin-top: 20px; font-family: Arial; line-height: 1.6;">'.format
+_CL_BODY = '<p><strong>{today}</strong></p><p>{manager}<br>{company}<br>{address}</p><p>{greeting}:</p><p>{hook}</p><p>{narrative}</p><p>{star1}</p><p>{star2}</p><p>{research}</p><ul>{differentiation}</ul><p>{closing}</p>'.format
+_CL_ITEM = '<li>{}</li>'.format
+_CL_SIGNATURE = '<br><p>Sincerely,</p><br><p><strong>{name}</strong></p></div></div>'.format
+
+def _cl_header(resume_data):
+    contact = resume_data['contact']
+    return _CL_HEADER(name=_e(contact['name']), phone=_e(contact['phone']), email=_e(contact['email']))
+
+def _cl_body(cl_data, today):
+    recipient, opening, competencies, alignment = cl_data['recipient'], cl_data['opening'], cl_data['competencies'], cl_data['alignment']
+    return _CL_BODY(
+        today=_e(today), manager=_e(recipient['manager']), company=_e(recipient['company']), address=_e(recipient['address']),
+        greeting=_e(opening['greeting']), hook=_e(opening['hook']), narrative=_e(cl_data['narrative']),
+        star1=_e(competencies['star1']), star2=_e(competencies['star2']), research=_e(alignment['research']),
+        differentiation=_lines(alignment['differentiation'], _CL_ITEM), closing=_e(cl_data['closing']))
+
+def _cl_signature(resume_data):
+    return _CL_SIGNATURE(name=_e(resume_data['contact']['name']))
+
+# --- CSS ---
+@functools.lru_cache(maxsize=16)
+def preview_css(scale_factor):
+    # CSS Dinâmico (Preview) - compartilhado pelos previews de Currículo e Cover Letter
+    return f"""
+        <style>
+        .resume-preview {{ font-family: 'Times New Roman', Times, serif; background-color: white; padding: {2 * scale_factor}rem; border-radius: 5px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); color: #000; line-height: {1.3 * scale_factor}; }}
+        .resume-header {{ text-align: center; padding-bottom: {5 * scale_factor}px; margin-bottom: {5 * scale_factor}px; }}
+        .resume-name {{ color: #000; font-size: {2.5 * scale_factor}em; font-weight: bold; margin: 0; }}
+        .resume-stack {{ font-family: Arial, Helvetica, sans-serif; font-size: {1.1 * scale_factor}em; color: #000; margin-top: 5px; margin-bottom: 5px; }}
+        .resume-contact {{ font-size: {0.9 * scale_factor}em; color: #000; margin-top: 5px; }}
+        .resume-section-title {{ color: #000; font-size: {1.2 * scale_factor}em; font-weight: bold; margin-top: {12 * scale_factor}px; margin-bottom: {2 * scale_factor}px; text-transform: uppercase; text-align: center; }}
+        .resume-item-header {{ font-family: 'Times New Roman', serif; font-weight: bold; font-size: {1.05 * scale_factor}em; color: #000; margin-bottom: 2px; }}
+        .resume-item-sub {{ font-style: italic; color: #000; font-size: {0.95 * scale_factor}em; font-family: 'Times New Roman', serif; margin-bottom: 2px; }}
+        .resume-description {{ margin-top: 2px; font-size: {0.95 * scale_factor}em; text-align: justify; color: #000; }}
+        .resume-paragraph {{ margin-bottom: {3 * scale_factor}px; }}
+        .resume-achievements {{ margin-top: {8 * scale_factor}px; font-weight: bold; margin-bottom: {2 * scale_factor}px; color: #000; }}
+        </style>
+    """
+
+# --- RENDERIZADOR ---
+class PreviewRenderer:
+    """Monta os previews a partir de fragmentos memoizados; seguro para várias sessões/threads."""
+    def __init__(self, max_bytes=PREVIEW_CACHE_MAX_BYTES):
+        self.cache = RenderCache(max_bytes=max_bytes)
+
+    def _fragment(self, render, *parts):
+        return self.cache.get_or_render(content_key('preview', render.__name__, *parts), lambda: render(*parts))
+
+    def resume(self, sections):
+        """HTML do Currículo a partir de ``[(seção, chave, blocos)]`` (``DocumentIR.resume``).
+
+        Cada seção é memoizada pela chave da IR: editar uma experiência só re-renderiza ela.
+        """
+        parts = [_DOCUMENT]
+        parts.extend(self.cache.get_or_render(('preview', key), lambda: _blocks(part, blocks)) for part, key, blocks in sections)
+        parts.append(_FOOTER)
+        return "".join(parts)
+
+    def cover_letter(self, resume_data, cl_data, today):
+        # `today` já formatado (ex: date.today().strftime('%B %d, %Y')): a data entra na chave
+        contact = {field: resume_data['contact'][field] for field in ('name', 'phone', 'email')}
+        return "".join([
+            self._fragment(_cl_header, {'contact': contact}),
+            self._fragment(_cl_body, cl_data, today),
+            self._fragment(_cl_signature, {'contact': contact}),
+        ])
@@ -0,0 +1,102 @@
+"""Instrumentação opt-in (spans com tempo de parede) para o app e a CLI, sem dependência do Streamlit."""
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+def percentile(values, q):
+    # Nearest-rank: suficiente para p50/p95 de janelas pequenas
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+class Profiler:
+    """Agrega durações por nome de span e, opcionalmente, grava cada span como JSON lines.
+
+    As linhas seguem os campos de um span OpenTelemetry (trace_id, span_id,
+    parent_span_id, start/end em nanos Unix, attributes); spans aninhados herdam o
+    trace do span externo (ex: rerun -> preview -> generate_pdf).
+
+    ``enabled`` liga para o processo inteiro (agregado no escopo ``None``). ``session`` é
+    consultado a cada span e devolve a sessão que ligou a instrumentação só para si (ou
+    None): as durações dela ficam separadas, no máximo ``max_sessions`` (as menos recentes
+    são descartadas).
+    """
+    def __init__(self, enabled=False, trace_path=None, window=1000, max_sessions=32, session=lambda: None):
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.window = window
+        self.max_sessions = max_sessions
+        self.session = session
+        self._scopes = OrderedDict() # escopo -> (durações por nome, spans recentes)
+        self._lock = threading.Lock()
+        self._trace_file = None
+
+    @contextmanager
+    def span(self, name, **attributes):
+        # Desligado: só a consulta da sessão e um if; o dict de atributos pode ser preenchido pelo chamador
+        session_id = self.session()
+        if not self.enabled and session_id is None:
+            yield attributes
+            return
+        parent = _current_span.get()
+        span_id = os.urandom(8).hex()
+        trace_id = parent[0] if parent else os.urandom(16).hex()
+        token = _current_span.set((trace_id, span_id))
+        start_ns = time.time_ns()
+        started = time.perf_counter_ns()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes['error'] = type(e).__name__
+            raise
+        finally:
+            duration_ns = time.perf_counter_ns() - started
+            _current_span.reset(token)
+            self._record({
+                'name': name, 'trace_id': trace_id, 'span_id': span_id,
+                'parent_span_id': parent[1] if parent else None,
+                'start_time_unix_nano': start_ns, 'end_time_unix_nano': start_ns + duration_ns,
+                'duration_ms': round(duration_ns / 1e6, 3), 'session': session_id, 'attributes': attributes,
+            }, session_id)
+
+    def _scope(self, session_id):
+        # Chamado com o lock: cria o escopo na primeira vez e mantém os mais recentes
+        if session_id not in self._scopes:
+            self._scopes[session_id] = (defaultdict(lambda: deque(maxlen=self.window)), deque(maxlen=200))
+            sessions = [key for key in self._scopes if key is not None]
+            if len(sessions) > self.max_sessions: del self._scopes[sessions[0]]
+        self._scopes.move_to_end(session_id)
+        return self._scopes[session_id]
+
+    def _record(self, span, session_id):
+        with self._lock:
+            for scope in {None if self.enabled else session_id, session_id}:
+                durations, recent = self._scope(scope)
+                durations[span['name']].append(span['duration_ms'])
+                recent.append(span)
+            if self.trace_path:
+                if self._trace_file is None: self._trace_file = open(self.trace_path, 'a', encoding='utf-8')
+                self._trace_file.write(json.dumps(span, default=str) + '\n')
+                self._trace_file.flush()
+
+    def summary(self, session_id=None):
+        with self._lock:
+            durations = self._scopes[session_id][0] if session_id in self._scopes else {}
+            snapshot = {name: list(values) for name, values in durations.items()}
+        return {name: {'count': len(values), 'p50_ms': percentile(values, 50), 'p95_ms': percentile(values, 95), 'max_ms': max(values), 'last_ms': values[-1]}
+                for name, values in sorted(snapshot.items()) if values}
+
+    def recent(self, limit=20, session_id=None):
+        with self._lock:
+            return list(self._scopes[session_id][1])[-limit:] if session_id in self._scopes else []
+
+    def clear(self, session_id=None):
+        with self._lock:
+            self._scopes.pop(session_id, None)
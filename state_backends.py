@@ -0,0 +1,193 @@
+"""Backends plugáveis para o estado dos documentos (memória, SQLite, servidor chave-valor).
+
+Todos guardam os mesmos valores serializados por ``encode_payload``: um byte de versão,
+um byte de formato e o JSON (com tipos marcados), comprimido com zlib quando compensa.
+Assim qualquer worker que aponte para o mesmo backend lê o estado escrito por outro.
+"""
+import base64
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date
+from urllib.parse import urlparse
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# --- SERIALIZAÇÃO VERSIONADA ---
+PAYLOAD_VERSION = 1
+_RAW, _ZLIB = 0, 1
+COMPRESS_MIN_BYTES = 256 # Abaixo disso o cabeçalho do zlib não compensa
+
+def _tag(obj):
+    if isinstance(obj, date): return {'$date': obj.isoformat()}
+    if isinstance(obj, (bytes, bytearray)): return {'$bytes': base64.b64encode(obj).decode('ascii')}
+    raise TypeError(f"Cannot store {type(obj).__name__}")
+
+def _untag(obj):
+    if '$date' in obj and len(obj) == 1: return date.fromisoformat(obj['$date'])
+    if '$bytes' in obj and len(obj) == 1: return base64.b64decode(obj['$bytes'])
+    return obj
+
+def dump_value(value):
+    # JSON canônico (chaves ordenadas): o mesmo valor sempre gera os mesmos bytes
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=_tag).encode('utf-8')
+
+def encode_payload(value):
+    return pack_payload(dump_value(value))
+
+def pack_payload(raw):
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw): return bytes((PAYLOAD_VERSION, _ZLIB)) + packed
+    return bytes((PAYLOAD_VERSION, _RAW)) + raw
+
+def decode_payload(payload):
+    payload = bytes(payload)
+    version, fmt = payload[0], payload[1]
+    if version != PAYLOAD_VERSION: raise ValueError(f"Unsupported state payload version {version}")
+    raw = zlib.decompress(payload[2:]) if fmt == _ZLIB else payload[2:]
+    return json.loads(raw, object_hook=_untag)
+
+# --- INTERFACE ---
+class StateBackend:
+    """Contrato comum: campos de documentos por (doc_id, kind, field) e blobs por hash."""
+    def load_document(self, doc_id):
+        """Retorna ``{(kind, field): payload}`` do documento (vazio se não existir)."""
+        raise NotImplementedError
+    def write_fields(self, rows):
+        """Grava ``{(doc_id, kind, field): payload}`` atomicamente."""
+        raise NotImplementedError
+    def put_blob(self, digest, data):
+        raise NotImplementedError
+    def get_blob(self, digest):
+        """Retorna os bytes do blob ou ``None``."""
+        raise NotImplementedError
+    def close(self):
+        pass
+
+# --- EM MEMÓRIA (UM PROCESSO) ---
+class MemoryBackend(StateBackend):
+    """Estado no próprio processo: sobrevive a refresh, não a restart nem a outros workers."""
+    def __init__(self):
+        self._documents = {}
+        self._blobs = {}
+        self._lock = threading.Lock()
+
+    def load_document(self, doc_id):
+        with self._lock:
+            return dict(self._documents.get(doc_id, {}))
+
+    def write_fields(self, rows):
+        with self._lock:
+            for (doc_id, kind, field), payload in rows.items():
+                self._documents.setdefault(doc_id, {})[(kind, field)] = payload
+
+    def put_blob(self, digest, data):
+        with self._lock: self._blobs.setdefault(digest, data)
+
+    def get_blob(self, digest):
+        with self._lock: return self._blobs.get(digest)
+
+# --- SQLITE (ARQUIVO LOCAL, COMPARTILHADO ENTRE PROCESSOS) ---
+SQLITE_SCHEMA_VERSION = 2
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (doc_id, kind, field)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+class SqliteBackend(StateBackend):
+    def __init__(self, path):
+        self.path = path
+        # WAL + busy_timeout: vários workers no mesmo arquivo sem "database is locked"
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._lock = threading.Lock()
+        self._migrate()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            # v1 guardava o JSON como texto; v2 guarda o payload versionado
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                rows = self._conn.execute("SELECT doc_id, kind, field, value FROM documents WHERE typeof(value) = 'text'").fetchall()
+                self._conn.executemany("UPDATE documents SET value = ? WHERE doc_id = ? AND kind = ? AND field = ?",
+                                       [(encode_payload(json.loads(value, object_hook=_untag)), doc_id, kind, field) for doc_id, kind, field, value in rows])
+        if version < SQLITE_SCHEMA_VERSION: self._conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+
+    def load_document(self, doc_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, field, value FROM documents WHERE doc_id = ?", (doc_id,)).fetchall()
+        return {(kind, field): bytes(value) for kind, field, value in rows}
+
+    def write_fields(self, rows):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO documents (doc_id, kind, field, value, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (doc_id, kind, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                    [(*key, payload, now) for key, payload in rows.items()])
+
+    def put_blob(self, digest, data):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO blobs (hash, data, size, created_at) VALUES (?, ?, ?, ?)", (digest, data, len(data), time.time()))
+
+    def get_blob(self, digest):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def close(self):
+        with self._lock: self._conn.close()
+
+# --- SERVIDOR CHAVE-VALOR (REDIS) ---
+class RedisBackend(StateBackend):
+    """Um hash ``doc:<id>`` por documento (campo ``kind/field``) e ``blob:<hash>`` por imagem."""
+    def __init__(self, url):
+        if redis is None: raise RuntimeError("redis:// state backend requires the 'redis' package (pip install redis).")
+        self._client = redis.Redis.from_url(url)
+
+    def load_document(self, doc_id):
+        return {tuple(key.decode('utf-8').split('/', 1)): value for key, value in self._client.hgetall(f'doc:{doc_id}').items()}
+
+    def write_fields(self, rows):
+        pipe = self._client.pipeline(transaction=True)
+        for (doc_id, kind, field), payload in rows.items(): pipe.hset(f'doc:{doc_id}', f'{kind}/{field}', payload)
+        pipe.execute()
+
+    def put_blob(self, digest, data):
+        self._client.set(f'blob:{digest}', data, nx=True)
+
+    def get_blob(self, digest):
+        return self._client.get(f'blob:{digest}')
+
+    def close(self):
+        self._client.close()
+
+def open_backend(url):
+    """``memory://``, ``sqlite:///caminho/arquivo.sqlite3`` ou ``redis://host:6379/0``."""
+    scheme = urlparse(url).scheme
+    if scheme == 'memory': return MemoryBackend()
+    if scheme == 'sqlite': return SqliteBackend(url[len('sqlite:///'):] if url.startswith('sqlite:///') else url[len('sqlite://'):])
+    if scheme in ('redis', 'rediss', 'unix'): return RedisBackend(url)
+    raise ValueError(f"Unknown state backend URL: {url!r}")
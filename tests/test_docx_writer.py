@@ -0,0 +1,27 @@
+import io
+
+import pytest
+
+docx = pytest.importorskip("docx")
+
+from docx_writer import abnt_docx
+
+BUDGET_ROWS = (('Item', 'Valor'), ('Servidor', '1,200.00'), ('TOTAL', '1,200.00'))
+
+def _first_cell_format(blocks):
+    document = docx.Document(io.BytesIO(abnt_docx(blocks)))
+    assert len(document.tables) == 1
+    return document.tables[0].rows[0].cells[0].paragraphs[0].paragraph_format
+
+def test_page_break_before_budget_table_is_kept():
+    blocks = (('h1', (("6. Orçamento", ''),)), ('page_break', None), ('table', ('budget', BUDGET_ROWS)))
+    assert _first_cell_format(blocks).page_break_before
+
+def test_space_before_table_is_kept():
+    blocks = (('h1', (("5. Cronograma", ''),)), ('space', 12), ('table', ('timeline', (('Data', 'Marco'), ('2026-01-01', 'Início')))))
+    assert _first_cell_format(blocks).space_before.pt == 12
+
+def test_table_without_pending_layout_is_unchanged():
+    blocks = (('h1', (("6. Orçamento", ''),)), ('table', ('budget', BUDGET_ROWS)))
+    fmt = _first_cell_format(blocks)
+    assert not fmt.page_break_before and fmt.space_before is None